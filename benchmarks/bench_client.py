@@ -0,0 +1,92 @@
+"""
+Throughput and latency of the clients against a local mock PTV server, run from the repository root:
+
+    python benchmarks/bench_client.py
+
+Every request goes over HTTP to benchmarks/mock_server.py, which checks its signature and adds LATENCY seconds.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from ptv_api import AsyncPTVClient, PTVClient
+from mock_server import MockPTVServer
+
+REQUESTS = 400
+THREADS = 16
+LATENCY = 0.005
+# Distinct requests of the cached mode, each one is fetched once and then served from the cache
+CACHED_KEYS = 20
+
+WORKLOADS = {
+    'departures': ('get_departures_by_stop', lambda i: (0, 1000 + i), {'max_results': 100}),
+    'pattern + geopath': ('get_pattern_by_run_ref', lambda i: (str(950000 + i), 0), {'include_geopath': True}),
+    'stops by route': ('get_stops_by_route', lambda i: (i, 0), {}),
+}
+
+
+def timed(call) -> float:
+    started = time.perf_counter()
+    call()
+    return time.perf_counter() - started
+
+
+def sequential(client, method: str, args, kwargs: dict, keys: int = REQUESTS) -> list:
+    func = getattr(client, method)
+    return [timed(lambda: func(*args(i % keys), **kwargs)) for i in range(REQUESTS)]
+
+
+def threaded(client, method: str, args, kwargs: dict) -> list:
+    func = getattr(client, method)
+    with ThreadPoolExecutor(THREADS) as executor:
+        return list(executor.map(lambda i: timed(lambda: func(*args(i), **kwargs)), range(REQUESTS)))
+
+
+async def concurrent(client, method: str, args, kwargs: dict) -> list:
+    func = getattr(client, method)
+
+    async def call(i):
+        started = time.perf_counter()
+        await func(*args(i), **kwargs)
+        return time.perf_counter() - started
+
+    return await asyncio.gather(*(call(i) for i in range(REQUESTS)))
+
+
+async def run_async(server, method: str, args, kwargs: dict) -> list:
+    async with AsyncPTVClient(MockPTVServer.API_KEY, MockPTVServer.DEVELOPER_ID, base_url=server.url,
+                              max_concurrency=THREADS * 4) as client:
+        return await concurrent(client, method, args, kwargs)
+
+
+def report(mode: str, latencies: list, seconds: float) -> None:
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"  {mode:<12} {len(latencies) / seconds:>9,.0f} req/s   "
+          f"p50 {quantiles[49] * 1000:>7.2f} ms   p99 {quantiles[98] * 1000:>7.2f} ms")
+
+
+def measure(mode: str, run) -> None:
+    started = time.perf_counter()
+    latencies = run()
+    report(mode, latencies, time.perf_counter() - started)
+
+
+if __name__ == '__main__':
+    with MockPTVServer(latency=LATENCY) as server:
+        credentials = (MockPTVServer.API_KEY, MockPTVServer.DEVELOPER_ID)
+        print(f"{REQUESTS} requests, {LATENCY * 1000:.0f} ms server latency, {THREADS} threads\n")
+        for name, (method, args, kwargs) in WORKLOADS.items():
+            print(name)
+            with PTVClient(*credentials, base_url=server.url, pool_size=THREADS) as client:
+                measure('sequential', lambda: sequential(client, method, args, kwargs))
+                measure('threaded', lambda: threaded(client, method, args, kwargs))
+            try:
+                measure('async', lambda: asyncio.run(run_async(server, method, args, kwargs)))
+            except ImportError as e:
+                print(f"  {'async':<12} skipped: {e}")
+            with PTVClient(*credentials, base_url=server.url, cache=True) as client:
+                measure('cached', lambda: sequential(client, method, args, kwargs, CACHED_KEYS))
@@ -0,0 +1,50 @@
+"""
+Memory held by a network snapshot as decoded dicts against typed records, run from the repository root:
+
+    python benchmarks/bench_models_memory.py
+"""
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from ptv_api.models import decode_departures, decode_stops
+import payloads
+
+ROUTES = 200
+STOPS = 500
+
+
+def measure(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    data = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del data
+    return size
+
+
+def report(name: str, size: int, baseline: int = None) -> None:
+    ratio = f"  ({size / baseline:.0%})" if baseline else ''
+    print(f"{name:<45} {size / 1024 / 1024:>8.1f} MiB{ratio}")
+
+
+if __name__ == '__main__':
+    stops = [payloads.dumps(payloads.stops_response(route_id)) for route_id in range(ROUTES)]
+    departures = [payloads.dumps(payloads.departures_response(stop_id, seed=stop_id)) for stop_id in range(STOPS)]
+
+    print(f"{ROUTES} stops by route responses")
+    baseline = measure(lambda: [json.loads(body) for body in stops])
+    report("dicts", baseline)
+    report("Stop records", measure(lambda: [decode_stops(body) for body in stops]), baseline)
+    report("Stop records, interned", measure(lambda: [decode_stops(body, intern=True) for body in stops]), baseline)
+
+    print(f"\n{STOPS} departures responses")
+    baseline = measure(lambda: [json.loads(body) for body in departures])
+    report("dicts", baseline)
+    report("Departure records", measure(lambda: [decode_departures(body) for body in departures]), baseline)
+    report("Departure records, interned",
+           measure(lambda: [decode_departures(body, intern=True) for body in departures]), baseline)
@@ -0,0 +1,40 @@
+"""
+Signatures per second of get_url against a client's Signer, run from the repository root:
+
+    python benchmarks/bench_signing.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from ptv_api.src.get_signature import get_url, Signer
+
+API_KEY = 'abcd1234-ab12-cd34-abcdef123456'
+DEVELOPER_ID = 1234567
+NUMBER = 100_000
+
+# A departures poll, the hottest request of a departure board
+ENDPOINT = '/v3/departures/route_type/0/stop/1181'
+PARAMS = {'max_results': 10, 'expand': ['run', 'route'], 'include_cancelled': True}
+
+
+def report(name: str, seconds: float, baseline: float = None) -> None:
+    rate = NUMBER / seconds
+    speedup = f"  ({baseline / seconds:.1f}x)" if baseline else ''
+    print(f"{name:<40} {rate:>12,.0f} signatures/s{speedup}")
+
+
+if __name__ == '__main__':
+    uncached = Signer(API_KEY, DEVELOPER_ID, cache_size=0)
+    memoised = Signer(API_KEY, DEVELOPER_ID)
+    stops = [f'/v3/departures/route_type/0/stop/{stop_id}' for stop_id in range(1000, 1200)]
+
+    baseline = timeit.timeit(lambda: get_url(ENDPOINT, API_KEY, DEVELOPER_ID, PARAMS), number=NUMBER)
+    report("get_url", baseline)
+    report("Signer, pre-keyed HMAC", timeit.timeit(lambda: uncached.sign(ENDPOINT, PARAMS), number=NUMBER), baseline)
+
+    # 200 stops polled in turn, all of them fit in the memo
+    it = iter(range(NUMBER))
+    report("Signer, memoised (200 stops)",
+           timeit.timeit(lambda: memoised.sign(stops[next(it) % 200], PARAMS), number=NUMBER), baseline)
@@ -0,0 +1,127 @@
+"""
+Local stand-in for the PTV API, so benchmarks run offline and without credentials.
+Requests must be signed with MockPTVServer.API_KEY / DEVELOPER_ID, like the real API checks them.
+
+    with MockPTVServer() as server:
+        client = PTVClient(MockPTVServer.API_KEY, MockPTVServer.DEVELOPER_ID, base_url=server.url)
+"""
+import hmac
+import re
+import sys
+import threading
+import time
+import zlib
+from functools import lru_cache
+from hashlib import sha1
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from payloads import STATUS, departures_response, dumps, pattern_response, routes_response, runs_response, stops_response
+
+
+@lru_cache(maxsize=None)
+def _departures(stop_id: int) -> bytes:
+    return dumps(departures_response(stop_id, count=100, seed=stop_id))
+
+
+@lru_cache(maxsize=None)
+def _pattern(run_ref: str, geopath: bool) -> bytes:
+    return dumps(pattern_response(run_ref, points=2000 if geopath else 0, seed=zlib.crc32(run_ref.encode())))
+
+
+@lru_cache(maxsize=None)
+def _stops(route_id: int) -> bytes:
+    return dumps(stops_response(route_id, count=30))
+
+
+@lru_cache(maxsize=None)
+def _runs(route_id: int) -> bytes:
+    return dumps(runs_response(route_id))
+
+
+ROUTES = (
+    (re.compile(r'/v3/departures/route_type/\d+/stop/(\d+)$'), lambda m, query: _departures(int(m[1]))),
+    (re.compile(r'/v3/pattern/run/([^/]+)/route_type/\d+$'),
+     lambda m, query: _pattern(m[1], query.get('include_geopath', ['false'])[0].lower() == 'true')),
+    (re.compile(r'/v3/stops/route/(\d+)/route_type/\d+$'), lambda m, query: _stops(int(m[1]))),
+    (re.compile(r'/v3/runs/route/(\d+)/route_type/\d+$'), lambda m, query: _runs(int(m[1]))),
+    (re.compile(r'/v3/routes$'), lambda m, query: dumps(routes_response())),
+    (re.compile(r'/v3/route_types$'), lambda m, query: dumps({'route_types': [], 'status': STATUS})),
+)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, Nagle's algorithm would hold the body back for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+
+        # The signature covers the path and query up to, and excluding, '&signature='
+        raw, _, signature = self.path.rpartition('&signature=')
+        expected = hmac.new(server.api_key, raw.encode(), sha1).hexdigest()
+        parts = urlsplit(raw)
+        query = parse_qs(parts.query)
+        if not hmac.compare_digest(signature, expected) or query.get('devid') != [str(server.developer_id)]:
+            return self._reply(403, b'{"message":"Forbidden"}')
+
+        for pattern, build in ROUTES:
+            match = pattern.match(parts.path)
+            if match:
+                return self._reply(200, build(match, query))
+        self._reply(404, b'{"message":"Not found"}')
+
+    def _reply(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockPTVServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server answering departures, patterns (with geopaths when asked), stops by route, routes and runs
+    by route with synthetic responses of realistic size, after checking each request's signature.
+    """
+    API_KEY = 'abcd1234-ab12-cd34-abcdef123456'
+    DEVELOPER_ID = 1234567
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, port: int = 0, latency: float = 0.0, api_key: str = API_KEY, developer_id: int = DEVELOPER_ID):
+        """
+        :param port: Port to listen on, a free one is picked by default
+        :param latency: Seconds added to each response, standing in for the round-trip to the real API
+        :param api_key: API key requests must be signed with
+        :param developer_id: Developer ID requests must carry
+        """
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.latency = latency
+        self.api_key = api_key.encode()
+        self.developer_id = developer_id
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def handle_error(self, request, client_address):
+        # Clients closing pooled connections on exit are expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,107 @@
+"""
+Synthetic PTV API responses of realistic shape and size, shared by the benchmarks.
+"""
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+SUBURBS = ['Melbourne City', 'Richmond', 'South Yarra', 'Caulfield', 'Dandenong', 'Footscray', 'Box Hill',
+           'Frankston', 'Ringwood', 'Sunshine', 'Werribee', 'Pakenham', 'Glen Waverley', 'Epping', 'Craigieburn']
+ROUTE_NAMES = ['Pakenham', 'Cranbourne', 'Frankston', 'Sandringham', 'Werribee', 'Williamstown', 'Craigieburn',
+               'Upfield', 'Mernda', 'Hurstbridge', 'Lilydale', 'Belgrave', 'Glen Waverley', 'Alamein', 'Sunbury']
+STATUS = {'version': '3.0', 'health': 1}
+
+
+def _utc(minutes: float) -> str:
+    base = datetime(2024, 5, 1, 8, 0, tzinfo=timezone.utc)
+    return (base + timedelta(minutes=minutes)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def departure(rng: random.Random, stop_id: int, index: int) -> dict:
+    route_id = rng.randrange(1, 16)
+    scheduled = index * 3 + rng.random()
+    return {
+        'stop_id': stop_id,
+        'route_id': route_id,
+        'run_id': 950000 + rng.randrange(50000),
+        'run_ref': str(950000 + rng.randrange(50000)),
+        'direction_id': rng.choice((1, 2)),
+        'disruption_ids': rng.sample(range(300000, 300050), rng.randrange(3)),
+        'scheduled_departure_utc': _utc(scheduled),
+        'estimated_departure_utc': _utc(scheduled + rng.random() * 4) if rng.random() < 0.7 else None,
+        'at_platform': False,
+        'platform_number': str(rng.randrange(1, 15)),
+        'flags': rng.choice(('', 'S_WCA', 'RR-S_WCA')),
+        'departure_sequence': 0,
+    }
+
+
+def departures_response(stop_id: int = 1181, count: int = 100, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    return {'departures': [departure(rng, stop_id, i) for i in range(count)], 'stops': {}, 'routes': {},
+            'runs': {}, 'directions': {}, 'disruptions': {}, 'status': STATUS}
+
+
+def stop(rng: random.Random, stop_id: int, sequence: int = 0) -> dict:
+    suburb = rng.choice(SUBURBS)
+    return {
+        'disruption_ids': [],
+        'stop_suburb': suburb,
+        'route_type': 0,
+        'stop_latitude': -37.8 + rng.uniform(-0.3, 0.3),
+        'stop_longitude': 144.96 + rng.uniform(-0.4, 0.4),
+        'stop_sequence': sequence,
+        'stop_id': stop_id,
+        'stop_name': f'{suburb} Station',
+        'stop_landmark': '',
+    }
+
+
+def stops_response(route_id: int = 11, count: int = 30, seed: int = 0) -> dict:
+    rng = random.Random(seed + route_id)
+    return {'stops': [stop(rng, 1000 + rng.randrange(300), i) for i in range(count)], 'disruptions': {},
+            'geopath': [], 'status': STATUS}
+
+
+def dumps(data: dict) -> bytes:
+    return json.dumps(data, separators=(',', ':')).encode()
+
+
+def geopath(rng: random.Random, direction_id: int, points: int = 2000) -> dict:
+    lat, lon = -37.8 + rng.uniform(-0.1, 0.1), 144.96 + rng.uniform(-0.1, 0.1)
+    path = []
+    for _ in range(points):
+        lat += rng.uniform(-0.0005, 0.0005)
+        lon += rng.uniform(-0.0005, 0.0005)
+        path.append(f'{lat:.6f} {lon:.6f}')
+    return {'direction_id': direction_id, 'valid_from': '2024-01-01', 'valid_to': '2024-12-31',
+            'paths': [', '.join(path)]}
+
+
+def pattern_response(run_ref: str = '951181', count: int = 25, points: int = 2000, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    stops = [stop(rng, 1000 + i, i) for i in range(count)]
+    departures = [dict(departure(rng, s['stop_id'], i), run_ref=run_ref, departure_sequence=i)
+                  for i, s in enumerate(stops)]
+    route_id = departures[0]['route_id']
+    route = {'route_type': 0, 'route_id': route_id, 'route_name': ROUTE_NAMES[route_id - 1],
+             'route_number': '', 'route_gtfs_id': f'2-{route_id:03d}',
+             'geopath': [geopath(rng, 1, points)] if points else []}
+    return {'disruptions': [], 'departures': departures, 'stops': {str(s['stop_id']): s for s in stops},
+            'routes': {str(route_id): route}, 'runs': {}, 'directions': {}, 'status': STATUS}
+
+
+def routes_response(count: int = 50) -> dict:
+    routes = [{'route_type': 0, 'route_id': route_id, 'route_name': ROUTE_NAMES[(route_id - 1) % len(ROUTE_NAMES)],
+               'route_number': '', 'route_gtfs_id': f'2-{route_id:03d}', 'geopath': []}
+              for route_id in range(1, count + 1)]
+    return {'routes': routes, 'status': STATUS}
+
+
+def runs_response(route_id: int = 11, count: int = 40) -> dict:
+    rng = random.Random(route_id)
+    runs = [{'run_id': route_id * 10000 + i, 'run_ref': str(route_id * 10000 + i), 'route_id': route_id,
+             'route_type': 0, 'final_stop_id': 1000 + rng.randrange(300), 'destination_name': rng.choice(SUBURBS),
+             'status': 'scheduled', 'direction_id': rng.choice((1, 2)), 'run_sequence': i, 'express_stop_count': 0}
+            for i in range(count)]
+    return {'runs': runs, 'status': STATUS}
@@ -1,3 +1,12 @@
 from .client import PTVClient
+from .async_client import AsyncPTVClient
+from .src.cache import ResponseCache, SQLiteCache
+from .models import Departure, Disruption, Outlet, Route, Run, Stop
+from .snapshot import NetworkSnapshot
+from .src.metrics import Instrumentation, MetricsRegistry
+from .src.latency import LatencyPolicy
+from .src.ratelimit import RateLimiter, ProcessRateLimiter, RetryPolicy, priority, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
 
-__all__ = ['PTVClient']
+__all__ = ['PTVClient', 'AsyncPTVClient', 'ResponseCache', 'SQLiteCache', 'Departure', 'Disruption', 'Outlet', 'Route',
+           'Run', 'Stop', 'NetworkSnapshot', 'Instrumentation', 'MetricsRegistry', 'RateLimiter', 'ProcessRateLimiter',
+           'RetryPolicy', 'LatencyPolicy', 'priority', 'PRIORITY_HIGH', 'PRIORITY_NORMAL', 'PRIORITY_LOW']
@@ -0,0 +1,251 @@
+import asyncio
+import time
+from .client import BasePTVClient
+from .src.transport import AsyncTransport, AiohttpTransport, DEFAULT_TIMEOUT
+from .src.batch import run_batch_async
+from .src.singleflight import AsyncSingleFlight
+
+
+class AsyncPTVClient(BasePTVClient):
+    """
+    asyncio counterpart of PTVClient. It has the same endpoint methods, each returning a coroutine.
+
+        async with AsyncPTVClient() as client:
+            departures = await client.get_departures_by_stop(0, 1181)
+    """
+
+    def __init__(self, api_key: str = None, developer_id: int = None, transport: AsyncTransport = None,
+                 pool_size: int = 100, timeout: float = DEFAULT_TIMEOUT, max_concurrency: int = 100, **options):
+        """
+        Initializes an AsyncPTVClient object without any network access, credentials are checked on first use or with validate()
+        :param api_key: PTV provided API key
+        :param developer_id: PTV provided Developer ID
+        :param transport: Async HTTP transport to send requests through, defaults to a pooled aiohttp session
+        :param pool_size: Maximum number of connections of the default transport
+        :param timeout: Request timeout in seconds of the default transport
+        :param max_concurrency: Maximum number of requests in flight at once
+        :param options: Options shared with PTVClient, see BasePTVClient: response_format, cache, coalesce,
+            rate_limiter, retry, instrumentation, base_url, latency
+        """
+        super().__init__(api_key, developer_id, **options)
+        self._singleflight = AsyncSingleFlight()
+        # Background refreshes of stale cached responses by request, referenced until they complete
+        self._revalidating = {}
+
+        self.transport = transport or AiohttpTransport(pool_size=pool_size, timeout=timeout)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def validate(self) -> bool:
+        """
+        Validates the credentials by using /v3/route_types endpoint.
+        :return: True if the credentials authenticate successfully
+        :raises RuntimeError: If the API key / Developer ID fail to authenticate
+        """
+        async with self._semaphore:
+            response = await self.transport.get(self._sign('/v3/route_types'))
+        if response.status_code != 200:
+            raise RuntimeError("API Key / Developer ID authentication fail")
+        self._validated = True
+        return True
+
+    async def send(self, endpoint: str, params: dict = None, headers: dict = None):
+        """
+        See PTVClient.send().
+        """
+        return await self._send(None, endpoint, params, headers={} if headers is None else headers)
+
+    async def close(self) -> None:
+        """
+        Closes the client's transport and its pooled connections.
+        """
+        await self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def _local_response(self, data: dict, response_format: str = None, fields: str or list = None):
+        """
+        Returns a response answered locally as a coroutine, like every endpoint method of this client.
+        """
+        return super()._local_response(data, response_format, fields)
+
+    async def _make_request(self, endpoint: str, params: dict = None, response_format: str = None,
+                            deadline: float = None) -> dict:
+        """
+        Helper method to make API requests, waiting for a free slot when max_concurrency requests are in flight.
+        :param endpoint: API endpoint
+        :param params: Query parameters to be sent in the request
+        :param response_format: Overrides the client's response format for this request
+        :param deadline: Seconds within which the request must complete, retries and waits included
+        :return: API response
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
+        """
+        fields = self._pop_fields(params)
+        deadline = self._deadline_at(deadline)
+        key = self._request_key(endpoint, params)
+        content, stale = self._cache_lookup(key, endpoint)
+        if stale:
+            self._revalidate(key, endpoint, params)
+        if content is None:
+            content = self._check_status(await self._fetch(key, endpoint, params, deadline), endpoint).content
+        return self._decode(content, response_format, endpoint, fields)
+
+    def _revalidate(self, key: str, endpoint: str, params: dict = None) -> None:
+        """
+        Refreshes a stale cached response in a background task, once at a time per request.
+        :param key: Canonical request returned by _request_key
+        :param endpoint: API endpoint
+        :param params: Query parameters to be sent in the request
+        """
+        if key in self._revalidating:
+            return
+
+        async def refresh():
+            try:
+                await self._fetch(key, endpoint, params)
+            except Exception:
+                # The stale response keeps being served, the next lookup tries again
+                pass
+
+        task = self._revalidating[key] = asyncio.ensure_future(refresh())
+        task.add_done_callback(lambda _: self._revalidating.pop(key, None))
+
+    async def _fetch(self, key: str, endpoint: str, params: dict = None, deadline: float = None):
+        """
+        Sends a request, sharing the response of an identical request already in flight when coalescing.
+        :param key: Canonical request returned by _request_key
+        :param endpoint: API endpoint
+        :param params: Query parameters to be sent in the request
+        :param deadline: time.monotonic() by which the request must complete, if any
+        :return: Transport response
+        :raises TimeoutError: If the deadline passes first
+        """
+        if key is None or not self.coalesce:
+            return await self._send(key, endpoint, params, deadline=deadline)
+        if deadline is None:
+            return await self._singleflight.do(key, lambda: self._send(key, endpoint, params))
+        # A caller with a deadline waits for an identical request in flight until its own deadline, but never leads
+        # one: the shared request would be bounded by its deadline for every other caller
+        shared = self._singleflight.in_flight(key)
+        if shared is None:
+            return await self._send(key, endpoint, params, deadline=deadline)
+        return await asyncio.wait_for(asyncio.shield(shared), self._remaining(deadline))
+
+    async def _get(self, url: str, headers: dict, endpoint: str, deadline: float = None):
+        """
+        Sends one attempt, hedged with a duplicate if it is slower than the latency policy allows.
+        :param url: Signed request URL
+        :param headers: Request headers
+        :param endpoint: API endpoint
+        :param deadline: time.monotonic() by which the request must complete, if any
+        :return: Transport response, of whichever request answered first
+        """
+        timeout = self._remaining(deadline)
+        started = time.perf_counter()
+        delay = self._hedge_delay(endpoint, timeout)
+        if delay is None:
+            response = await self.transport.get(url, headers=headers, timeout=timeout)
+        else:
+            pending = {asyncio.ensure_future(self.transport.get(url, headers=headers, timeout=timeout))}
+            try:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done and self._may_hedge(endpoint):
+                    pending.add(asyncio.ensure_future(
+                        self.transport.get(url, headers=headers, timeout=self._remaining(deadline))))
+                # The first successful response wins, the other request is cancelled
+                response = error = None
+                while response is None:
+                    if not pending:
+                        raise error
+                    done, pending = await asyncio.wait(pending, timeout=self._remaining(deadline),
+                                                       return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        raise TimeoutError("Request deadline exceeded")
+                    for task in done:
+                        if task.exception() is None:
+                            response = task.result()
+                            break
+                        error = task.exception()
+            finally:
+                for task in pending:
+                    task.cancel()
+        self._record_latency(endpoint, started, response)
+        return response
+
+    async def _send(self, key: str, endpoint: str, params: dict = None, headers: dict = None,
+                    deadline: float = None):
+        """
+        Signs and sends a request, retrying transient failures, then caches its response.
+        An expired cached response with validators is revalidated with a conditional request.
+        :param key: Canonical request returned by _request_key
+        :param endpoint: API endpoint
+        :param params: Query parameters to be sent in the request
+        :param headers: Request headers, replacing the cache's conditional headers
+        :param deadline: time.monotonic() by which the request must complete, if any
+        :return: Transport response
+        """
+        if headers is None:
+            headers = self._cache_validators(key)
+        url = self._sign(endpoint, params)
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async(timeout=self._remaining(deadline))
+            try:
+                async with self._semaphore:
+                    started = time.perf_counter() if self.instrumentation is not None else None
+                    response = await self._get(url, headers, endpoint, deadline)
+            except Exception as e:
+                delay = self._retry_delay(attempt, error=e, deadline=deadline)
+                if self.instrumentation is not None:
+                    self._observe_attempt(endpoint, started, error=e, delay=delay)
+                if delay is None:
+                    raise
+            else:
+                delay = self._retry_delay(attempt, response=response, deadline=deadline)
+                if self.instrumentation is not None:
+                    self._observe_attempt(endpoint, started, response=response, delay=delay)
+                if delay is None:
+                    break
+            await asyncio.sleep(delay)
+            attempt += 1
+
+        self._check_credentials(response)
+        cached = self._cache_set(key, endpoint, response)
+        if cached is None:
+            return await self._send(key, endpoint, params, headers={}, deadline=deadline)
+        return cached
+
+    def get_departures_for_stops(self, stops: list, **kwargs):
+        """
+        Get departures for many stops concurrently, see get_departures_by_stop.
+
+        :param stops: (route_type, stop_id) pairs
+        :param kwargs: Arguments passed to every get_departures_by_stop call, e.g. max_results
+        :return: Async generator of BatchResult keyed by (route_type, stop_id), in order of completion
+        """
+        return run_batch_async(self.get_departures_by_stop, stops, **kwargs)
+
+    def get_patterns_for_runs(self, runs: list, **kwargs):
+        """
+        Get stopping patterns for many runs concurrently, see get_pattern_by_run_ref.
+
+        :param runs: (run_ref, route_type) pairs
+        :param kwargs: Arguments passed to every get_pattern_by_run_ref call
+        :return: Async generator of BatchResult keyed by (run_ref, route_type), in order of completion
+        """
+        return run_batch_async(self.get_pattern_by_run_ref, runs, **kwargs)
+
+    def get_stop_details_for_stops(self, stops: list, **kwargs):
+        """
+        Get facilities of many stops concurrently, see get_stop_details.
+
+        :param stops: (stop_id, route_type) pairs
+        :param kwargs: Arguments passed to every get_stop_details call
+        :return: Async generator of BatchResult keyed by (stop_id, route_type), in order of completion
+        """
+        return run_batch_async(self.get_stop_details, stops, **kwargs)
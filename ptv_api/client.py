@@ -1,43 +1,372 @@
 import os
-import requests
-from dotenv import load_dotenv
-from .src.get_signature import get_url, validate_key
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .src.get_signature import Signer, validate_key, canonical_request, BASE_URL
+from .src.cache import ResponseCache
+from .src.transport import Transport, TransportResponse, RequestsTransport, DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT
+from .src.batch import run_batch, DEFAULT_MAX_WORKERS
+from .src.singleflight import SingleFlight
+from .src.jsonstream import iter_items
+from .src.ratelimit import RateLimiter, RetryPolicy
+from .src.latency import LatencyPolicy
+from .src.metrics import Instrumentation, endpoint_template
+from .src.projection import loads, parse_fields, project, subtree
+from .models import Disruption, Outlet, Run, Stop
 import json
-load_dotenv(os.path.join(os.getcwd(), '.env'))
 
+# 'json' returns the parsed response, 'raw' the undecoded body bytes and 'pretty' an indented JSON string
+RESPONSE_FORMATS = ('json', 'raw', 'pretty')
 
-class PTVClient:
-    def __init__(self, api_key: str = None, developer_id: int = None):
+_dotenv_loaded = False
+
+
+def _load_dotenv() -> None:
+    """
+    Loads the .env file of the working directory into the environment, once per process.
+    Deferred until a client needs credentials it was not given, so importing ptv_api stays cheap.
+    """
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        from dotenv import load_dotenv
+        load_dotenv(os.path.join(os.getcwd(), '.env'))
+        _dotenv_loaded = True
+
+
+class BasePTVClient:
+    """
+    Credentials, signing, response decoding and the endpoint methods shared by PTVClient and AsyncPTVClient.
+    Subclasses provide _make_request, which either returns the response or a coroutine resolving to it.
+    """
+
+    def __init__(self, api_key: str = None, developer_id: int = None, response_format: str = 'json',
+                 cache: ResponseCache or bool = None, coalesce: bool = True, rate_limiter: RateLimiter = None,
+                 retry: RetryPolicy or bool = True, instrumentation: Instrumentation = None, base_url: str = BASE_URL,
+                 latency: LatencyPolicy or bool = None):
         """
-        Initializes a PTVClient object
         :param api_key: PTV provided API key
         :param developer_id: PTV provided Developer ID
+        :param response_format: Format of the endpoint results, one of 'json' (parsed), 'raw' (bytes) or 'pretty' (indented string)
+        :param cache: Response cache to serve repeated requests from, True for a default ResponseCache
+        :param coalesce: Share one HTTP request between concurrent identical requests
+        :param rate_limiter: Token bucket every request waits on, it can be shared between clients
+        :param retry: Retry policy of transient failures, True for a default RetryPolicy, False to never retry
+        :param instrumentation: Hooks measuring each request, e.g. a MetricsRegistry. Nothing is measured if not given.
+        :param base_url: PTV API Base URL, e.g. of a local stand-in server
+        :param latency: Stale-while-revalidate and hedging policy, True for a default LatencyPolicy. Off if not given.
         """
+        if response_format not in RESPONSE_FORMATS:
+            raise ValueError(f"Unknown response format '{response_format}', expected one of {RESPONSE_FORMATS}")
+        self.response_format = response_format
+        self.cache = ResponseCache() if cache is True else None if cache is False else cache
+        self.coalesce = coalesce
+        self.rate_limiter = rate_limiter
+        self.retry = RetryPolicy() if retry is True else retry or None
+        self.instrumentation = instrumentation
+        self.latency = LatencyPolicy() if latency is True else latency or None
+        self._validated = False
+        # Local SearchIndex answering search() before it goes to the API, see ptv_api.search
+        self.search_index = None
+        # Local DisruptionStore answering disruption lookups by route and stop, see ptv_api.disruptions
+        self.disruption_store = None
+
+        if not api_key or not developer_id:
+            _load_dotenv()
         self.__api_key = api_key or os.getenv('PTV_API_KEY')
         self.__developer_id = developer_id or os.getenv('PTV_DEVELOPER_ID')
 
         if not self.__api_key or not self.__developer_id:
             raise ValueError("API key / Developer ID not found")
-        elif not validate_key(self.__api_key, self.__developer_id):
+        self.__signer = Signer(self.__api_key, self.__developer_id, base_url)
+
+    def _sign(self, endpoint: str, params: dict = None) -> str:
+        """
+        Builds the signed request URL.
+        :param endpoint: API endpoint
+        :param params: Query parameters to be sent in the request
+        :return: Request URL with signature
+        """
+        if self.instrumentation is None:
+            return self.__signer.sign(endpoint, params)
+        started = time.perf_counter()
+        url = self.__signer.sign(endpoint, params)
+        self._observe('sign', endpoint, started)
+        return url
+
+    def _observe(self, stage: str, endpoint: str, started: float) -> None:
+        """
+        Reports the time spent in a stage of a request to the client's instrumentation, which must be set.
+        :param stage: One of 'sign', 'network', 'decode' or 'model'
+        :param endpoint: API endpoint
+        :param started: time.perf_counter() at the start of the stage
+        """
+        self.instrumentation.observe(stage, endpoint_template(endpoint), time.perf_counter() - started)
+
+    def _observe_attempt(self, endpoint: str, started: float, response=None, error: Exception = None,
+                         delay: float = None) -> None:
+        """
+        Reports one attempt of a request to the client's instrumentation, which must be set.
+        :param endpoint: API endpoint
+        :param started: time.perf_counter() before the attempt was sent
+        :param response: Transport response of the attempt, if any
+        :param error: Exception raised by the attempt, if any
+        :param delay: Seconds before the attempt is retried, None if it is not
+        """
+        template = endpoint_template(endpoint)
+        self.instrumentation.observe('network', template, time.perf_counter() - started)
+        if response is not None:
+            self.instrumentation.response(template, response.status_code, len(response.content))
+        else:
+            self.instrumentation.error(template, error)
+        if delay is not None:
+            self.instrumentation.retry(template, response.status_code if response is not None else type(error).__name__)
+
+    def _validate_key(self, transport: Transport) -> bool:
+        """
+        Validates the client's credentials through a blocking transport.
+        :param transport: Transport to send the validation request through
+        :return: True if the credentials authenticate successfully, otherwise False
+        """
+        return validate_key(self.__api_key, self.__developer_id, transport, self.__signer.base_url)
+
+    def _request_key(self, endpoint: str, params: dict = None) -> str or None:
+        """
+        Identifies a request for caching and coalescing.
+        :param endpoint: API endpoint
+        :param params: Query parameters to be sent in the request
+        :return: Canonical request, or None when neither a cache nor coalescing needs it
+        """
+        if self.cache is None and not self.coalesce:
+            return None
+        return canonical_request(endpoint, params)
+
+    def _cache_lookup(self, key: str, endpoint: str) -> tuple:
+        """
+        Looks a request up in the client's cache, including responses within the stale-while-revalidate window.
+        :param key: Canonical request returned by _request_key
+        :param endpoint: API endpoint
+        :return: Cached response body if any, and whether it is stale and must be refreshed in the background
+        """
+        if key is None or self.cache is None:
+            return None, False
+        max_stale = 0
+        if self.latency is not None and self.latency.applies(endpoint):
+            max_stale = self.latency.stale_while_revalidate
+        content, stale = self.cache.lookup(key, max_stale)
+        if self.instrumentation is not None:
+            self.instrumentation.cache(endpoint_template(endpoint), content is not None)
+        return content, stale
+
+    def _cache_validators(self, key: str) -> dict or None:
+        """
+        :param key: Canonical request returned by _request_key
+        :return: Headers revalidating the expired cached response of the request, if the API sent validators
+        """
+        if key is None or self.cache is None:
+            return None
+        return self.cache.validators(key)
+
+    def _cache_set(self, key: str, endpoint: str, response):
+        """
+        Stores a successful response in the client's cache, or freshens the cached one the API reported unchanged.
+        :param key: Canonical request returned by _request_key
+        :param endpoint: API endpoint
+        :param response: Transport response
+        :return: The response, with a 304 replaced by the cached response. None if that one was evicted meanwhile.
+        """
+        if key is None or self.cache is None:
+            return response
+        if response.status_code == 304:
+            content = self.cache.revalidate(key, endpoint)
+            return None if content is None else TransportResponse(200, response.headers, content)
+        if response.status_code == 200:
+            self.cache.set(key, endpoint, response.content, response.headers)
+        return response
+
+    @staticmethod
+    def _check_status(response, endpoint: str):
+        """
+        :param response: Final transport response of a request, after retries
+        :param endpoint: API endpoint
+        :return: The response
+        :raises RuntimeError: If the request did not succeed
+        """
+        if response.status_code != 200:
+            raise RuntimeError(f"Request to {endpoint} failed with status {response.status_code}: "
+                               f"{response.content[:200]!r}")
+        return response
+
+    def _check_credentials(self, response) -> None:
+        """
+        Checks the credentials against the first responses, until one succeeds.
+        The API answers 403 both to wrong credentials and to a throttled key, only a 401 is certainly the former.
+        :param response: Final transport response of a request, after retries
+        :raises RuntimeError: If the API rejected the API key / Developer ID, or throttled the key
+        """
+        if self._validated:
+            return
+        if response.status_code == 401:
             raise RuntimeError("API Key / Developer ID authentication fail")
+        if response.status_code == 403:
+            raise RuntimeError("API Key / Developer ID rejected or throttled (status 403). If the key is throttled, "
+                               "retry 403 responses with RetryPolicy(statuses=...)")
+        if response.status_code == 200:
+            self._validated = True
+
+    def _retry_delay(self, attempt: int, response=None, error: Exception = None,
+                     deadline: float = None) -> float or None:
+        """
+        :param attempt: Number of attempts already retried
+        :param response: Transport response of the attempt, if any
+        :param error: Exception raised by the attempt, if any
+        :param deadline: time.monotonic() by which the request must complete, if any
+        :return: Seconds to wait before retrying, None if the outcome is final or the retry would miss the deadline
+        """
+        if self.retry is None:
+            return None
+        delay = self.retry.next_delay(attempt, response, error)
+        if delay is not None and deadline is not None and time.monotonic() + delay >= deadline:
+            return None
+        return delay
 
-    def _make_request(self, endpoint: str, params: dict = None) -> dict or None:
+    @staticmethod
+    def _deadline_at(seconds: float = None) -> float or None:
+        """
+        :param seconds: Deadline passed to an endpoint method, if any
+        :return: time.monotonic() by which the request must complete, None without a deadline
+        """
+        return None if seconds is None else time.monotonic() + seconds
+
+    @staticmethod
+    def _remaining(deadline: float = None) -> float or None:
+        """
+        :param deadline: time.monotonic() by which the request must complete, if any
+        :return: Seconds left before the deadline, None without a deadline
+        :raises TimeoutError: If the deadline has passed
+        """
+        if deadline is None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("Request deadline exceeded")
+        return remaining
+
+    def _hedge_delay(self, endpoint: str, timeout: float = None) -> float or None:
+        """
+        :param endpoint: API endpoint
+        :param timeout: Seconds left before the request's deadline, if any
+        :return: Seconds after which a duplicate of an attempt is sent, None if it is not hedged
+        """
+        if self.latency is None or not self.latency.applies(endpoint):
+            return None
+        delay = self.latency.hedge_delay(endpoint_template(endpoint))
+        if delay is None or (timeout is not None and delay >= timeout):
+            return None
+        return delay
+
+    def _may_hedge(self, endpoint: str) -> bool:
+        """
+        Takes a rate limiter token for a hedged duplicate, hedging never waits for one.
+        :param endpoint: API endpoint
+        :return: Whether the duplicate can be sent
+        """
+        if self.rate_limiter is not None and not self.rate_limiter.try_acquire():
+            return False
+        if self.instrumentation is not None:
+            self.instrumentation.hedge(endpoint_template(endpoint))
+        return True
+
+    def _record_latency(self, endpoint: str, started: float, response) -> None:
+        """
+        Feeds the latency of a successful attempt to the hedging percentiles.
+        :param endpoint: API endpoint
+        :param started: time.perf_counter() before the attempt was sent
+        :param response: Transport response of the attempt
+        """
+        if self.latency is not None and response.status_code == 200 and self.latency.applies(endpoint):
+            self.latency.record(endpoint_template(endpoint), time.perf_counter() - started)
+
+    @staticmethod
+    def _local_options(kwargs: dict) -> dict:
+        """
+        :param kwargs: Options of an endpoint method
+        :return: Options a local index answers, without the projection handled by the client
+        """
+        return {name: value for name, value in kwargs.items() if name != 'fields'}
+
+    def _local_response(self, data: dict, response_format: str = None, fields: str or list = None):
+        """
+        Returns a response answered locally, in the client's response format.
+        :param data: Response shaped like the API's
+        :param response_format: Overrides the client's response format
+        :param fields: Projection of the fields to keep, see parse_fields
+        :return: Response in the same form _make_request would return it
+        """
+        if fields is not None:
+            data = project(data, parse_fields(fields))
+        response_format = response_format or self.response_format
+        if response_format == 'raw':
+            return json.dumps(data).encode()
+        if response_format == 'pretty':
+            return json.dumps(data, indent=2)
+        return data
+
+    def _make_request(self, endpoint: str, params: dict = None, response_format: str = None, deadline: float = None):
         """
         Helper method to make API requests.
         :param endpoint: API endpoint
         :param params: Query parameters to be sent in the request
+        :param response_format: Overrides the client's response format for this request
+        :param deadline: Seconds within which the request must complete, retries and waits included
         :return: API response
         """
-        url = get_url(endpoint, self.__api_key, self.__developer_id, params)
-        return json.dumps(requests.get(url).json(), indent=2)
+        raise NotImplementedError
 
-    def get_departures_by_stop(self, route_type: int, stop_id: int, max_results: int = 10, **kwargs) -> dict or None:
+    def _decode(self, content: bytes, response_format: str = None, endpoint: str = None,
+                fields: str or list = None) -> dict or bytes or str:
+        """
+        Converts a response body into the requested response format.
+        :param content: Raw response body
+        :param response_format: One of RESPONSE_FORMATS, defaults to the client's response format
+        :param endpoint: API endpoint the decoding time is reported for
+        :param fields: Projection of the fields to keep, see parse_fields. The whole response is kept if not given.
+        :return: Parsed response, the body itself or an indented JSON string
+        """
+        response_format = response_format or self.response_format
+        if response_format == 'raw' and fields is None:
+            return content
+
+        # Timestamps are only taken for an instrumentation to report them to
+        started = time.perf_counter() if self.instrumentation is not None and endpoint is not None else None
+        data = loads(content)
+        if fields is not None:
+            data = project(data, parse_fields(fields))
+        if started is not None:
+            self._observe('decode', endpoint, started)
+        if response_format == 'raw':
+            return json.dumps(data, separators=(',', ':')).encode()
+        if response_format == 'pretty':
+            return json.dumps(data, indent=2)
+        return data
+
+    @staticmethod
+    def _pop_fields(params: dict = None) -> str or list or None:
+        """
+        Takes the projection out of the query parameters, it is applied by the client rather than sent to the API.
+        :param params: Query parameters of the request
+        :return: Projection passed as the fields keyword argument of an endpoint method, if any
+        """
+        return params.pop('fields', None) if params else None
+
+    def get_departures_by_stop(self, route_type: int, stop_id: int, max_results: int = 10, deadline: float = None,
+                               **kwargs) -> dict:
         """
         View departures for all routes from a stop.
 
         :param route_type: Number identifying transport mode; values returned via RouteTypes API (0: Train, 1: Tram, 2: Bus, 3: V/Line, 4: Night Bus)
         :param stop_id: Identifier of stop; values returned by Stops API
         :param max_results: Maximum number of results to return
+        :param deadline: Seconds within which the request must complete, retries and waits included
         :param kwargs: Optional keyword arguments for advanced filtering:
             - platform_numbers (list[int]): List of platform numbers to filter.
             - direction_id (int): Identifier for direction of travel.
@@ -49,17 +378,19 @@ class PTVClient:
             - expand (list[str]): Fields to expand in the response.
             - include_geopath (bool): Include geopath data.
 
-        :return: Dictionary of departures data or None if request fails
+        :return: Dictionary of departures data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = f"/v3/departures/route_type/{route_type}/stop/{stop_id}"
         params = {
             'max_results': max_results,
             **kwargs
         }
-        return self._make_request(endpoint, params=params)
+        return self._make_request(endpoint, params=params, deadline=deadline)
 
     def get_departures_by_stop_and_route(self, route_type: int, stop_id: int, route_id: int, max_results: int = 10,
-                                         **kwargs) -> dict or None:
+                                         deadline: float = None, **kwargs) -> dict:
         """
         View departures for a specific route from a stop.
 
@@ -67,6 +398,7 @@ class PTVClient:
         :param stop_id: Identifier of stop; values returned by Stops API
         :param route_id: Identifier of route; values returned by Routes API
         :param max_results: Maximum number of results to return
+        :param deadline: Seconds within which the request must complete, retries and waits included
         :param kwargs: Optional keyword arguments for advanced filtering:
             - direction_id (int): Identifier for direction of travel.
             - gtfs (bool): Include GTFS information.
@@ -77,151 +409,202 @@ class PTVClient:
             - expand (list[str]): Fields to expand in the response.
             - include_geopath (bool): Include geopath data.
 
-        :return: Dictionary of departures data or None if request fails
+        :return: Dictionary of departures data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = f"/v3/departures/route_type/{route_type}/stop/{stop_id}/route/{route_id}"
         params = {
             'max_results': max_results,
             **kwargs
         }
-        return self._make_request(endpoint, params=params)
+        return self._make_request(endpoint, params=params, deadline=deadline)
 
-    def get_directions_by_route(self, route_id: int) -> dict or None:
+    def get_directions_by_route(self, route_id: int, deadline: float = None) -> dict:
         """
         View directions that a route travels in.
 
         :param route_id: Identifier of route; values returned by Routes API
-        :return: Dictionary of directions data or None if request fails
+        :param deadline: Seconds within which the request must complete, retries and waits included
+        :return: Dictionary of directions data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = f"/v3/directions/route/{route_id}"
-        return self._make_request(endpoint)
+        return self._make_request(endpoint, deadline=deadline)
 
-    def get_directions_by_direction_id(self, direction_id: int) -> dict or None:
+    def get_directions_by_direction_id(self, direction_id: int, deadline: float = None) -> dict:
         """
         View all routes for a direction of travel.
 
         :param direction_id: Identifier of direction of travel; values returned by Directions API
-        :return: Dictionary of routes data or None if request fails
+        :param deadline: Seconds within which the request must complete, retries and waits included
+        :return: Dictionary of routes data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = f"/v3/directions/{direction_id}"
-        return self._make_request(endpoint)
+        return self._make_request(endpoint, deadline=deadline)
 
-    def get_direction_by_direction_id_and_route_type(self, direction_id: int, route_type: int) -> dict or None:
+    def get_direction_by_direction_id_and_route_type(self, direction_id: int, route_type: int,
+                                                     deadline: float = None) -> dict:
         """
         View all routes of a particular type for a direction of travel.
 
         :param direction_id: Identifier of direction of travel; values returned by Directions API
         :param route_type: Number identifying transport mode; values returned via RouteTypes API (0: Train, 1: Tram, 2: Bus, 3: V/Line, 4: Night Bus)
-        :return: Dictionary of routes data or None if request fails
+        :param deadline: Seconds within which the request must complete, retries and waits included
+        :return: Dictionary of routes data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = f"/v3/directions/{direction_id}/route_type/{route_type}"
-        return self._make_request(endpoint)
+        return self._make_request(endpoint, deadline=deadline)
 
-    def get_disruptions_all(self, **kwargs) -> dict or None:
+    def get_disruptions_all(self, deadline: float = None, **kwargs) -> dict:
         """
         View all disruptions for all route types.
 
+        :param deadline: Seconds within which the request must complete, retries and waits included
         :param kwargs: Optional keyword arguments for filtering:
             - route_types (list[int]): Filter by route type.
             - disruption_modes (list[int]): Filter by disruption mode.
             - disruption_status (str): Filter by status of disruption ('current' or 'planned').
-        :return: Dictionary of disruptions data or None if request fails
+        :return: Dictionary of disruptions data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = "/v3/disruptions"
         params = {**kwargs}
-        return self._make_request(endpoint, params=params)
+        return self._make_request(endpoint, params=params, deadline=deadline)
 
-    def get_disruptions_by_route(self, route_id: int, **kwargs) -> dict or None:
+    def get_disruptions_by_route(self, route_id: int, deadline: float = None, **kwargs) -> dict:
         """
         View all disruptions for a particular route.
 
         :param route_id: Identifier of route; values returned by Routes API
+        :param deadline: Seconds within which the request must complete, retries and waits included
         :param kwargs: Optional keyword arguments for filtering:
             - disruption_status (str): Filter by status of disruption ('current' or 'planned').
-        :return: Dictionary of disruptions data or None if request fails
+        :return: Dictionary of disruptions data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
+        if self.disruption_store is not None:
+            local = self.disruption_store.by_route(route_id, **self._local_options(kwargs))
+            if local is not None:
+                return self._local_response(local, fields=kwargs.get('fields'))
+
         endpoint = f"/v3/disruptions/route/{route_id}"
         params = {**kwargs}
-        return self._make_request(endpoint, params=params)
+        return self._make_request(endpoint, params=params, deadline=deadline)
 
-    def get_disruptions_by_route_and_stop(self, route_id: int, stop_id: int, **kwargs) -> dict or None:
+    def get_disruptions_by_route_and_stop(self, route_id: int, stop_id: int, deadline: float = None, **kwargs) -> dict:
         """
         View all disruptions for a particular route and stop.
 
         :param route_id: Identifier of route; values returned by Routes API
         :param stop_id: Identifier of stop; values returned by Stops API
+        :param deadline: Seconds within which the request must complete, retries and waits included
         :param kwargs: Optional keyword arguments for filtering:
             - disruption_status (str): Filter by status of disruption ('current' or 'planned').
-        :return: Dictionary of disruptions data or None if request fails
+        :return: Dictionary of disruptions data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
+        if self.disruption_store is not None:
+            local = self.disruption_store.by_route_and_stop(route_id, stop_id, **self._local_options(kwargs))
+            if local is not None:
+                return self._local_response(local, fields=kwargs.get('fields'))
+
         endpoint = f"/v3/disruptions/route/{route_id}/stop/{stop_id}"
         params = {**kwargs}
-        return self._make_request(endpoint, params=params)
+        return self._make_request(endpoint, params=params, deadline=deadline)
 
-    def get_disruptions_by_stop(self, stop_id: int, **kwargs) -> dict or None:
+    def get_disruptions_by_stop(self, stop_id: int, deadline: float = None, **kwargs) -> dict:
         """
         View all disruptions for a particular stop.
 
         :param stop_id: Identifier of stop; values returned by Stops API
+        :param deadline: Seconds within which the request must complete, retries and waits included
         :param kwargs: Optional keyword arguments for filtering:
             - disruption_status (str): Filter by status of disruption ('current' or 'planned').
-        :return: Dictionary of disruptions data or None if request fails
+        :return: Dictionary of disruptions data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
+        if self.disruption_store is not None:
+            local = self.disruption_store.by_stop(stop_id, **self._local_options(kwargs))
+            if local is not None:
+                return self._local_response(local, fields=kwargs.get('fields'))
+
         endpoint = f"/v3/disruptions/stop/{stop_id}"
         params = {**kwargs}
-        return self._make_request(endpoint, params=params)
+        return self._make_request(endpoint, params=params, deadline=deadline)
 
-    def get_disruption_by_id(self, disruption_id: int) -> dict or None:
+    def get_disruption_by_id(self, disruption_id: int, deadline: float = None) -> dict:
         """
         View a specific disruption.
 
         :param disruption_id: Identifier of disruption; values returned by Disruptions API
-        :return: Dictionary of disruption data or None if request fails
+        :param deadline: Seconds within which the request must complete, retries and waits included
+        :return: Dictionary of disruption data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = f"/v3/disruptions/{disruption_id}"
-        return self._make_request(endpoint)
+        return self._make_request(endpoint, deadline=deadline)
 
-    def get_disruption_modes(self) -> dict or None:
+    def get_disruption_modes(self, deadline: float = None) -> dict:
         """
         Get all disruption modes.
 
-        :return: Dictionary of disruption modes data or None if request fails
+        :param deadline: Seconds within which the request must complete, retries and waits included
+        :return: Dictionary of disruption modes data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = "/v3/disruptions/modes"
-        return self._make_request(endpoint)
+        return self._make_request(endpoint, deadline=deadline)
 
-    def get_fare_estimate(self, min_zone: int, max_zone: int, **kwargs) -> dict or None:
+    def get_fare_estimate(self, min_zone: int, max_zone: int, deadline: float = None, **kwargs) -> dict:
         """
         Estimate a fare by zone.
 
         :param min_zone: Minimum Zone travelled through (e.g., 1)
         :param max_zone: Maximum Zone travelled through (e.g., 6)
+        :param deadline: Seconds within which the request must complete, retries and waits included
         :param kwargs: Optional keyword arguments for advanced filtering:
             - journey_touch_on_utc (str): Date and time of touch on in UTC format.
             - journey_touch_off_utc (str): Date and time of touch off in UTC format.
             - is_journey_in_free_tram_zone (bool): If journey is in a free tram zone.
             - travelled_route_types (list[int]): List of route types travelled through.
-        :return: Dictionary of fare estimate data or None if request fails
+        :return: Dictionary of fare estimate data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = f"/v3/fare_estimate/min_zone/{min_zone}/max_zone/{max_zone}"
         params = {**kwargs}
-        return self._make_request(endpoint, params=params)
+        return self._make_request(endpoint, params=params, deadline=deadline)
 
-    def get_outlets_all(self, max_results: int = 30) -> dict or None:
+    def get_outlets_all(self, max_results: int = 30, deadline: float = None) -> dict:
         """
         List all ticket outlets.
 
         :param max_results: Maximum number of results to return
-        :return: Dictionary of ticket outlets data or None if request fails
+        :param deadline: Seconds within which the request must complete, retries and waits included
+        :return: Dictionary of ticket outlets data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = "/v3/outlets"
         params = {
             'max_results': max_results
         }
-        return self._make_request(endpoint, params=params)
+        return self._make_request(endpoint, params=params, deadline=deadline)
 
     def get_outlets_by_geolocation(self, latitude: float, longitude: float, max_distance: float = 300,
-                                   max_results: int = 30) -> dict or None:
+                                   max_results: int = 30, deadline: float = None) -> dict:
         """
         List ticket outlets near a specific location.
 
@@ -229,21 +612,25 @@ class PTVClient:
         :param longitude: Geographic coordinate of longitude
         :param max_distance: Maximum distance (in meters) from specified location
         :param max_results: Maximum number of results to return
-        :return: Dictionary of ticket outlets data or None if request fails
+        :param deadline: Seconds within which the request must complete, retries and waits included
+        :return: Dictionary of ticket outlets data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = f"/v3/outlets/location/{latitude},{longitude}"
         params = {
             'max_distance': max_distance,
             'max_results': max_results
         }
-        return self._make_request(endpoint, params=params)
+        return self._make_request(endpoint, params=params, deadline=deadline)
 
-    def get_pattern_by_run_ref(self, run_ref: str, route_type: int, **kwargs) -> dict or None:
+    def get_pattern_by_run_ref(self, run_ref: str, route_type: int, deadline: float = None, **kwargs) -> dict:
         """
         View the stopping pattern for a specific trip/service run.
 
         :param run_ref: Identifier of a run as returned by the departures/* and runs/* endpoints
         :param route_type: Number identifying transport mode; values returned via RouteTypes API (0: Train, 1: Tram, 2: Bus, 3: V/Line, 4: Night Bus)
+        :param deadline: Seconds within which the request must complete, retries and waits included
         :param kwargs: Optional keyword arguments for advanced filtering:
             - expand (list[str]): Fields to expand in the response.
             - stop_id (int): Filter by stop ID.
@@ -251,116 +638,141 @@ class PTVClient:
             - include_skipped_stops (bool): Include skipped stops.
             - include_geopath (bool): Include geopath data.
             - include_advertised_interchange (bool): Include advertised interchange.
-        :return: Dictionary of stopping pattern data or None if request fails
+        :return: Dictionary of stopping pattern data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = f"/v3/pattern/run/{run_ref}/route_type/{route_type}"
         params = {**kwargs}
-        return self._make_request(endpoint, params=params)
+        return self._make_request(endpoint, params=params, deadline=deadline)
 
-    def get_route_all(self, **kwargs) -> dict or None:
+    def get_route_all(self, deadline: float = None, **kwargs) -> dict:
         """
         View route names and numbers for all routes.
 
+        :param deadline: Seconds within which the request must complete, retries and waits included
         :param kwargs: Optional keyword arguments for filtering:
             - route_types (list[int]): Filter by route type.
             - route_name (str): Filter by name of route (accepts partial route name matches).
-        :return: Dictionary of route data or None if request fails
+        :return: Dictionary of route data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = "/v3/routes"
         params = {**kwargs}
-        return self._make_request(endpoint, params=params)
+        return self._make_request(endpoint, params=params, deadline=deadline)
 
-    def get_route_by_id(self, route_id: int, **kwargs) -> dict or None:
+    def get_route_by_id(self, route_id: int, deadline: float = None, **kwargs) -> dict:
         """
         View route name and number for a specific route ID.
 
         :param route_id: Identifier of route; values returned by Departures, Directions, and Disruptions APIs
+        :param deadline: Seconds within which the request must complete, retries and waits included
         :param kwargs: Optional keyword arguments for filtering:
             - include_geopath (bool): Indicates if geopath data will be returned (default = false).
             - geopath_utc (str): Filter geopaths by date (ISO 8601 UTC format).
-        :return: Dictionary of route data or None if request fails
+        :return: Dictionary of route data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = f"/v3/routes/{route_id}"
         params = {**kwargs}
-        return self._make_request(endpoint, params=params)
+        return self._make_request(endpoint, params=params, deadline=deadline)
 
-    def get_route_types(self) -> dict or None:
+    def get_route_types(self, deadline: float = None) -> dict:
         """
         View all route types and their names.
 
-        :return: Dictionary of route types data or None if request fails
+        :param deadline: Seconds within which the request must complete, retries and waits included
+        :return: Dictionary of route types data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = "/v3/route_types"
-        return self._make_request(endpoint)
+        return self._make_request(endpoint, deadline=deadline)
 
-    def get_runs_by_route(self, route_id: int, **kwargs) -> dict or None:
+    def get_runs_by_route(self, route_id: int, deadline: float = None, **kwargs) -> dict:
         """
         View all trip/service runs for a specific route ID.
 
         :param route_id: Identifier of route; values returned by Routes API
+        :param deadline: Seconds within which the request must complete, retries and waits included
         :param kwargs: Optional keyword arguments for filtering:
             - expand (list[str]): Fields to expand in the response.
             - date_utc (str): Filter by specific date in UTC format.
             - include_advertised_interchange (bool): Include advertised interchange.
-        :return: Dictionary of run data or None if request fails
+        :return: Dictionary of run data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = f"/v3/runs/route/{route_id}"
         params = {**kwargs}
-        return self._make_request(endpoint, params=params)
+        return self._make_request(endpoint, params=params, deadline=deadline)
 
-    def get_runs_by_route_and_route_type(self, route_id: int, route_type: int, **kwargs) -> dict or None:
+    def get_runs_by_route_and_route_type(self, route_id: int, route_type: int, deadline: float = None,
+                                         **kwargs) -> dict:
         """
         View all trip/service runs for a specific route ID and route type.
 
         :param route_id: Identifier of route; values returned by Routes API
         :param route_type: Number identifying transport mode; values returned via RouteTypes API (0: Train, 1: Tram, 2: Bus, 3: V/Line, 4: Night Bus)
+        :param deadline: Seconds within which the request must complete, retries and waits included
         :param kwargs: Optional keyword arguments for filtering:
             - expand (list[str]): Fields to expand in the response.
             - date_utc (str): Filter by specific date in UTC format.
             - include_advertised_interchange (bool): Include advertised interchange.
-        :return: Dictionary of run data or None if request fails
+        :return: Dictionary of run data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = f"/v3/runs/route/{route_id}/route_type/{route_type}"
         params = {**kwargs}
-        return self._make_request(endpoint, params=params)
+        return self._make_request(endpoint, params=params, deadline=deadline)
 
-    def get_run_by_ref(self, run_ref: str, **kwargs) -> dict or None:
+    def get_run_by_ref(self, run_ref: str, deadline: float = None, **kwargs) -> dict:
         """
         View all trip/service runs for a specific run_ref.
 
         :param run_ref: Identifier of a run as returned by the departures/* and runs/* endpoints
+        :param deadline: Seconds within which the request must complete, retries and waits included
         :param kwargs: Optional keyword arguments for filtering:
             - include_geopath (bool): Include geopath data.
             - expand (list[str]): Fields to expand in the response.
             - date_utc (str): Filter by specific date in UTC format.
             - include_advertised_interchange (bool): Include advertised interchange.
-        :return: Dictionary of run data or None if request fails
+        :return: Dictionary of run data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = f"/v3/runs/{run_ref}"
         params = {**kwargs}
-        return self._make_request(endpoint, params=params)
+        return self._make_request(endpoint, params=params, deadline=deadline)
 
-    def get_run_by_ref_and_route_type(self, run_ref: str, route_type: int, **kwargs) -> dict or None:
+    def get_run_by_ref_and_route_type(self, run_ref: str, route_type: int, deadline: float = None, **kwargs) -> dict:
         """
         View the trip/service run for a specific run_ref and route type.
 
         :param run_ref: Identifier of a run as returned by the departures/* and runs/* endpoints
         :param route_type: Number identifying transport mode; values returned via RouteTypes API (0: Train, 1: Tram, 2: Bus, 3: V/Line, 4: Night Bus)
+        :param deadline: Seconds within which the request must complete, retries and waits included
         :param kwargs: Optional keyword arguments for filtering:
             - expand (list[str]): Fields to expand in the response.
             - date_utc (str): Filter by specific date in UTC format.
             - include_geopath (bool): Include geopath data.
-        :return: Dictionary of run data or None if request fails
+        :return: Dictionary of run data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = f"/v3/runs/{run_ref}/route_type/{route_type}"
         params = {**kwargs}
-        return self._make_request(endpoint, params=params)
+        return self._make_request(endpoint, params=params, deadline=deadline)
 
-    def search(self, search_term: str, **kwargs) -> dict or None:
+    def search(self, search_term: str, deadline: float = None, **kwargs) -> dict:
         """
         View stops, routes, and myki ticket outlets that match the search term.
 
         :param search_term: Search text (if search text is numeric and/or less than 3 characters, the API will only return routes)
+        :param deadline: Seconds within which the request must complete, retries and waits included
         :param kwargs: Optional keyword arguments for advanced filtering:
             - route_types (list[int]): Filter by route type.
             - latitude (float): Latitude coordinate for location-based search.
@@ -371,18 +783,26 @@ class PTVClient:
             - match_stop_by_suburb (bool): Match stop by suburb.
             - match_route_by_suburb (bool): Match route by suburb.
             - match_stop_by_gtfs_stop_id (bool): Match stop by GTFS stop ID.
-        :return: Dictionary of search results data or None if request fails
+        :return: Dictionary of search results data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
+        if self.search_index is not None:
+            local = self.search_index.search(search_term, **self._local_options(kwargs))
+            if local is not None:
+                return self._local_response(local, fields=kwargs.get('fields'))
+
         endpoint = f"/v3/search/{search_term}"
         params = {**kwargs}
-        return self._make_request(endpoint, params=params)
+        return self._make_request(endpoint, params=params, deadline=deadline)
 
-    def get_stop_details(self, stop_id: int, route_type: int, **kwargs) -> dict or None:
+    def get_stop_details(self, stop_id: int, route_type: int, deadline: float = None, **kwargs) -> dict:
         """
         View facilities at a specific stop (Metro and V/Line stations only).
 
         :param stop_id: Identifier of stop; values returned by Stops API
         :param route_type: Number identifying transport mode; values returned via RouteTypes API (0: Train, 1: Tram, 2: Bus, 3: V/Line, 4: Night Bus)
+        :param deadline: Seconds within which the request must complete, retries and waits included
         :param kwargs: Optional keyword arguments for filtering:
             - stop_location (bool): Indicates if stop location information will be returned (default = false).
             - stop_amenities (bool): Indicates if stop amenity information will be returned (default = false).
@@ -392,32 +812,37 @@ class PTVClient:
             - gtfs (bool): Indicates whether the stop_id is a GTFS ID or not.
             - stop_staffing (bool): Indicates if stop staffing information will be returned (default = false).
             - stop_disruptions (bool): Indicates if stop disruption information will be returned (default = false).
-        :return: Dictionary of stop data or None if request fails
+        :return: Dictionary of stop data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = f"/v3/stops/{stop_id}/route_type/{route_type}"
         params = {**kwargs}
-        return self._make_request(endpoint, params=params)
+        return self._make_request(endpoint, params=params, deadline=deadline)
 
-    def get_stops_by_route(self, route_id: int, route_type: int, **kwargs) -> dict or None:
+    def get_stops_by_route(self, route_id: int, route_type: int, deadline: float = None, **kwargs) -> dict:
         """
         View all stops on a specific route.
 
         :param route_id: Identifier of route; values returned by Routes API
         :param route_type: Number identifying transport mode; values returned via RouteTypes API (0: Train, 1: Tram, 2: Bus, 3: V/Line, 4: Night Bus)
+        :param deadline: Seconds within which the request must complete, retries and waits included
         :param kwargs: Optional keyword arguments for filtering:
             - direction_id (int): Identifier for direction of travel.
             - stop_disruptions (bool): Indicates if stop disruption information will be returned (default = false).
             - include_geopath (bool): Include geopath data.
             - geopath_utc (str): Filter geopaths by date (ISO 8601 UTC format).
             - include_advertised_interchange (bool): Include advertised interchange.
-        :return: Dictionary of stop data or None if request fails
+        :return: Dictionary of stop data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = f"/v3/stops/route/{route_id}/route_type/{route_type}"
         params = {**kwargs}
-        return self._make_request(endpoint, params=params)
+        return self._make_request(endpoint, params=params, deadline=deadline)
 
     def get_stops_by_geolocation(self, latitude: float, longitude: float, max_results: int = 30,
-                                 max_distance: float = 300, **kwargs) -> dict or None:
+                                 max_distance: float = 300, deadline: float = None, **kwargs) -> dict:
         """
         View all stops near a specific location.
 
@@ -425,10 +850,13 @@ class PTVClient:
         :param longitude: Geographic coordinate of longitude
         :param max_results: Maximum number of results returned (default = 30)
         :param max_distance: Filter by maximum distance (in meters) from location specified via latitude and longitude parameters (default = 300)
+        :param deadline: Seconds within which the request must complete, retries and waits included
         :param kwargs: Optional keyword arguments for filtering:
             - route_types (list[int]): Filter by route type.
             - stop_disruptions (bool): Indicates if stop disruption information will be returned (default = false).
-        :return: Dictionary of stop data or None if request fails
+        :return: Dictionary of stop data
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
         """
         endpoint = f"/v3/stops/location/{latitude},{longitude}"
         params = {
@@ -436,4 +864,365 @@ class PTVClient:
             'max_distance': max_distance,
             **kwargs
         }
-        return self._make_request(endpoint, params=params)
+        return self._make_request(endpoint, params=params, deadline=deadline)
+
+
+class PTVClient(BasePTVClient):
+    def __init__(self, api_key: str = None, developer_id: int = None, transport: Transport = None,
+                 pool_size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT, **options):
+        """
+        Initializes a PTVClient object without any network access, credentials are checked on first use or with validate()
+        :param api_key: PTV provided API key
+        :param developer_id: PTV provided Developer ID
+        :param transport: HTTP transport to send requests through, defaults to a pooled keep-alive session
+        :param pool_size: Number of connections kept alive by the default transport
+        :param timeout: Request timeout in seconds of the default transport
+        :param options: Options shared with AsyncPTVClient, see BasePTVClient: response_format, cache, coalesce,
+            rate_limiter, retry, instrumentation, base_url, latency
+        """
+        super().__init__(api_key, developer_id, **options)
+        self._singleflight = SingleFlight()
+        # Threads of the latency policy, started on first use: hedged attempts and background refreshes have
+        # their own pools, so refreshes waiting on their attempts never hold every thread the attempts need
+        self._executors = {}
+        self._revalidating = set()
+        self._revalidating_lock = threading.Lock()
+
+        self.transport = transport or RequestsTransport(pool_size=pool_size, timeout=timeout)
+
+    def validate(self) -> bool:
+        """
+        Validates the credentials by using /v3/route_types endpoint.
+        :return: True if the credentials authenticate successfully
+        :raises RuntimeError: If the API key / Developer ID fail to authenticate
+        """
+        if not self._validate_key(self.transport):
+            raise RuntimeError("API Key / Developer ID authentication fail")
+        self._validated = True
+        return True
+
+    def send(self, endpoint: str, params: dict = None, headers: dict = None):
+        """
+        Sends a request straight to the API, bypassing the cache and coalescing, e.g. to refresh a local copy.
+        Transient failures are retried and successful responses still update the cache.
+        :param endpoint: API endpoint
+        :param params: Query parameters to be sent in the request
+        :param headers: Request headers, e.g. the conditional headers of a previous response
+        :return: Transport response, whatever its status, e.g. 304 to a conditional request
+        """
+        return self._send(None, endpoint, params, headers={} if headers is None else headers)
+
+    def close(self) -> None:
+        """
+        Closes the client's transport and its pooled connections.
+        """
+        for executor in self._executors.values():
+            executor.shutdown(wait=False)
+        self._executors = {}
+        self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _make_request(self, endpoint: str, params: dict = None, response_format: str = None,
+                      deadline: float = None) -> dict:
+        """
+        Helper method to make API requests.
+        :param endpoint: API endpoint
+        :param params: Query parameters to be sent in the request
+        :param response_format: Overrides the client's response format for this request
+        :param deadline: Seconds within which the request must complete, retries and waits included
+        :return: API response
+        :raises RuntimeError: If the API answered with an error, once retries are exhausted
+        :raises TimeoutError: If the deadline passes first
+        """
+        fields = self._pop_fields(params)
+        deadline = self._deadline_at(deadline)
+        key = self._request_key(endpoint, params)
+        content, stale = self._cache_lookup(key, endpoint)
+        if stale:
+            self._revalidate(key, endpoint, params)
+        if content is None:
+            content = self._check_status(self._fetch(key, endpoint, params, deadline), endpoint).content
+        return self._decode(content, response_format, endpoint, fields)
+
+    def _background(self, name: str) -> ThreadPoolExecutor:
+        """
+        :param name: Pool of the latency policy, 'hedge' or 'refresh'
+        :return: Thread pool, started on first use
+        """
+        executor = self._executors.get(name)
+        if executor is None:
+            workers = self.latency.max_workers if self.latency is not None else DEFAULT_MAX_WORKERS
+            executor = self._executors[name] = ThreadPoolExecutor(workers, thread_name_prefix=f'ptv-{name}')
+        return executor
+
+    def _revalidate(self, key: str, endpoint: str, params: dict = None) -> None:
+        """
+        Refreshes a stale cached response in the background, once at a time per request.
+        :param key: Canonical request returned by _request_key
+        :param endpoint: API endpoint
+        :param params: Query parameters to be sent in the request
+        """
+        with self._revalidating_lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def refresh():
+            try:
+                self._fetch(key, endpoint, params)
+            except Exception:
+                # The stale response keeps being served, the next lookup tries again
+                pass
+            finally:
+                with self._revalidating_lock:
+                    self._revalidating.discard(key)
+
+        self._background('refresh').submit(refresh)
+
+    def _fetch(self, key: str, endpoint: str, params: dict = None, deadline: float = None):
+        """
+        Sends a request, sharing the response of an identical request already in flight when coalescing.
+        :param key: Canonical request returned by _request_key
+        :param endpoint: API endpoint
+        :param params: Query parameters to be sent in the request
+        :param deadline: time.monotonic() by which the request must complete, if any
+        :return: Transport response
+        :raises TimeoutError: If the deadline passes first
+        """
+        if key is None or not self.coalesce:
+            return self._send(key, endpoint, params, deadline=deadline)
+        if deadline is None:
+            return self._singleflight.do(key, lambda: self._send(key, endpoint, params))
+        # A caller with a deadline waits for an identical request in flight until its own deadline, but never leads
+        # one: the shared request would be bounded by its deadline for every other caller
+        shared = self._singleflight.in_flight(key)
+        if shared is None:
+            return self._send(key, endpoint, params, deadline=deadline)
+        return shared.result(self._remaining(deadline))
+
+    def _get(self, url: str, headers: dict, endpoint: str, deadline: float = None):
+        """
+        Sends one attempt, hedged with a duplicate if it is slower than the latency policy allows.
+        :param url: Signed request URL
+        :param headers: Request headers
+        :param endpoint: API endpoint
+        :param deadline: time.monotonic() by which the request must complete, if any
+        :return: Transport response, of whichever request answered first
+        """
+        timeout = self._remaining(deadline)
+        started = time.perf_counter()
+        delay = self._hedge_delay(endpoint, timeout)
+        if delay is None:
+            response = self.transport.get(url, headers=headers, timeout=timeout)
+        else:
+            # Without a deadline, the attempt is bounded by the transport's own timeout, even if the pool is busy
+            if deadline is None:
+                deadline = time.monotonic() + (getattr(self.transport, 'timeout', None) or DEFAULT_TIMEOUT)
+            executor = self._background('hedge')
+            pending = {executor.submit(self.transport.get, url, headers, self._remaining(deadline))}
+            done, _ = wait(pending, delay)
+            if not done and self._may_hedge(endpoint):
+                pending.add(executor.submit(self.transport.get, url, headers, self._remaining(deadline)))
+            # The first successful response wins, the other request is left to finish unread
+            response = error = None
+            while response is None:
+                if not pending:
+                    raise error
+                done, pending = wait(pending, self._remaining(deadline), FIRST_COMPLETED)
+                if not done:
+                    raise TimeoutError("Request deadline exceeded")
+                for future in done:
+                    if future.exception() is None:
+                        response = future.result()
+                        break
+                    error = future.exception()
+        self._record_latency(endpoint, started, response)
+        return response
+
+    def _send(self, key: str, endpoint: str, params: dict = None, headers: dict = None, deadline: float = None):
+        """
+        Signs and sends a request, retrying transient failures, then caches its response.
+        An expired cached response with validators is revalidated with a conditional request.
+        :param key: Canonical request returned by _request_key
+        :param endpoint: API endpoint
+        :param params: Query parameters to be sent in the request
+        :param headers: Request headers, replacing the cache's conditional headers
+        :param deadline: time.monotonic() by which the request must complete, if any
+        :return: Transport response
+        """
+        if headers is None:
+            headers = self._cache_validators(key)
+        url = self._sign(endpoint, params)
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(timeout=self._remaining(deadline))
+            started = time.perf_counter() if self.instrumentation is not None else None
+            try:
+                response = self._get(url, headers, endpoint, deadline)
+            except Exception as e:
+                delay = self._retry_delay(attempt, error=e, deadline=deadline)
+                if self.instrumentation is not None:
+                    self._observe_attempt(endpoint, started, error=e, delay=delay)
+                if delay is None:
+                    raise
+            else:
+                delay = self._retry_delay(attempt, response=response, deadline=deadline)
+                if self.instrumentation is not None:
+                    self._observe_attempt(endpoint, started, response=response, delay=delay)
+                if delay is None:
+                    break
+            time.sleep(delay)
+            attempt += 1
+
+        self._check_credentials(response)
+        cached = self._cache_set(key, endpoint, response)
+        if cached is None:
+            return self._send(key, endpoint, params, headers={}, deadline=deadline)
+        return cached
+
+    def get_departures_for_stops(self, stops: list, max_workers: int = DEFAULT_MAX_WORKERS, **kwargs):
+        """
+        Get departures for many stops concurrently, see get_departures_by_stop.
+
+        :param stops: (route_type, stop_id) pairs
+        :param max_workers: Number of requests sent at once
+        :param kwargs: Arguments passed to every get_departures_by_stop call, e.g. max_results
+        :return: Generator of BatchResult keyed by (route_type, stop_id), in order of completion
+        """
+        return run_batch(self.get_departures_by_stop, stops, max_workers, **kwargs)
+
+    def get_patterns_for_runs(self, runs: list, max_workers: int = DEFAULT_MAX_WORKERS, **kwargs):
+        """
+        Get stopping patterns for many runs concurrently, see get_pattern_by_run_ref.
+
+        :param runs: (run_ref, route_type) pairs
+        :param max_workers: Number of requests sent at once
+        :param kwargs: Arguments passed to every get_pattern_by_run_ref call
+        :return: Generator of BatchResult keyed by (run_ref, route_type), in order of completion
+        """
+        return run_batch(self.get_pattern_by_run_ref, runs, max_workers, **kwargs)
+
+    def get_stop_details_for_stops(self, stops: list, max_workers: int = DEFAULT_MAX_WORKERS, **kwargs):
+        """
+        Get facilities of many stops concurrently, see get_stop_details.
+
+        :param stops: (stop_id, route_type) pairs
+        :param max_workers: Number of requests sent at once
+        :param kwargs: Arguments passed to every get_stop_details call
+        :return: Generator of BatchResult keyed by (stop_id, route_type), in order of completion
+        """
+        return run_batch(self.get_stop_details, stops, max_workers, **kwargs)
+
+    def _iter_items(self, endpoint: str, params: dict, path: tuple, model: type = None, deadline: float = None):
+        """
+        Streams a response, yielding the records of one of its arrays as they are received.
+        Streamed requests bypass the cache and coalescing.
+        :param endpoint: API endpoint
+        :param params: Query parameters to be sent in the request
+        :param path: Keys leading to the array of records, see iter_items
+        :param model: Record class to build from each item, with interned strings. Items are yielded as dicts if not given.
+        :param deadline: Seconds within which the stream must start, the rate limiter wait included
+        :return: Generator of records
+        """
+        fields = self._pop_fields(params)
+        deadline = self._deadline_at(deadline)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(timeout=self._remaining(deadline))
+        response = self.transport.stream(self._sign(endpoint, params), timeout=self._remaining(deadline))
+        self._check_credentials(response)
+        if response.status_code != 200:
+            body = b''.join(response.content)
+            raise RuntimeError(f"Request to {endpoint} failed with status {response.status_code}: {body[:200]!r}")
+        items = iter_items(response.content, path)
+        if fields is not None:
+            # The projection names fields from the top of the response, the items are projected with its part below path
+            tree = subtree(parse_fields(fields), path)
+            items = (project(item, tree) for item in items)
+        if model is None:
+            yield from items
+        elif self.instrumentation is None:
+            for item in items:
+                yield model.from_dict(item, intern=True)
+        else:
+            # Only record construction is timed, decoding is interleaved with reading the stream
+            spent = 0.0
+            for item in items:
+                started = time.perf_counter()
+                record = model.from_dict(item, intern=True)
+                spent += time.perf_counter() - started
+                yield record
+            self.instrumentation.observe('model', endpoint_template(endpoint), spent)
+
+    def iter_outlets(self, max_results: int = 30, typed: bool = False, deadline: float = None):
+        """
+        Iterate over ticket outlets, see get_outlets_all.
+
+        :param max_results: Maximum number of results to return
+        :param typed: Yield Outlet records instead of dicts
+        :param deadline: Seconds within which the stream must start, the rate limiter wait included
+        :return: Generator of ticket outlets
+        :raises TimeoutError: If the deadline passes first
+        """
+        endpoint = "/v3/outlets"
+        params = {
+            'max_results': max_results
+        }
+        return self._iter_items(endpoint, params, ('outlets',), Outlet if typed else None, deadline)
+
+    def iter_stops_by_geolocation(self, latitude: float, longitude: float, max_results: int = 30,
+                                  max_distance: float = 300, typed: bool = False, deadline: float = None, **kwargs):
+        """
+        Iterate over stops near a specific location, see get_stops_by_geolocation.
+
+        :param latitude: Geographic coordinate of latitude
+        :param longitude: Geographic coordinate of longitude
+        :param max_results: Maximum number of results returned (default = 30)
+        :param max_distance: Filter by maximum distance (in meters) from location specified via latitude and longitude parameters (default = 300)
+        :param typed: Yield Stop records instead of dicts
+        :param deadline: Seconds within which the stream must start, the rate limiter wait included
+        :param kwargs: Optional keyword arguments for filtering, as in get_stops_by_geolocation
+        :return: Generator of stops
+        :raises TimeoutError: If the deadline passes first
+        """
+        endpoint = f"/v3/stops/location/{latitude},{longitude}"
+        params = {
+            'max_results': max_results,
+            'max_distance': max_distance,
+            **kwargs
+        }
+        return self._iter_items(endpoint, params, ('stops',), Stop if typed else None, deadline)
+
+    def iter_runs_by_route(self, route_id: int, typed: bool = False, deadline: float = None, **kwargs):
+        """
+        Iterate over trip/service runs for a specific route ID, see get_runs_by_route.
+
+        :param route_id: Identifier of route; values returned by Routes API
+        :param typed: Yield Run records instead of dicts
+        :param deadline: Seconds within which the stream must start, the rate limiter wait included
+        :param kwargs: Optional keyword arguments for filtering, as in get_runs_by_route
+        :return: Generator of runs
+        :raises TimeoutError: If the deadline passes first
+        """
+        endpoint = f"/v3/runs/route/{route_id}"
+        params = {**kwargs}
+        return self._iter_items(endpoint, params, ('runs',), Run if typed else None, deadline)
+
+    def iter_disruptions(self, typed: bool = False, deadline: float = None, **kwargs):
+        """
+        Iterate over disruptions of all route types, see get_disruptions_all.
+
+        :param typed: Yield Disruption records instead of dicts
+        :param deadline: Seconds within which the stream must start, the rate limiter wait included
+        :param kwargs: Optional keyword arguments for filtering, as in get_disruptions_all
+        :return: Generator of disruptions, grouped by disruption mode
+        :raises TimeoutError: If the deadline passes first
+        """
+        endpoint = "/v3/disruptions"
+        params = {**kwargs}
+        return self._iter_items(endpoint, params, ('disruptions', '*'), Disruption if typed else None, deadline)
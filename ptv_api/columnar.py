@@ -0,0 +1,308 @@
+from array import array
+from math import nan
+from operator import itemgetter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .src.projection import loads
+
+# Stands for a missing ID in int32 columns and a missing flag in bool ones, turned into nulls in Arrow tables
+MISSING = -1
+
+INT32 = 'int32'
+FLOAT64 = 'float64'
+BOOL = 'bool'
+DATETIME = 'datetime'
+STRING = 'string'
+# Strings repeating across rows, dictionary-encoded in Arrow tables
+CATEGORY = 'category'
+INT32_LIST = 'int32_list'
+
+
+class ListColumn:
+    """
+    Column of variable-length integer lists, stored flat: the values of row i are values[offsets[i]:offsets[i + 1]].
+    """
+    __slots__ = ('offsets', 'values')
+
+    def __init__(self, offsets, values):
+        """
+        :param offsets: int64 array of len(rows) + 1 offsets into values
+        :param values: int32 array of every row's values, one after another
+        """
+        self.offsets = offsets
+        self.values = values
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int):
+        return self.values[self.offsets[row]:self.offsets[row + 1]]
+
+
+def _buffer(kind: str):
+    """
+    :param kind: Kind of a column
+    :return: Empty buffer the column of a batch is filled into: a typed array for numbers and flags, lengths and values
+        arrays for list columns, a list of references to the decoded strings otherwise
+    """
+    if kind in (INT32, BOOL):
+        return array('i') if kind == INT32 else array('b')
+    if kind == FLOAT64:
+        return array('d')
+    if kind == INT32_LIST:
+        return array('q'), array('i')
+    return []
+
+
+def _filler(name: str, kind: str, buffer, source: tuple = None):
+    """
+    :return: Function appending the value of an item to the buffer of a column, MISSING or NaT if it has none
+    """
+    if kind == INT32_LIST:
+        lengths, values = buffer
+        array_key, take = (source[0], itemgetter(source[1])) if source is not None else (name, None)
+
+        def fill(item):
+            nested = item.get(array_key)
+            if not nested:
+                lengths.append(0)
+                return
+            lengths.append(len(nested))
+            values.extend(nested if take is None else map(take, nested))
+        return fill
+
+    append = buffer.append
+    if kind in (INT32, BOOL):
+        def fill(item):
+            value = item.get(name)
+            append(MISSING if value is None else value)
+    elif kind == FLOAT64:
+        def fill(item):
+            value = item.get(name)
+            append(nan if value is None else value)
+    elif kind == DATETIME:
+        def fill(item):
+            append(item.get(name) or 'NaT')
+    else:
+        def fill(item):
+            append(item.get(name))
+    return fill
+
+
+def _convert(kind: str, buffer):
+    """
+    Converts the buffer of a column into a NumPy array, without going through its values in Python.
+    """
+    if kind == INT32:
+        return np.array(buffer, dtype=np.int32)
+    if kind == BOOL:
+        # Flags stay int8 until columns() or to_arrow(), so a missing one is told apart from False
+        return np.array(buffer, dtype=np.int8)
+    if kind == FLOAT64:
+        return np.array(buffer, dtype=np.float64)
+    if kind == DATETIME:
+        # numpy parses the ISO strings itself, without their 'Z' suffix
+        return np.char.rstrip(np.array(buffer, dtype=str), 'Z').astype('datetime64[s]')
+    if kind == INT32_LIST:
+        return np.array(buffer[0], dtype=np.int64), np.array(buffer[1], dtype=np.int32)
+    return np.array(buffer, dtype=object)
+
+
+class ColumnarBuilder:
+    """
+    Gathers the array of many responses into typed NumPy columns, one batch of rows per response.
+    Each response is decoded by the fastest JSON parser available (orjson when installed), then a single pass over its
+    items fills every column at once: numbers, flags and list columns go straight into typed buffers, strings are kept
+    as the parser decoded them. No record nor per-column list is built. Subclasses declare the response array and the
+    columns kept.
+    """
+    key = None
+    # (column name, kind) pairs, or (column name, kind, source) for list columns taken from nested objects
+    schema = ()
+
+    def __init__(self):
+        if np is None:
+            raise ImportError("Columnar builders require numpy, install it with 'pip install numpy'")
+        self._chunks = {column[0]: [] for column in self.schema}
+        self._rows = 0
+
+    def _items(self, data: dict) -> list:
+        """
+        :param data: Decoded response
+        :return: Items of the response's array
+        """
+        return data.get(self.key) or []
+
+    def append(self, content: bytes or str or dict) -> int:
+        """
+        Appends the rows of a response.
+        :param content: Response body, or the already decoded response
+        :return: Number of rows appended
+        """
+        items = self._items(content if isinstance(content, dict) else loads(content))
+        if not items:
+            return 0
+        buffers = [_buffer(kind) for _, kind, *_ in self.schema]
+        fills = [_filler(name, kind, buffer, *source) for (name, kind, *source), buffer in zip(self.schema, buffers)]
+        for item in items:
+            for fill in fills:
+                fill(item)
+        for (name, kind, *_), buffer in zip(self.schema, buffers):
+            self._chunks[name].append(_convert(kind, buffer))
+        self._rows += len(items)
+        return len(items)
+
+    def extend(self, responses) -> int:
+        """
+        :param responses: Iterable of response bodies or decoded responses, e.g. the results of a batch call
+        :return: Number of rows appended
+        """
+        return sum(self.append(content) for content in responses)
+
+    def __len__(self):
+        return self._rows
+
+    def _column(self, name: str, kind: str):
+        """
+        :return: Column as it is stored, bool columns as int8 with MISSING for missing flags
+        """
+        chunks = self._chunks[name]
+        if kind == INT32_LIST:
+            lengths = np.concatenate([c[0] for c in chunks]) if chunks else np.empty(0, np.int64)
+            values = np.concatenate([c[1] for c in chunks]) if chunks else np.empty(0, np.int32)
+            return ListColumn(np.concatenate(([0], np.cumsum(lengths))), values)
+        if not chunks:
+            return _convert(kind, _buffer(kind))
+        column = np.concatenate(chunks)
+        # Later appends start from the concatenated column rather than every chunk again
+        self._chunks[name] = [column]
+        return column
+
+    def columns(self) -> dict:
+        """
+        :return: Column arrays by name, list columns as ListColumn. Missing flags are False in bool columns, see
+            to_arrow() to keep them apart.
+        """
+        columns = {}
+        for name, kind, *_ in self.schema:
+            column = self._column(name, kind)
+            columns[name] = column == 1 if kind == BOOL else column
+        return columns
+
+    def to_arrow(self):
+        """
+        :return: pyarrow.Table of the columns, with nulls for missing values and timestamps in UTC
+        """
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("Arrow export requires pyarrow, install it with 'pip install pyarrow'") from e
+
+        arrays = {}
+        for name, kind, *_ in self.schema:
+            column = self._column(name, kind)
+            if kind == INT32_LIST:
+                arrays[name] = pa.ListArray.from_arrays(pa.array(column.offsets, pa.int32()),
+                                                        pa.array(column.values, pa.int32()))
+            elif kind == INT32:
+                arrays[name] = pa.array(column, pa.int32(), mask=column == MISSING)
+            elif kind == BOOL:
+                arrays[name] = pa.array(column == 1, pa.bool_(), mask=column == MISSING)
+            elif kind == DATETIME:
+                arrays[name] = pa.array(column, pa.timestamp('s', tz='UTC'), mask=np.isnat(column))
+            elif kind == STRING:
+                arrays[name] = pa.array(column, pa.string())
+            elif kind == CATEGORY:
+                arrays[name] = pa.array(column, pa.string()).dictionary_encode()
+            else:
+                arrays[name] = pa.array(column)
+        return pa.table(arrays)
+
+    def write_parquet(self, path: str, **kwargs) -> None:
+        """
+        :param path: Parquet file to write
+        :param kwargs: Options of pyarrow.parquet.write_table, e.g. compression
+        """
+        import pyarrow.parquet as pq
+        pq.write_table(self.to_arrow(), path, **kwargs)
+
+    def write_feather(self, path: str, **kwargs) -> None:
+        """
+        :param path: Feather (Arrow IPC) file to write
+        :param kwargs: Options of pyarrow.feather.write_feather, e.g. compression
+        """
+        import pyarrow.feather as feather
+        feather.write_feather(self.to_arrow(), path, **kwargs)
+
+
+class DeparturesBuilder(ColumnarBuilder):
+    """
+    Columns of departures responses, e.g. of get_departures_by_stop or get_pattern_by_run_ref.
+    """
+    key = 'departures'
+    schema = (
+        ('stop_id', INT32),
+        ('route_id', INT32),
+        ('run_id', INT32),
+        ('run_ref', STRING),
+        ('direction_id', INT32),
+        ('disruption_ids', INT32_LIST),
+        ('scheduled_departure_utc', DATETIME),
+        ('estimated_departure_utc', DATETIME),
+        ('at_platform', BOOL),
+        ('platform_number', CATEGORY),
+        ('flags', CATEGORY),
+        ('departure_sequence', INT32),
+    )
+
+
+class RunsBuilder(ColumnarBuilder):
+    """
+    Columns of runs responses, e.g. of get_runs_by_route.
+    """
+    key = 'runs'
+    schema = (
+        ('run_id', INT32),
+        ('run_ref', STRING),
+        ('route_id', INT32),
+        ('route_type', INT32),
+        ('final_stop_id', INT32),
+        ('destination_name', CATEGORY),
+        ('status', CATEGORY),
+        ('direction_id', INT32),
+        ('run_sequence', INT32),
+        ('express_stop_count', INT32),
+    )
+
+
+class DisruptionsBuilder(ColumnarBuilder):
+    """
+    Columns of disruptions responses, e.g. of get_disruptions_all, across every mode they are grouped by.
+    The IDs of the affected routes and stops are kept as list columns.
+    """
+    key = 'disruptions'
+    schema = (
+        ('disruption_id', INT32),
+        ('title', STRING),
+        ('url', STRING),
+        ('description', STRING),
+        ('disruption_status', CATEGORY),
+        ('disruption_type', CATEGORY),
+        ('published_on', DATETIME),
+        ('last_updated', DATETIME),
+        ('from_date', DATETIME),
+        ('to_date', DATETIME),
+        ('colour', CATEGORY),
+        ('display_on_board', BOOL),
+        ('display_status', BOOL),
+        ('route_ids', INT32_LIST, ('routes', 'route_id')),
+        ('stop_ids', INT32_LIST, ('stops', 'stop_id')),
+    )
+
+    def _items(self, data: dict) -> list:
+        groups = data.get(self.key) or []
+        return groups if isinstance(groups, list) else [item for group in groups.values() for item in group]
@@ -0,0 +1,128 @@
+import hashlib
+import time
+from .models import decode_disruptions, decode_routes, decode_stops
+from .src.cache import conditional_headers
+from .src.get_signature import canonical_request
+from .src.metrics import endpoint_template
+
+
+class Delta:
+    """
+    Records added, changed and removed between two refreshes of a collection.
+    """
+    __slots__ = ('added', 'changed', 'removed')
+
+    def __init__(self, added: list = None, changed: list = None, removed: list = None):
+        """
+        :param added: Records not present before
+        :param changed: New versions of records whose content changed
+        :param removed: Records no longer present
+        """
+        self.added = added or []
+        self.changed = changed or []
+        self.removed = removed or []
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
+
+    def __repr__(self):
+        return f"<Delta +{len(self.added)} ~{len(self.changed)} -{len(self.removed)}>"
+
+
+class ChangeTracker:
+    """
+    Follows one collection across refreshes. Payloads identical to the previous one, by content hash,
+    are neither decoded nor diffed.
+    """
+
+    def __init__(self, decoder, key):
+        """
+        :param decoder: Builds records from a response body, e.g. decode_routes
+        :param key: Identifies a record across payloads, e.g. lambda route: route.route_id
+        """
+        self.decoder = decoder
+        self.key = key
+        self.records = {}
+        self.digest = None
+        # Conditional headers of the last response, if the API sent validators
+        self.validators = None
+
+    def update(self, content: bytes) -> Delta:
+        """
+        :param content: Response body of the latest refresh
+        :return: Changes since the previous payload, everything is added on the first one
+        """
+        digest = hashlib.blake2b(content, digest_size=16).digest()
+        if digest == self.digest:
+            return Delta()
+
+        key = self.key
+        records = {key(record): record for record in self.decoder(content, intern=True)}
+        previous = self.records
+        delta = Delta(
+            added=[record for k, record in records.items() if k not in previous],
+            changed=[record for k, record in records.items() if k in previous and previous[k] != record],
+            removed=[record for k, record in previous.items() if k not in records],
+        )
+        self.records, self.digest = records, digest
+        return delta
+
+
+class NetworkRefresher:
+    """
+    Refreshes slow-changing collections and reports what changed, so downstream indexes can be updated incrementally.
+    Requests are revalidated with ETag / Last-Modified when the API provides them.
+    """
+
+    def __init__(self, client):
+        """
+        :param client: PTVClient to fetch through
+        """
+        self.client = client
+        self.trackers = {}
+
+    def _refresh(self, endpoint: str, params: dict, decoder, key) -> Delta:
+        request = canonical_request(endpoint, params)
+        tracker = self.trackers.get(request)
+        if tracker is None:
+            tracker = self.trackers[request] = ChangeTracker(decoder, key)
+
+        # Bypasses the client's cache: a refresh always asks the API, conditionally if possible
+        response = self.client.send(endpoint, params, tracker.validators)
+        if response.status_code == 304:
+            return Delta()
+        if response.status_code != 200:
+            raise RuntimeError(f"Request to {endpoint} failed with status {response.status_code}: "
+                               f"{response.content[:200]!r}")
+        tracker.validators = conditional_headers(response.headers)
+        instrumentation = self.client.instrumentation
+        started = time.perf_counter() if instrumentation is not None else None
+        delta = tracker.update(response.content)
+        if started is not None:
+            instrumentation.observe('model', endpoint_template(endpoint), time.perf_counter() - started)
+        return delta
+
+    def refresh_routes(self, **kwargs) -> Delta:
+        """
+        :param kwargs: Filters of get_route_all
+        :return: Route records added, changed or removed since the last refresh
+        """
+        return self._refresh("/v3/routes", kwargs, decode_routes, lambda route: route.route_id)
+
+    def refresh_stops(self, route_id: int, route_type: int, **kwargs) -> Delta:
+        """
+        :param route_id: Identifier of route; values returned by Routes API
+        :param route_type: Number identifying transport mode; values returned via RouteTypes API (0: Train, 1: Tram, 2: Bus, 3: V/Line, 4: Night Bus)
+        :param kwargs: Filters of get_stops_by_route
+        :return: Stop records of the route added, changed or removed since the last refresh
+        """
+        return self._refresh(f"/v3/stops/route/{route_id}/route_type/{route_type}", kwargs, decode_stops,
+                             lambda stop: (stop.stop_id, stop.route_type))
+
+    def refresh_disruptions(self, **kwargs) -> Delta:
+        """
+        :param kwargs: Filters of get_disruptions_all
+        :return: Disruption records added, changed or removed since the last refresh
+        """
+        return self._refresh("/v3/disruptions", kwargs, decode_disruptions,
+                             lambda disruption: disruption.disruption_id)
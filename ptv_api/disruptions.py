@@ -0,0 +1,234 @@
+import asyncio
+import threading
+import time
+
+from .models import STATUS
+from .src.projection import loads
+
+
+class _Index:
+    """
+    Disruptions of one refresh and their inverted indexes, replaced as a whole so lookups never see a partial refresh.
+    """
+    __slots__ = ('modes', 'disruptions', 'by_route', 'by_stop', 'by_route_and_stop', 'refreshed_at')
+
+    def __init__(self, groups: dict, refreshed_at: float):
+        # Mode group of each disruption, in the order the API listed them
+        self.modes = list(groups)
+        self.disruptions = []
+        self.by_route, self.by_stop, self.by_route_and_stop = {}, {}, {}
+        for mode, items in groups.items():
+            for item in items:
+                position = len(self.disruptions)
+                self.disruptions.append((mode, item))
+                route_ids = {route['route_id'] for route in item.get('routes') or ()}
+                stop_ids = {stop['stop_id'] for stop in item.get('stops') or ()}
+                for route_id in route_ids:
+                    self.by_route.setdefault(route_id, []).append(position)
+                for stop_id in stop_ids:
+                    self.by_stop.setdefault(stop_id, []).append(position)
+                for route_id in route_ids:
+                    for stop_id in stop_ids:
+                        self.by_route_and_stop.setdefault((route_id, stop_id), []).append(position)
+        self.refreshed_at = refreshed_at
+
+
+class DisruptionStore:
+    """
+    Local copy of every disruption, refreshed from get_disruptions_all, with inverted indexes from route, stop and
+    (route, stop) pairs to disruptions. Once attached to a client, it answers get_disruptions_by_route,
+    get_disruptions_by_stop and get_disruptions_by_route_and_stop without a request while its copy is fresh.
+    Queries it cannot answer (a stale copy, or options other than disruption_status and disruption_modes) still go
+    to the API.
+    """
+
+    def __init__(self, client, max_age: float = 300, interval: float = None):
+        """
+        :param client: PTVClient or AsyncPTVClient to refresh through, the latter with refresh_async() only
+        :param max_age: Seconds a refresh is served for, older copies leave every query to the API
+        :param interval: Seconds between the refreshes of the background thread, half of max_age by default
+        """
+        self.client = client
+        self.max_age = max_age
+        self.interval = interval or max_age / 2
+        # Last refresh error, cleared by the next successful refresh
+        self.error = None
+        self._index = None
+        # Disruption mode names by ID, see get_disruption_modes
+        self._mode_names = None
+        self._thread = None
+        self._stopping = False
+        self._wake = threading.Event()
+
+    @property
+    def age(self) -> float or None:
+        """
+        :return: Seconds since the last successful refresh, None before the first one
+        """
+        index = self._index
+        return None if index is None else time.monotonic() - index.refreshed_at
+
+    @property
+    def fresh(self) -> bool:
+        age = self.age
+        return age is not None and age <= self.max_age
+
+    def __len__(self):
+        index = self._index
+        return 0 if index is None else len(index.disruptions)
+
+    @staticmethod
+    def _content(response, endpoint: str) -> bytes:
+        if response.status_code != 200:
+            raise RuntimeError(f"Request to {endpoint} failed with status {response.status_code}: "
+                               f"{response.content[:200]!r}")
+        return response.content
+
+    def _load(self, disruptions, modes) -> None:
+        """
+        Replaces the indexes, only once both responses succeeded: a failed refresh keeps the previous copy.
+        :param disruptions: Transport response of the disruptions
+        :param modes: Transport response of the disruption modes, None if they are known already
+        """
+        disruptions = loads(self._content(disruptions, "/v3/disruptions"))
+        if modes is not None:
+            self._mode_names = {mode['disruption_mode']: mode['disruption_mode_name']
+                                for mode in loads(self._content(modes, "/v3/disruptions/modes"))
+                                .get('disruption_modes') or ()}
+        groups = disruptions.get('disruptions') or {}
+        if isinstance(groups, list):
+            groups = {'general': groups}
+        self._index = _Index(groups, time.monotonic())
+        self.error = None
+
+    def refresh(self) -> int:
+        """
+        Fetches every disruption and rebuilds the indexes. The disruption modes are fetched on the first refresh.
+        Bypasses the client's cache, so the age of the copy is the age of the data.
+        :return: Number of disruptions held
+        :raises RuntimeError: If the API answered with an error, the previous copy is kept
+        :raises TypeError: If the client is an AsyncPTVClient, see refresh_async()
+        """
+        self._require_sync()
+        try:
+            modes = None
+            if self._mode_names is None:
+                modes = self.client.send("/v3/disruptions/modes")
+            self._load(self.client.send("/v3/disruptions"), modes)
+        except Exception as e:
+            self.error = e
+            raise
+        return len(self)
+
+    def _require_sync(self) -> None:
+        if asyncio.iscoroutinefunction(self.client.send):
+            raise TypeError("The DisruptionStore of an AsyncPTVClient is refreshed by awaiting refresh_async(), "
+                            "e.g. in a task of its event loop")
+
+    async def refresh_async(self) -> int:
+        """
+        See refresh(), for an AsyncPTVClient.
+        """
+        try:
+            modes = None
+            if self._mode_names is None:
+                modes = await self.client.send("/v3/disruptions/modes")
+            self._load(await self.client.send("/v3/disruptions"), modes)
+        except Exception as e:
+            self.error = e
+            raise
+        return len(self)
+
+    def start(self) -> None:
+        """
+        Refreshes in a background thread every interval seconds until stop() is called. Failed refreshes are kept in
+        the error attribute and retried at the next interval, the previous copy being served until it is too old.
+        :raises TypeError: If the client is an AsyncPTVClient, see refresh_async()
+        """
+        self._require_sync()
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='ptv-disruption-store', daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopping:
+            try:
+                self.refresh()
+            except Exception:
+                pass
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def stop(self) -> None:
+        """
+        Stops the background thread, after the refresh in progress if any.
+        """
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _modes(self, disruption_modes) -> set or None:
+        """
+        :return: Names of the mode groups to keep, None if a mode ID is unknown
+        """
+        names = set()
+        for mode in disruption_modes:
+            if isinstance(mode, str) and not mode.isdigit():
+                names.add(mode)
+            elif self._mode_names and int(mode) in self._mode_names:
+                names.add(self._mode_names[int(mode)])
+            else:
+                return None
+        return names
+
+    def _lookup(self, table: str, key, disruption_status: str = None, disruption_modes: list = None,
+                **kwargs) -> dict or None:
+        index = self._index
+        if kwargs or index is None or time.monotonic() - index.refreshed_at > self.max_age:
+            return None
+        modes = None
+        if disruption_modes:
+            modes = self._modes(disruption_modes)
+            if modes is None:
+                return None
+        status = disruption_status.lower() if disruption_status else None
+
+        groups = {mode: [] for mode in index.modes if modes is None or mode in modes}
+        for position in getattr(index, table).get(key, ()):
+            mode, item = index.disruptions[position]
+            if mode not in groups:
+                continue
+            if status is not None and (item.get('disruption_status') or '').lower() != status:
+                continue
+            groups[mode].append(item)
+        return {'disruptions': groups, 'status': STATUS}
+
+    def by_route(self, route_id: int, **kwargs) -> dict or None:
+        """
+        :param route_id: Identifier of route
+        :param kwargs: Options of get_disruptions_by_route
+        :return: Response of get_disruptions_by_route, or None if the query has to go to the API
+        """
+        return self._lookup('by_route', route_id, **kwargs)
+
+    def by_stop(self, stop_id: int, **kwargs) -> dict or None:
+        """
+        :param stop_id: Identifier of stop
+        :param kwargs: Options of get_disruptions_by_stop
+        :return: Response of get_disruptions_by_stop, or None if the query has to go to the API
+        """
+        return self._lookup('by_stop', stop_id, **kwargs)
+
+    def by_route_and_stop(self, route_id: int, stop_id: int, **kwargs) -> dict or None:
+        """
+        :param route_id: Identifier of route
+        :param stop_id: Identifier of stop
+        :param kwargs: Options of get_disruptions_by_route_and_stop
+        :return: Response of get_disruptions_by_route_and_stop, listing the disruptions naming both the route and
+            the stop, or None if the query has to go to the API
+        """
+        return self._lookup('by_route_and_stop', (route_id, stop_id), **kwargs)
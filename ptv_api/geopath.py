@@ -0,0 +1,228 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .spatial import EARTH_RADIUS, METRES_PER_DEGREE
+from .src.projection import loads
+
+# Chunk of points snapped at once, bounding the (points x segments) arrays
+_SNAP_CHUNK = 256
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("ptv_api.geopath requires numpy, install it with 'pip install numpy'")
+
+
+class Geopath:
+    """
+    One path of a route's geopath, its points held in a contiguous (n, 2) array of latitudes and longitudes.
+    """
+    __slots__ = ('route_id', 'direction_id', 'valid_from', 'valid_to', 'coordinates')
+
+    def __init__(self, coordinates, route_id: int = None, direction_id: int = None, valid_from: str = None,
+                 valid_to: str = None):
+        """
+        :param coordinates: (n, 2) array of latitude, longitude pairs
+        :param route_id: Route the path belongs to, None when the response does not say, e.g. stops by route
+        :param direction_id: Direction the path is travelled in
+        :param valid_from: First date the path is valid on
+        :param valid_to: Last date the path is valid on
+        """
+        self.coordinates = coordinates
+        self.route_id = route_id
+        self.direction_id = direction_id
+        self.valid_from = valid_from
+        self.valid_to = valid_to
+
+    @property
+    def latitudes(self):
+        return self.coordinates[:, 0]
+
+    @property
+    def longitudes(self):
+        return self.coordinates[:, 1]
+
+    def length(self) -> float:
+        """
+        :return: Length of the path in metres
+        """
+        return float(cumulative_distance(self.coordinates)[-1]) if len(self.coordinates) else 0.0
+
+    def snap(self, latitude, longitude) -> tuple:
+        """
+        See snap().
+        """
+        return snap(self.coordinates, latitude, longitude)
+
+    def __repr__(self):
+        return f"<Geopath route {self.route_id} direction {self.direction_id}, {len(self.coordinates)} points>"
+
+
+def parse_path(path, dtype=None):
+    """
+    Converts a path of the API, a string of 'latitude longitude' pairs separated by commas, into an array.
+    :param path: Path string, or a sequence of (latitude, longitude) pairs
+    :param dtype: numpy float type of the array, float64 by default. float32 halves the memory, at about 1m precision.
+    :return: (n, 2) array of latitude, longitude pairs
+    """
+    _require_numpy()
+    dtype = dtype or np.float64
+    if isinstance(path, str):
+        return np.array(path.replace(',', ' ').split(), dtype=dtype).reshape(-1, 2)
+    return np.asarray(path, dtype=dtype).reshape(-1, 2)
+
+
+def _geopaths(entries, route_id: int, dtype) -> list:
+    return [Geopath(parse_path(path, dtype), route_id, entry.get('direction_id'), entry.get('valid_from'),
+                    entry.get('valid_to'))
+            for entry in entries or () for path in entry.get('paths') or ()]
+
+
+def decode_geopaths(content: bytes or str or dict, dtype=None) -> list:
+    """
+    Builds the geopaths of a response requested with include_geopath=True: the top-level geopath of
+    get_stops_by_route and the route geopaths of get_pattern_by_run_ref or get_departures_by_stop.
+    :param content: Response body, or the already decoded response
+    :param dtype: numpy float type of the coordinate arrays, see parse_path
+    :return: List of Geopath
+    """
+    data = content if isinstance(content, dict) else loads(content)
+    geopaths = _geopaths(data.get('geopath'), None, dtype)
+    for route in (data.get('routes') or {}).values():
+        geopaths.extend(_geopaths(route.get('geopath'), route.get('route_id'), dtype))
+    return geopaths
+
+
+def encode_delta(coordinates, precision: int = 6):
+    """
+    Compresses a path to integer deltas between consecutive points, small numbers that compress well for caching.
+    :param coordinates: (n, 2) array of latitude, longitude pairs
+    :param precision: Decimal digits kept, 6 is about 10cm
+    :return: (n, 2) int32 array, the first point followed by the offsets of each next one
+    """
+    _require_numpy()
+    scaled = np.rint(np.asarray(coordinates, dtype=np.float64) * 10 ** precision).astype(np.int64)
+    return np.diff(scaled, axis=0, prepend=np.zeros((1, 2), np.int64)).astype(np.int32)
+
+
+def decode_delta(deltas, precision: int = 6, dtype=None):
+    """
+    Restores a path compressed by encode_delta.
+    :param deltas: (n, 2) integer array returned by encode_delta
+    :param precision: Decimal digits the deltas were encoded with
+    :param dtype: numpy float type of the array, float64 by default
+    :return: (n, 2) array of latitude, longitude pairs
+    """
+    _require_numpy()
+    return (np.cumsum(np.asarray(deltas, dtype=np.int64).reshape(-1, 2), axis=0) / 10 ** precision).astype(
+        dtype or np.float64)
+
+
+def encode_polyline(coordinates, precision: int = 5) -> str:
+    """
+    Compresses a path to an Encoded Polyline string, the format of Google Maps and most map libraries.
+    :param coordinates: (n, 2) array of latitude, longitude pairs
+    :param precision: Decimal digits kept, 5 is about 1m
+    :return: Encoded polyline
+    """
+    _require_numpy()
+    deltas = encode_delta(coordinates, precision).astype(np.int64).ravel()
+    # Zigzag: the sign goes to the lowest bit, so small negative numbers stay small
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1).tolist()
+    chars = []
+    for value in values:
+        while value >= 0x20:
+            chars.append(chr((0x20 | (value & 0x1f)) + 63))
+            value >>= 5
+        chars.append(chr(value + 63))
+    return ''.join(chars)
+
+
+def decode_polyline(polyline: str, precision: int = 5, dtype=None):
+    """
+    Restores a path compressed by encode_polyline.
+    :param polyline: Encoded polyline
+    :param precision: Decimal digits the polyline was encoded with
+    :param dtype: numpy float type of the array, float64 by default
+    :return: (n, 2) array of latitude, longitude pairs
+    """
+    _require_numpy()
+    values = []
+    value = shift = 0
+    for char in polyline:
+        byte = ord(char) - 63
+        value |= (byte & 0x1f) << shift
+        shift += 5
+        if byte < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+    return decode_delta(np.array(values, dtype=np.int64), precision, dtype)
+
+
+def cumulative_distance(coordinates):
+    """
+    :param coordinates: (n, 2) array of latitude, longitude pairs
+    :return: Distance in metres from the start of the path to each of its points
+    """
+    _require_numpy()
+    coordinates = np.radians(np.asarray(coordinates, dtype=np.float64))
+    lat, lon = coordinates[:, 0], coordinates[:, 1]
+    a = (np.sin(np.diff(lat) / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lon) / 2) ** 2)
+    return np.concatenate(([0.0], np.cumsum(2 * EARTH_RADIUS * np.arcsin(np.sqrt(a)))))
+
+
+def snap(coordinates, latitude, longitude) -> tuple:
+    """
+    Snaps positions to the nearest point of a path, e.g. vehicle positions to their route.
+    Segments are projected on a flat plane around each position, which is accurate for positions close to the path.
+    :param coordinates: (n, 2) array of latitude, longitude pairs, at least two points
+    :param latitude: Latitude of a position, or an array of them
+    :param longitude: Longitude of a position, or an array of them
+    :return: Distance along the path in metres, offset from the path in metres and the snapped latitude and longitude,
+        each a float or an array like the position given
+    """
+    _require_numpy()
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    along = cumulative_distance(coordinates)
+    scalar = np.ndim(latitude) == 0
+    latitudes = np.atleast_1d(np.asarray(latitude, dtype=np.float64))
+    longitudes = np.atleast_1d(np.asarray(longitude, dtype=np.float64))
+
+    start, end = coordinates[:-1], coordinates[1:]
+    results = [np.empty(len(latitudes)) for _ in range(4)]
+    for first in range(0, len(latitudes), _SNAP_CHUNK):
+        lat = latitudes[first:first + _SNAP_CHUNK, None]
+        lon = longitudes[first:first + _SNAP_CHUNK, None]
+        # Local plane in metres around each position: x eastwards, y northwards
+        x_scale = METRES_PER_DEGREE * np.cos(np.radians(lat))
+        ax, ay = (start[:, 1] - lon) * x_scale, (start[:, 0] - lat) * METRES_PER_DEGREE
+        bx, by = (end[:, 1] - lon) * x_scale, (end[:, 0] - lat) * METRES_PER_DEGREE
+        dx, dy = bx - ax, by - ay
+        squared = dx * dx + dy * dy
+        t = np.clip(np.divide(-(ax * dx + ay * dy), squared, out=np.zeros_like(squared), where=squared > 0), 0, 1)
+        offsets = np.hypot(ax + t * dx, ay + t * dy)
+
+        nearest = np.argmin(offsets, axis=1)
+        rows = np.arange(len(nearest))
+        t_nearest = t[rows, nearest]
+        chunk = slice(first, first + len(nearest))
+        results[0][chunk] = along[nearest] + t_nearest * (along[nearest + 1] - along[nearest])
+        results[1][chunk] = offsets[rows, nearest]
+        results[2][chunk] = start[nearest, 0] + t_nearest * (end[nearest, 0] - start[nearest, 0])
+        results[3][chunk] = start[nearest, 1] + t_nearest * (end[nearest, 1] - start[nearest, 1])
+
+    if scalar:
+        return tuple(float(result[0]) for result in results)
+    return tuple(results)
+
+
+def distance_along(coordinates, latitude, longitude):
+    """
+    :param coordinates: (n, 2) array of latitude, longitude pairs
+    :param latitude: Latitude of a position, or an array of them
+    :param longitude: Longitude of a position, or an array of them
+    :return: Distance in metres from the start of the path to the point nearest to each position
+    """
+    return snap(coordinates, latitude, longitude)[0]
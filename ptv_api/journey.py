@@ -0,0 +1,277 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from threading import Lock
+
+from .models import decode_departures, decode_runs, decode_stops
+from .poller import ADDED, ESTIMATE_CHANGED
+from .src.batch import run_batch, DEFAULT_MAX_WORKERS
+
+_INFINITY = float('inf')
+
+
+def _timestamp(value: str or float) -> int:
+    if isinstance(value, str):
+        return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+    return int(value)
+
+
+def _utc(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class Leg:
+    """
+    Ride on one run of a journey, between boarding and alighting.
+    """
+    __slots__ = ('run_ref', 'route_id', 'from_stop_id', 'to_stop_id', 'departure_utc', 'arrival_utc')
+
+    def __init__(self, run_ref: str, route_id: int, from_stop_id: int, to_stop_id: int, departure_utc: str,
+                 arrival_utc: str):
+        """
+        :param run_ref: Run ridden
+        :param route_id: Route of the run
+        :param from_stop_id: Stop boarded at
+        :param to_stop_id: Stop alighted at
+        :param departure_utc: Departure time from from_stop_id, estimated if a realtime estimate was applied
+        :param arrival_utc: Arrival time at to_stop_id, taken as the run's departure time from it
+        """
+        self.run_ref = run_ref
+        self.route_id = route_id
+        self.from_stop_id = from_stop_id
+        self.to_stop_id = to_stop_id
+        self.departure_utc = departure_utc
+        self.arrival_utc = arrival_utc
+
+    def __repr__(self):
+        return (f"<Leg run {self.run_ref} {self.from_stop_id} {self.departure_utc} -> "
+                f"{self.to_stop_id} {self.arrival_utc}>")
+
+
+class Timetable:
+    """
+    Stopping patterns of many runs as a connection array, answering earliest-arrival queries locally with the
+    Connection Scan Algorithm. Each connection is a run going from one stop to the next, the arrays are sorted by
+    departure time so a query is a single forward scan.
+    Realtime estimates patch the times of single stops without rebuilding the arrays.
+    """
+
+    def __init__(self):
+        self.stops = {}
+        self._stop_ids = []
+        self._stop_index = {}
+        self._run_refs = []
+        self._run_index = {}
+        self._route_ids = []
+        # Stop indexes and times of the stops of each run, in order: the source of truth of the connection arrays
+        self._run_stops = []
+        self._run_times = []
+        self._dirty = True
+        self._lock = Lock()
+        self._departures = array('q')
+        self._arrivals = array('q')
+        self._from_stops = array('i')
+        self._to_stops = array('i')
+        self._runs = array('i')
+        self._sequences = array('i')
+
+    def __len__(self):
+        return sum(max(len(stops) - 1, 0) for stops in self._run_stops)
+
+    def _stop(self, stop_id: int) -> int:
+        index = self._stop_index.get(stop_id)
+        if index is None:
+            index = self._stop_index[stop_id] = len(self._stop_ids)
+            self._stop_ids.append(stop_id)
+        return index
+
+    def add_pattern(self, pattern: bytes or str or dict) -> bool:
+        """
+        Adds the stopping pattern of a run, see get_pattern_by_run_ref.
+        :param pattern: Pattern response
+        :return: False if the pattern has no departures or its run was added already
+        """
+        departures = sorted(decode_departures(pattern, intern=True), key=lambda d: d.departure_sequence or 0)
+        departures = [d for d in departures if d.scheduled_departure_utc]
+        if not departures or departures[0].run_ref in self._run_index:
+            return False
+        with self._lock:
+            self._run_index[departures[0].run_ref] = len(self._run_refs)
+            self._run_refs.append(departures[0].run_ref)
+            self._route_ids.append(departures[0].route_id)
+            self._run_stops.append(array('i', (self._stop(d.stop_id) for d in departures)))
+            self._run_times.append(array('q', (_timestamp(d.estimated_departure_utc or d.scheduled_departure_utc)
+                                               for d in departures)))
+            self._dirty = True
+        return True
+
+    @classmethod
+    def load(cls, client, routes: list, max_workers: int = DEFAULT_MAX_WORKERS, **kwargs):
+        """
+        Bulk-pulls the runs of some routes and their stopping patterns.
+        :param client: PTVClient to fetch through
+        :param routes: (route_id, route_type) pairs
+        :param max_workers: Number of requests sent at once
+        :param kwargs: Arguments passed to every get_pattern_by_run_ref call, e.g. date_utc
+        :return: Timetable, with the stops of the routes in its stops attribute
+        """
+        timetable = cls()
+        runs = []
+        for result in run_batch(client.get_runs_by_route_and_route_type, routes, max_workers):
+            if result.ok:
+                runs.extend((run.run_ref, run.route_type) for run in decode_runs(result.result))
+        for result in run_batch(client.get_stops_by_route, routes, max_workers):
+            if result.ok:
+                for stop in decode_stops(result.result, intern=True):
+                    timetable.stops.setdefault(stop.stop_id, stop)
+        for result in run_batch(client.get_pattern_by_run_ref, runs, max_workers, **kwargs):
+            if result.ok:
+                timetable.add_pattern(result.result)
+        timetable.build()
+        return timetable
+
+    def build(self) -> None:
+        """
+        Sorts the connections of every run by departure time. Queries call it when runs were added since.
+        """
+        with self._lock:
+            self._build()
+
+    def _build(self) -> None:
+        connections = sorted(
+            (times[i], run, i)
+            for run, times in enumerate(self._run_times) for i in range(len(times) - 1)
+        )
+        self._departures = array('q', (c[0] for c in connections))
+        self._arrivals = array('q', (self._run_times[run][i + 1] for _, run, i in connections))
+        self._from_stops = array('i', (self._run_stops[run][i] for _, run, i in connections))
+        self._to_stops = array('i', (self._run_stops[run][i + 1] for _, run, i in connections))
+        self._runs = array('i', (run for _, run, _ in connections))
+        self._sequences = array('i', (i for _, _, i in connections))
+        self._dirty = False
+
+    def _position(self, departure: int, run: int, sequence: int) -> int:
+        runs, sequences = self._runs, self._sequences
+        for position in range(bisect_left(self._departures, departure), bisect_right(self._departures, departure)):
+            if runs[position] == run and sequences[position] == sequence:
+                return position
+        raise KeyError((run, sequence))
+
+    def update_departure(self, run_ref: str, stop_id: int, departure_utc: str or float) -> bool:
+        """
+        Moves the time a run departs from, and arrives at, one of its stops.
+        :param run_ref: Run whose time changed
+        :param stop_id: Stop of the run
+        :param departure_utc: New time, e.g. an estimated_departure_utc, as an ISO string or a timestamp
+        :return: False if the run or its stop is unknown
+        """
+        run = self._run_index.get(run_ref)
+        stop = self._stop_index.get(stop_id)
+        if run is None or stop is None:
+            return False
+        with self._lock:
+            stops, times = self._run_stops[run], self._run_times[run]
+            try:
+                sequence = stops.index(stop)
+            except ValueError:
+                return False
+            previous, time = times[sequence], _timestamp(departure_utc)
+            if previous == time:
+                return True
+            times[sequence] = time
+            if self._dirty:
+                return True
+
+            if sequence > 0:
+                # Arrivals are not sorted on, the connection reaching the stop is updated in place
+                departure = times[sequence - 1]
+                self._arrivals[self._position(departure, run, sequence - 1)] = time
+            if sequence < len(stops) - 1:
+                # The connection leaving the stop moves to its new place in departure order
+                position = self._position(previous, run, sequence)
+                arrival = self._arrivals[position]
+                for column in (self._departures, self._arrivals, self._from_stops, self._to_stops, self._runs,
+                               self._sequences):
+                    column.pop(position)
+                position = bisect_right(self._departures, time)
+                self._departures.insert(position, time)
+                self._arrivals.insert(position, arrival)
+                self._from_stops.insert(position, stop)
+                self._to_stops.insert(position, stops[sequence + 1])
+                self._runs.insert(position, run)
+                self._sequences.insert(position, sequence)
+        return True
+
+    def apply_departures(self, content: bytes or str or dict) -> int:
+        """
+        Patches the timetable with the estimates of a departures response, e.g. of get_departures_by_stop.
+        :param content: Departures response
+        :return: Number of departures applied
+        """
+        return sum(self.update_departure(d.run_ref, d.stop_id, d.estimated_departure_utc)
+                   for d in decode_departures(content) if d.estimated_departure_utc)
+
+    def apply_events(self, events: list) -> int:
+        """
+        Patches the timetable with the estimates reported by a DeparturePoller, it can be its on_change callback.
+        :param events: DepartureEvent list
+        :return: Number of estimates applied
+        """
+        return sum(self.update_departure(e.departure.run_ref, e.departure.stop_id, e.departure.estimated_departure_utc)
+                   for e in events if e.kind in (ADDED, ESTIMATE_CHANGED) and e.departure.estimated_departure_utc)
+
+    def earliest_arrival(self, from_stop_id: int, to_stop_id: int, departure_utc: str or float,
+                         transfer_time: int = 120) -> list or None:
+        """
+        Finds the journey arriving first at a stop, leaving another one no earlier than a given time.
+        :param from_stop_id: Stop to leave from
+        :param to_stop_id: Stop to arrive at
+        :param departure_utc: Earliest departure, as an ISO string or a timestamp
+        :param transfer_time: Seconds needed to change runs at a stop
+        :return: Legs of the journey, None if the stop cannot be reached
+        """
+        origin, target = self._stop_index.get(from_stop_id), self._stop_index.get(to_stop_id)
+        if origin is None or target is None:
+            return None
+        if origin == target:
+            return []
+
+        with self._lock:
+            if self._dirty:
+                self._build()
+            departures, arrivals = self._departures, self._arrivals
+            from_stops, to_stops, runs = self._from_stops, self._to_stops, self._runs
+
+            arrival = [_INFINITY] * len(self._stop_ids)
+            # Earliest time each stop can be boarded from, the origin needs no transfer
+            ready = [_INFINITY] * len(self._stop_ids)
+            ready[origin] = arrival[origin] = _timestamp(departure_utc)
+            boarded = {}
+            reached_by = {}
+            for position in range(bisect_left(departures, ready[origin]), len(departures)):
+                departure = departures[position]
+                if arrival[target] <= departure:
+                    break
+                run = runs[position]
+                if run not in boarded:
+                    if ready[from_stops[position]] > departure:
+                        continue
+                    boarded[run] = position
+                stop = to_stops[position]
+                if arrivals[position] < arrival[stop]:
+                    arrival[stop] = arrivals[position]
+                    ready[stop] = min(ready[stop], arrivals[position] + transfer_time)
+                    reached_by[stop] = (boarded[run], position)
+
+            if target not in reached_by:
+                return None
+            legs = []
+            stop = target
+            while stop != origin:
+                first, last = reached_by[stop]
+                run = runs[first]
+                legs.append(Leg(self._run_refs[run], self._route_ids[run], self._stop_ids[from_stops[first]],
+                                self._stop_ids[stop], _utc(departures[first]), _utc(arrivals[last])))
+                stop = from_stops[first]
+        legs.reverse()
+        return legs
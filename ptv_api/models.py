@@ -0,0 +1,220 @@
+import sys
+from dataclasses import dataclass, fields
+from .src.projection import loads
+
+# Status of the responses answered locally, shaped like the API's
+STATUS = {'version': '3.0', 'health': 1}
+
+
+class Record:
+    """
+    Base of the typed records. Subclasses are slotted dataclasses whose fields are named after the API's keys.
+    """
+    __slots__ = ()
+
+    # Fields whose strings repeat across records (suburbs, route names...) and are worth interning
+    _interned = ()
+
+    @classmethod
+    def from_dict(cls, data: dict, intern: bool = False):
+        """
+        Builds a record from one element of a response.
+        :param data: Decoded JSON object
+        :param intern: Intern the strings of repetitive fields, so equal values share one object
+        :return: Record, missing keys are set to None
+        """
+        names = cls.__dict__.get('_names')
+        if names is None:
+            names = cls._names = tuple(field.name for field in fields(cls))
+        values = {}
+        for name in names:
+            value = data.get(name)
+            values[name] = tuple(value) if type(value) is list else value
+        if intern:
+            for name in cls._interned:
+                if type(values[name]) is str:
+                    values[name] = sys.intern(values[name])
+        return cls(**values)
+
+    def to_dict(self) -> dict:
+        """
+        :return: The record as a dict shaped like the API's, tuples stay tuples
+        """
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+
+@dataclass(slots=True)
+class Departure(Record):
+    stop_id: int
+    route_id: int
+    run_id: int
+    run_ref: str
+    direction_id: int
+    disruption_ids: tuple
+    scheduled_departure_utc: str
+    estimated_departure_utc: str
+    at_platform: bool
+    platform_number: str
+    flags: str
+    departure_sequence: int
+
+    _interned = ('run_ref', 'platform_number', 'flags')
+
+
+@dataclass(slots=True)
+class Stop(Record):
+    stop_id: int
+    stop_name: str
+    stop_suburb: str
+    route_type: int
+    stop_latitude: float
+    stop_longitude: float
+    stop_sequence: int
+    stop_distance: float
+    disruption_ids: tuple
+
+    _interned = ('stop_name', 'stop_suburb')
+
+
+@dataclass(slots=True)
+class Run(Record):
+    run_id: int
+    run_ref: str
+    route_id: int
+    route_type: int
+    final_stop_id: int
+    destination_name: str
+    status: str
+    direction_id: int
+    run_sequence: int
+    express_stop_count: int
+
+    _interned = ('destination_name', 'status')
+
+
+@dataclass(slots=True)
+class Route(Record):
+    route_id: int
+    route_type: int
+    route_name: str
+    route_number: str
+    route_gtfs_id: str
+
+    _interned = ('route_name', 'route_number')
+
+
+@dataclass(slots=True)
+class Disruption(Record):
+    disruption_id: int
+    title: str
+    url: str
+    description: str
+    disruption_status: str
+    disruption_type: str
+    published_on: str
+    last_updated: str
+    from_date: str
+    to_date: str
+    colour: str
+    display_on_board: bool
+    display_status: bool
+    route_ids: tuple
+    stop_ids: tuple
+
+    _interned = ('disruption_status', 'disruption_type', 'colour')
+
+    @classmethod
+    def from_dict(cls, data: dict, intern: bool = False):
+        # Affected routes and stops come as nested objects, only their IDs are kept
+        data = {
+            **data,
+            'route_ids': [route['route_id'] for route in data.get('routes') or ()],
+            'stop_ids': [stop['stop_id'] for stop in data.get('stops') or ()],
+        }
+        return super(Disruption, cls).from_dict(data, intern)
+
+
+@dataclass(slots=True)
+class Outlet(Record):
+    outlet_slid_spid: str
+    outlet_name: str
+    outlet_business: str
+    outlet_latitude: float
+    outlet_longitude: float
+    outlet_suburb: str
+    outlet_postcode: int
+
+    _interned = ('outlet_business', 'outlet_suburb')
+
+
+def _load(content: bytes or str or dict) -> dict:
+    return content if isinstance(content, dict) else loads(content)
+
+
+def decode(content: bytes or str or dict, model: type, key: str, intern: bool = False) -> list:
+    """
+    Builds records from the array of a response.
+    :param content: Response body, or the already decoded response
+    :param model: Record class to build
+    :param key: Key of the array in the response, e.g. 'departures'
+    :param intern: Intern the strings of repetitive fields
+    :return: List of records
+    """
+    from_dict = model.from_dict
+    return [from_dict(item, intern) for item in _load(content).get(key) or ()]
+
+
+def decode_departures(content: bytes or str or dict, intern: bool = False) -> list:
+    """
+    :param content: Body of a departures response
+    :param intern: Intern the strings of repetitive fields
+    :return: List of Departure
+    """
+    return decode(content, Departure, 'departures', intern)
+
+
+def decode_stops(content: bytes or str or dict, intern: bool = False) -> list:
+    """
+    :param content: Body of a stops response
+    :param intern: Intern the strings of repetitive fields
+    :return: List of Stop
+    """
+    return decode(content, Stop, 'stops', intern)
+
+
+def decode_runs(content: bytes or str or dict, intern: bool = False) -> list:
+    """
+    :param content: Body of a runs response
+    :param intern: Intern the strings of repetitive fields
+    :return: List of Run
+    """
+    return decode(content, Run, 'runs', intern)
+
+
+def decode_routes(content: bytes or str or dict, intern: bool = False) -> list:
+    """
+    :param content: Body of a routes response
+    :param intern: Intern the strings of repetitive fields
+    :return: List of Route
+    """
+    return decode(content, Route, 'routes', intern)
+
+
+def decode_outlets(content: bytes or str or dict, intern: bool = False) -> list:
+    """
+    :param content: Body of an outlets response
+    :param intern: Intern the strings of repetitive fields
+    :return: List of Outlet
+    """
+    return decode(content, Outlet, 'outlets', intern)
+
+
+def decode_disruptions(content: bytes or str or dict, intern: bool = False) -> list:
+    """
+    :param content: Body of a disruptions response, whose disruptions are grouped by mode
+    :param intern: Intern the strings of repetitive fields
+    :return: List of Disruption across all modes
+    """
+    from_dict = Disruption.from_dict
+    groups = _load(content).get('disruptions') or {}
+    return [from_dict(item, intern) for items in groups.values() for item in items]
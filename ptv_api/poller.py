@@ -0,0 +1,260 @@
+import asyncio
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from .models import decode_departures
+from .src.projection import loads
+from .src.batch import DEFAULT_MAX_WORKERS
+
+ADDED = 'added'
+REMOVED = 'removed'
+ESTIMATE_CHANGED = 'estimate_changed'
+CHANGED = 'changed'
+
+
+class DepartureEvent:
+    """
+    Change of one departure between two polls of a stop.
+    """
+    __slots__ = ('kind', 'stop', 'departure', 'previous')
+
+    def __init__(self, kind: str, stop: tuple, departure, previous=None):
+        """
+        :param kind: ADDED, REMOVED, ESTIMATE_CHANGED (delayed or brought forward) or CHANGED (platform, flags...)
+        :param stop: (route_type, stop_id) subscription the departure was polled for
+        :param departure: Latest Departure, the last known one if it was removed
+        :param previous: Departure as of the previous poll, None if it was added
+        """
+        self.kind = kind
+        self.stop = stop
+        self.departure = departure
+        self.previous = previous
+
+    def __repr__(self):
+        return f"<DepartureEvent {self.kind} {self.stop} {self.departure.run_ref}>"
+
+
+def _parse_utc(value: str) -> float or None:
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+class DeparturePoller:
+    """
+    Polls the departures of subscribed stops and reports only what changed.
+    Each stop is polled on its own schedule: every min_interval while departures are imminent, stretching up to
+    max_interval when the next one is far off, e.g. overnight. Stops subscribed several times are polled once.
+    """
+
+    def __init__(self, client, stops=(), on_change=None, min_interval: float = 30, max_interval: float = 600,
+                 jitter: float = 0.1, max_workers: int = DEFAULT_MAX_WORKERS, **kwargs):
+        """
+        :param client: PTVClient or AsyncPTVClient to poll through
+        :param stops: Initial (route_type, stop_id) subscriptions
+        :param on_change: Called with the list of DepartureEvent of each poll that changed something
+        :param min_interval: Shortest time in seconds between two polls of a stop
+        :param max_interval: Longest time in seconds between two polls of a stop
+        :param jitter: Fraction by which each interval is randomly stretched or shortened, so polls do not bunch up
+        :param max_workers: Number of stops polled at once by a PTVClient
+        :param kwargs: Arguments passed to every get_departures_by_stop call, e.g. max_results
+        """
+        self.client = client
+        self.on_change = on_change
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.max_workers = max_workers
+        self.kwargs = kwargs
+        # Errors of the last poll of each stop that failed, they are retried on their normal schedule
+        self.errors = {}
+        # Last error raised by a poll of the background thread or by on_change, cleared by the next successful poll
+        self.error = None
+        self._subscriptions = Counter()
+        self._departures = {}
+        self._next_poll = {}
+        self._lock = threading.Lock()
+        self._stopping = False
+        self._wake = threading.Event()
+        self._thread = None
+        for route_type, stop_id in stops:
+            self.subscribe(route_type, stop_id)
+
+    def subscribe(self, route_type: int, stop_id: int) -> None:
+        """
+        Starts polling a stop, on the next poll if it is not polled already.
+        :param route_type: Number identifying transport mode; values returned via RouteTypes API (0: Train, 1: Tram, 2: Bus, 3: V/Line, 4: Night Bus)
+        :param stop_id: Identifier of stop; values returned by Stops API
+        """
+        stop = (route_type, stop_id)
+        with self._lock:
+            self._subscriptions[stop] += 1
+            self._next_poll.setdefault(stop, 0)
+        self._wake.set()
+
+    def unsubscribe(self, route_type: int, stop_id: int) -> None:
+        """
+        Drops one subscription to a stop. The stop is no longer polled once every subscription to it is dropped.
+        :param route_type: Number identifying transport mode
+        :param stop_id: Identifier of stop
+        """
+        stop = (route_type, stop_id)
+        with self._lock:
+            self._subscriptions[stop] -= 1
+            if self._subscriptions[stop] <= 0:
+                del self._subscriptions[stop]
+                self._next_poll.pop(stop, None)
+                self._departures.pop(stop, None)
+                self.errors.pop(stop, None)
+
+    def _due(self) -> list:
+        now = time.monotonic()
+        with self._lock:
+            return [stop for stop, deadline in self._next_poll.items() if deadline <= now]
+
+    def _interval(self, departures: dict) -> float:
+        # Polling every quarter of the wait for the next departure keeps estimates fresh as it gets close
+        now = time.time()
+        upcoming = [t for t in (_parse_utc(d.estimated_departure_utc or d.scheduled_departure_utc)
+                                for d in departures.values()) if t is not None and t >= now]
+        interval = (min(upcoming) - now) / 4 if upcoming else self.max_interval
+        interval = min(max(interval, self.min_interval), self.max_interval)
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _apply(self, stop: tuple, content) -> list:
+        data = content if isinstance(content, dict) else loads(content)
+        if not isinstance(data.get('departures'), list):
+            # An error body is a failed poll, not a stop without departures: its departures are not removed
+            raise RuntimeError(f"Departures of stop {stop} missing from the response: {str(data)[:200]}")
+        instrumentation = self.client.instrumentation
+        started = time.perf_counter() if instrumentation is not None else None
+        departures = {(d.run_ref, d.stop_id): d for d in decode_departures(data, intern=True)}
+        if started is not None:
+            instrumentation.observe('model', '/v3/departures/route_type/{}/stop/{}', time.perf_counter() - started)
+        events = []
+        with self._lock:
+            if stop not in self._subscriptions:
+                return events
+            previous = self._departures.get(stop, {})
+            for key, departure in departures.items():
+                before = previous.get(key)
+                if before is None:
+                    events.append(DepartureEvent(ADDED, stop, departure))
+                elif before.estimated_departure_utc != departure.estimated_departure_utc:
+                    events.append(DepartureEvent(ESTIMATE_CHANGED, stop, departure, before))
+                elif before != departure:
+                    events.append(DepartureEvent(CHANGED, stop, departure, before))
+            events.extend(DepartureEvent(REMOVED, stop, before, before)
+                          for key, before in previous.items() if key not in departures)
+            self._departures[stop] = departures
+            self._next_poll[stop] = time.monotonic() + self._interval(departures)
+            self.errors.pop(stop, None)
+        return events
+
+    def _failed(self, stop: tuple, error: Exception) -> None:
+        with self._lock:
+            if stop in self._subscriptions:
+                self.errors[stop] = error
+                self._next_poll[stop] = time.monotonic() + self._interval(self._departures.get(stop, {}))
+
+    def _handle(self, result, events: list) -> None:
+        """
+        :param result: BatchResult of one stop's departures, failed if the API answered with an error
+        :param events: Events found so far, extended with the stop's
+        """
+        if not result.ok:
+            self._failed(result.key, result.error)
+            return
+        try:
+            events.extend(self._apply(result.key, result.result))
+        except RuntimeError as e:
+            self._failed(result.key, e)
+
+    def _notify(self, events: list) -> list:
+        if events and self.on_change is not None:
+            self.on_change(events)
+        return events
+
+    def poll_once(self) -> list:
+        """
+        Polls the stops that are due, through a PTVClient.
+        :return: DepartureEvent of every change found
+        """
+        events = []
+        for result in self.client.get_departures_for_stops(self._due(), self.max_workers, **self.kwargs):
+            self._handle(result, events)
+        return self._notify(events)
+
+    async def poll_once_async(self) -> list:
+        """
+        Polls the stops that are due, through an AsyncPTVClient.
+        :return: DepartureEvent of every change found
+        """
+        events = []
+        async for result in self.client.get_departures_for_stops(self._due(), **self.kwargs):
+            self._handle(result, events)
+        return self._notify(events)
+
+    def next_poll_in(self) -> float:
+        """
+        :return: Seconds until the next stop is due, max_interval if there is no subscription
+        """
+        with self._lock:
+            deadline = min(self._next_poll.values(), default=None)
+        if deadline is None:
+            return self.max_interval
+        return max(deadline - time.monotonic(), 0)
+
+    def start(self) -> None:
+        """
+        Polls in a background thread until stop() is called, reporting changes to on_change.
+        A poll or an on_change call raising is kept in the error attribute and polling carries on, the events of
+        that poll are not reported again.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='ptv-departure-poller', daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopping:
+            delay = 0
+            try:
+                self.poll_once()
+                self.error = None
+            except Exception as e:
+                self.error = e
+                # Stops still due after a failed poll are not retried straight away
+                delay = self.min_interval
+            # Woken up early by subscribe() and stop()
+            self._wake.wait(max(self.next_poll_in(), delay))
+            self._wake.clear()
+
+    def stop(self) -> None:
+        """
+        Stops the background thread, after the poll in progress if any.
+        """
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    async def events(self):
+        """
+        Polls until cancelled, yielding every change. Works with PTVClient too, whose polls run in a thread.
+        :return: Async generator of DepartureEvent
+        """
+        is_async = asyncio.iscoroutinefunction(self.client.validate)
+        while True:
+            if is_async:
+                events = await self.poll_once_async()
+            else:
+                events = await asyncio.to_thread(self.poll_once)
+            for event in events:
+                yield event
+            await asyncio.sleep(self.next_poll_in())
@@ -0,0 +1,132 @@
+import re
+from bisect import bisect_left
+
+from .models import STATUS
+
+# Options of the search endpoint the local index cannot honour, the remote endpoint answers those queries
+REMOTE_ONLY = ('latitude', 'longitude', 'max_distance', 'include_addresses', 'match_stop_by_gtfs_stop_id')
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text: str) -> list:
+    """
+    :param text: Name, suburb or search term
+    :return: Lower-cased alphanumeric words of the text
+    """
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+class PrefixIndex:
+    """
+    Inverted index from words to documents, answering prefix queries.
+    Words are kept sorted, so the words starting with a prefix are one contiguous range found by bisection.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._words = []
+
+    def add(self, document: int, text: str) -> None:
+        """
+        :param document: Identifier of the document
+        :param text: Text the document is found by
+        """
+        for word in tokenize(text):
+            self._postings.setdefault(word, set()).add(document)
+        self._words = None
+
+    def match(self, terms: list) -> set:
+        """
+        :param terms: Words of the query
+        :return: Documents having, for every term, a word starting with it
+        """
+        if self._words is None:
+            self._words = sorted(self._postings)
+
+        matches = None
+        for term in terms:
+            start = bisect_left(self._words, term)
+            end = bisect_left(self._words, term + '\uffff', start)
+            documents = set().union(*(self._postings[word] for word in self._words[start:end]))
+            matches = documents if matches is None else matches & documents
+            if not matches:
+                return set()
+        return matches or set()
+
+
+class SearchIndex:
+    """
+    Local counterpart of the search endpoint, built from a NetworkSnapshot.
+    Stops are found by name or suburb, routes by name, number or the suburbs they pass through, outlets by
+    name, business or suburb.
+    """
+
+    def __init__(self, snapshot):
+        """
+        :param snapshot: NetworkSnapshot of the routes, stops and outlets
+        """
+        self.snapshot = snapshot
+        self.stop_names, self.stop_suburbs = PrefixIndex(), PrefixIndex()
+        self.route_names, self.route_suburbs = PrefixIndex(), PrefixIndex()
+        self.outlets = PrefixIndex()
+
+        for i, stop in enumerate(snapshot.stops):
+            self.stop_names.add(i, stop.stop_name)
+            self.stop_suburbs.add(i, stop.stop_suburb)
+
+        suburbs = {(stop.stop_id, stop.route_type): stop.stop_suburb for stop in snapshot.stops}
+        for i, route in enumerate(snapshot.routes):
+            self.route_names.add(i, f"{route.route_name} {route.route_number or ''}")
+            for stop_id in snapshot.route_stops.get(route.route_id, ()):
+                self.route_suburbs.add(i, suburbs.get((stop_id, route.route_type)))
+
+        for i, outlet in enumerate(snapshot.outlets):
+            self.outlets.add(i, f"{outlet.outlet_name} {outlet.outlet_business or ''} {outlet.outlet_suburb or ''}")
+
+    def search(self, search_term: str, route_types: list = None, include_outlets: bool = True,
+               match_stop_by_suburb: bool = True, match_route_by_suburb: bool = True, **kwargs) -> dict or None:
+        """
+        View stops, routes, and myki ticket outlets that match the search term.
+
+        :param search_term: Search text (if search text is numeric and/or less than 3 characters, only routes are returned)
+        :param route_types: Filter by route type
+        :param include_outlets: Include outlet information
+        :param match_stop_by_suburb: Match stop by suburb
+        :param match_route_by_suburb: Match route by suburb
+        :param kwargs: Other options of the search endpoint, the query is not answered locally if any is set
+        :return: Dictionary of search results data, or None if the query has to go to the API
+        """
+        terms = tokenize(search_term)
+        if not terms or any(kwargs.get(option) not in (None, False) for option in REMOTE_ONLY):
+            return None
+        routes_only = search_term.strip().isdigit() or len(search_term.strip()) < 3
+
+        routes = self.route_names.match(terms)
+        if match_route_by_suburb and not routes_only:
+            routes |= self.route_suburbs.match(terms)
+        routes = [self.snapshot.routes[i] for i in routes]
+
+        stops, outlets = [], []
+        if not routes_only:
+            matches = self.stop_names.match(terms)
+            if match_stop_by_suburb:
+                matches |= self.stop_suburbs.match(terms)
+            stops = [self.snapshot.stops[i] for i in matches]
+            if include_outlets:
+                outlets = [self.snapshot.outlets[i] for i in self.outlets.match(terms)]
+
+        if route_types:
+            routes = [route for route in routes if route.route_type in route_types]
+            stops = [stop for stop in stops if stop.route_type in route_types]
+        if not (routes or stops or outlets):
+            return None
+
+        return {
+            'stops': [stop.to_dict() for stop in sorted(stops, key=lambda stop: (stop.stop_name or '',
+                                                                                 stop.route_type or 0))],
+            'routes': [route.to_dict() for route in sorted(routes, key=lambda route: (route.route_type or 0,
+                                                                                      route.route_name or ''))],
+            'outlets': [outlet.to_dict() for outlet in sorted(outlets, key=lambda outlet: outlet.outlet_name or '')],
+            'status': STATUS,
+        }
@@ -0,0 +1,63 @@
+import time
+from .models import decode_routes, decode_stops
+from .src.batch import run_batch, DEFAULT_MAX_WORKERS
+
+
+class NetworkSnapshot:
+    """
+    In-memory copy of the static network: routes, the stops of every route and ticket outlets.
+    Local indexes (geolocation, search) are built from it instead of querying the API.
+    """
+
+    def __init__(self, routes: list = None, stops: list = None, outlets: list = None, route_stops: dict = None):
+        """
+        :param routes: Route records
+        :param stops: Stop records, one per (stop_id, route_type)
+        :param outlets: Outlet records
+        :param route_stops: Stop IDs of each route, keyed by route_id
+        """
+        self.routes = routes or []
+        self.stops = stops or []
+        self.outlets = outlets or []
+        self.route_stops = route_stops or {}
+        # (route_id, route_type) of the routes whose stops could not be fetched, with the error
+        self.failed = []
+
+    @classmethod
+    def load(cls, client, route_types: list = None, max_workers: int = DEFAULT_MAX_WORKERS,
+             max_outlets: int = 5000):
+        """
+        Bulk-pulls the network: every route from get_route_all, their stops from get_stops_by_route and the outlets.
+        :param client: PTVClient to fetch through
+        :param route_types: Only load routes of these route types
+        :param max_workers: Number of get_stops_by_route requests sent at once
+        :param max_outlets: Maximum number of outlets fetched, 0 to skip outlets
+        :return: NetworkSnapshot
+        """
+        snapshot = cls()
+        params = {'route_types': route_types} if route_types else {}
+        routes = client.get_route_all(**params)
+        instrumentation = client.instrumentation
+        started = time.perf_counter() if instrumentation is not None else None
+        snapshot.routes = decode_routes(routes, intern=True)
+        if started is not None:
+            instrumentation.observe('model', '/v3/routes', time.perf_counter() - started)
+
+        stops = {}
+        keys = [(route.route_id, route.route_type) for route in snapshot.routes]
+        for result in run_batch(client.get_stops_by_route, keys, max_workers):
+            if not result.ok:
+                snapshot.failed.append((result.key, result.error))
+                continue
+            started = time.perf_counter() if instrumentation is not None else None
+            route_stops = decode_stops(result.result, intern=True)
+            if started is not None:
+                instrumentation.observe('model', '/v3/stops/route/{}/route_type/{}', time.perf_counter() - started)
+            snapshot.route_stops[result.key[0]] = tuple(stop.stop_id for stop in route_stops)
+            for stop in route_stops:
+                stops.setdefault((stop.stop_id, stop.route_type), stop)
+        snapshot.stops = list(stops.values())
+
+        if max_outlets:
+            snapshot.outlets = list(client.iter_outlets(max_outlets, typed=True))
+        return snapshot
@@ -0,0 +1,155 @@
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .models import STATUS
+
+EARTH_RADIUS = 6371008.8
+METRES_PER_DEGREE = math.pi * EARTH_RADIUS / 180
+
+
+def haversine(latitude: float, longitude: float, latitudes, longitudes):
+    """
+    Great-circle distances from one point to many.
+    :param latitude: Latitude of the origin
+    :param longitude: Longitude of the origin
+    :param latitudes: Array of latitudes
+    :param longitudes: Array of longitudes
+    :return: Array of distances in metres
+    """
+    lat1 = math.radians(latitude)
+    lat2 = np.radians(latitudes)
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * np.cos(lat2) * np.sin(np.radians(longitudes - longitude) / 2) ** 2)
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(a))
+
+
+class SpatialIndex:
+    """
+    Grid index of points backed by NumPy arrays. Points are sorted by grid cell, so the candidates of a query are
+    a few contiguous slices of the arrays.
+    """
+
+    def __init__(self, latitudes, longitudes, cell_size: float = 0.01):
+        """
+        :param latitudes: Latitude of every point
+        :param longitudes: Longitude of every point
+        :param cell_size: Side of a grid cell in degrees, 0.01 is about 1.1km
+        """
+        if np is None:
+            raise ImportError("SpatialIndex requires numpy, install it with 'pip install numpy'")
+
+        self.cell_size = cell_size
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        rows, columns = self._cells(latitudes, longitudes)
+
+        # Position of each sorted point in the original arrays
+        self.order = np.lexsort((columns, rows))
+        self.latitudes = latitudes[self.order]
+        self.longitudes = longitudes[self.order]
+
+        rows, columns = rows[self.order], columns[self.order]
+        if not len(rows):
+            self._slices = {}
+            return
+        starts = np.flatnonzero(np.r_[True, (rows[1:] != rows[:-1]) | (columns[1:] != columns[:-1])])
+        ends = np.r_[starts[1:], len(rows)]
+        self._slices = {(int(rows[s]), int(columns[s])): (int(s), int(e)) for s, e in zip(starts, ends)}
+
+    def _cells(self, latitudes, longitudes) -> tuple:
+        return (np.floor(latitudes / self.cell_size).astype(np.int64),
+                np.floor(longitudes / self.cell_size).astype(np.int64))
+
+    def query(self, latitude: float, longitude: float, max_distance: float = None, max_results: int = None,
+              mask=None) -> tuple:
+        """
+        Finds the points nearest to a location.
+        :param latitude: Geographic coordinate of latitude
+        :param longitude: Geographic coordinate of longitude
+        :param max_distance: Maximum distance in metres, every point is a candidate if not given
+        :param max_results: Maximum number of points returned
+        :param mask: Boolean array over the original points, only points set in it are returned
+        :return: Indexes of the points in the original arrays and their distances in metres, nearest first
+        """
+        if max_distance:
+            row, column = int(latitude // self.cell_size), int(longitude // self.cell_size)
+            lat_cells = math.ceil(max_distance / METRES_PER_DEGREE / self.cell_size)
+            lon_cells = math.ceil(max_distance / (METRES_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-6))
+                                  / self.cell_size)
+            slices = [self._slices[cell] for cell in
+                      ((r, c) for r in range(row - lat_cells, row + lat_cells + 1)
+                       for c in range(column - lon_cells, column + lon_cells + 1))
+                      if cell in self._slices]
+            candidates = np.concatenate([np.arange(s, e) for s, e in slices]) if slices else np.empty(0, np.int64)
+        else:
+            candidates = np.arange(len(self.order))
+
+        if mask is not None and len(candidates):
+            candidates = candidates[np.asarray(mask)[self.order[candidates]]]
+
+        distances = haversine(latitude, longitude, self.latitudes[candidates], self.longitudes[candidates])
+        if max_distance:
+            within = distances <= max_distance
+            candidates, distances = candidates[within], distances[within]
+
+        nearest = np.argsort(distances, kind='stable')
+        if max_results:
+            nearest = nearest[:max_results]
+        return self.order[candidates[nearest]], distances[nearest]
+
+
+class LocalGeolocation:
+    """
+    Answers get_stops_by_geolocation and get_outlets_by_geolocation from a NetworkSnapshot, without the network.
+    Results are shaped like the API's responses.
+    """
+
+    def __init__(self, snapshot, cell_size: float = 0.01):
+        """
+        :param snapshot: NetworkSnapshot of the stops and outlets
+        :param cell_size: Side of a grid cell in degrees
+        """
+        self.snapshot = snapshot
+        self.stops = SpatialIndex([stop.stop_latitude for stop in snapshot.stops],
+                                  [stop.stop_longitude for stop in snapshot.stops], cell_size)
+        self.outlets = SpatialIndex([outlet.outlet_latitude for outlet in snapshot.outlets],
+                                    [outlet.outlet_longitude for outlet in snapshot.outlets], cell_size)
+        self._route_types = np.array([stop.route_type for stop in snapshot.stops], dtype=np.int16)
+
+    def get_stops_by_geolocation(self, latitude: float, longitude: float, max_results: int = 30,
+                                 max_distance: float = 300, route_types: list = None) -> dict:
+        """
+        View all stops near a specific location.
+
+        :param latitude: Geographic coordinate of latitude
+        :param longitude: Geographic coordinate of longitude
+        :param max_results: Maximum number of results returned (default = 30)
+        :param max_distance: Filter by maximum distance (in meters) from location specified via latitude and longitude parameters (default = 300)
+        :param route_types: Filter by route type
+        :return: Dictionary of stop data, nearest first
+        """
+        mask = np.isin(self._route_types, route_types) if route_types else None
+        indexes, distances = self.stops.query(latitude, longitude, max_distance, max_results, mask)
+        stops = [{**self.snapshot.stops[i].to_dict(), 'stop_distance': float(distance)}
+                 for i, distance in zip(indexes, distances)]
+        return {'stops': stops, 'disruptions': {}, 'status': STATUS}
+
+    def get_outlets_by_geolocation(self, latitude: float, longitude: float, max_distance: float = 300,
+                                   max_results: int = 30) -> dict:
+        """
+        List ticket outlets near a specific location.
+
+        :param latitude: Geographic coordinate of latitude
+        :param longitude: Geographic coordinate of longitude
+        :param max_distance: Maximum distance (in meters) from specified location
+        :param max_results: Maximum number of results to return
+        :return: Dictionary of ticket outlets data, nearest first
+        """
+        indexes, distances = self.outlets.query(latitude, longitude, max_distance, max_results)
+        outlets = [{**self.snapshot.outlets[i].to_dict(), 'outlet_distance': float(distance)}
+                   for i, distance in zip(indexes, distances)]
+        return {'outlets': outlets, 'status': STATUS}
@@ -0,0 +1,77 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextvars import copy_context
+
+DEFAULT_MAX_WORKERS = 8
+
+
+class BatchResult:
+    """
+    Outcome of one item of a batch call. Exactly one of result and error is set.
+    """
+    __slots__ = ('key', 'result', 'error')
+
+    def __init__(self, key: tuple, result=None, error: Exception = None):
+        """
+        :param key: Positional arguments the endpoint method was called with, e.g. (route_type, stop_id)
+        :param result: Endpoint response if the call succeeded
+        :param error: Exception raised by the call if it failed
+        """
+        self.key = key
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self):
+        return f"<BatchResult {self.key} {'ok' if self.ok else repr(self.error)}>"
+
+
+def run_batch(func, keys, max_workers: int = DEFAULT_MAX_WORKERS, **kwargs):
+    """
+    Calls func once per key on a thread pool, yielding results as they complete.
+    A failing call is yielded as a BatchResult holding its error, the rest of the batch carries on.
+    :param func: Blocking endpoint method
+    :param keys: Positional arguments of each call
+    :param max_workers: Number of threads sending requests
+    :param kwargs: Keyword arguments passed to every call
+    :return: Generator of BatchResult
+    """
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        # Each call runs in a copy of the caller's context, so the worker threads keep its priority lane
+        futures = {executor.submit(copy_context().run, func, *key, **kwargs): tuple(key) for key in keys}
+        for future in as_completed(futures):
+            try:
+                yield BatchResult(futures[future], result=future.result())
+            except Exception as e:
+                yield BatchResult(futures[future], error=e)
+    finally:
+        # Stopping early drops whatever has not started yet
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_batch_async(func, keys, **kwargs):
+    """
+    Awaits func once per key concurrently, yielding results as they complete.
+    Concurrency is bounded by the client's max_concurrency.
+    :param func: Coroutine endpoint method
+    :param keys: Positional arguments of each call
+    :param kwargs: Keyword arguments passed to every call
+    :return: Async generator of BatchResult
+    """
+    async def call(key):
+        try:
+            return BatchResult(key, result=await func(*key, **kwargs))
+        except Exception as e:
+            return BatchResult(key, error=e)
+
+    tasks = [asyncio.ensure_future(call(tuple(key))) for key in keys]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,276 @@
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock
+
+DAY = 24 * 60 * 60
+
+# Seconds a response stays fresh, by endpoint prefix. The first matching prefix applies, so specific ones come first.
+DEFAULT_TTLS = {
+    '/v3/departures': 30,
+    '/v3/pattern': 60,
+    '/v3/disruptions/modes': DAY,
+    '/v3/disruptions': 5 * 60,
+    '/v3/runs': 60 * 60,
+    '/v3/search': 60 * 60,
+    '/v3/route_types': DAY,
+    '/v3/routes': DAY,
+    '/v3/stops': DAY,
+    '/v3/directions': DAY,
+    '/v3/outlets': DAY,
+    '/v3/fare_estimate': DAY,
+}
+
+
+def conditional_headers(headers) -> dict or None:
+    """
+    Builds the headers revalidating a response with the validators it was served with.
+    :param headers: Response headers
+    :return: If-None-Match / If-Modified-Since headers, None if the response had no ETag nor Last-Modified
+    """
+    if not headers:
+        return None
+    conditions = {}
+    if headers.get('ETag'):
+        conditions['If-None-Match'] = headers['ETag']
+    if headers.get('Last-Modified'):
+        conditions['If-Modified-Since'] = headers['Last-Modified']
+    return conditions or None
+
+
+class ResponseCache:
+    """
+    Thread-safe, size-bounded LRU cache of response bodies with a TTL per endpoint family.
+    Entries are keyed by canonical_request(), so they never include the signature.
+    Expired responses served with an ETag or Last-Modified are kept, so they can be revalidated instead of re-downloaded.
+    """
+
+    def __init__(self, max_size: int = 1024, ttls: dict = None):
+        """
+        :param max_size: Maximum number of responses kept, the least recently used one is evicted first
+        :param ttls: TTL in seconds by endpoint prefix, overriding DEFAULT_TTLS. A TTL of 0 disables caching.
+        """
+        self.max_size = max_size
+        self.ttls = dict(ttls or {})
+        for prefix, ttl in DEFAULT_TTLS.items():
+            self.ttls.setdefault(prefix, ttl)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def ttl_for(self, endpoint: str) -> float:
+        """
+        :param endpoint: API endpoint
+        :return: Seconds a response of this endpoint stays fresh, 0 if it is not cached
+        """
+        for prefix, ttl in self.ttls.items():
+            if endpoint == prefix or endpoint.startswith(prefix + '/'):
+                return ttl
+        return 0
+
+    def get(self, key: str) -> bytes or None:
+        """
+        :param key: Canonical request
+        :return: Cached response body, or None if missing or expired
+        """
+        return self.lookup(key)[0]
+
+    def lookup(self, key: str, max_stale: float = 0) -> tuple:
+        """
+        :param key: Canonical request
+        :param max_stale: Seconds past its TTL an expired response is still returned
+        :return: Cached response body, or None if missing or expired for longer than max_stale,
+            and whether it is expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry[0]
+                if age < max_stale or age < 0:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], age >= 0
+                if entry[2] is None:
+                    del self._entries[key]
+            self.misses += 1
+            return None, False
+
+    def set(self, key: str, endpoint: str, content: bytes, headers=None) -> None:
+        """
+        Stores a response body for as long as its endpoint's TTL.
+        :param key: Canonical request
+        :param endpoint: API endpoint of the request, selects the TTL
+        :param content: Response body
+        :param headers: Response headers, their ETag / Last-Modified are kept to revalidate the response later
+        """
+        ttl = self.ttl_for(endpoint)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, content, conditional_headers(headers))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def validators(self, key: str) -> dict or None:
+        """
+        :param key: Canonical request
+        :return: Headers revalidating the cached response, None if there is nothing to revalidate
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[2] if entry is not None else None
+
+    def revalidate(self, key: str, endpoint: str) -> bytes or None:
+        """
+        Marks a cached response as fresh again, after the API answered 304 Not Modified.
+        :param key: Canonical request
+        :param endpoint: API endpoint of the request, selects the TTL
+        :return: Cached response body, None if it was evicted in the meantime
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries[key] = (time.monotonic() + self.ttl_for(endpoint), entry[1], entry[2])
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def invalidate(self, prefix: str = None) -> int:
+        """
+        Drops cached responses.
+        :param prefix: Only drop requests starting with this endpoint prefix, e.g. '/v3/disruptions'. Drops everything if not given.
+        :return: Number of responses dropped
+        """
+        with self._lock:
+            if prefix is None:
+                count = len(self._entries)
+                self._entries.clear()
+                return count
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def stats(self) -> dict:
+        """
+        :return: Hit, miss and eviction counters along with the current size
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'size': len(self._entries)}
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache(ResponseCache):
+    """
+    Persistent ResponseCache stored in an SQLite file, so restarted workers start warm.
+    Many processes can share one file: a single writer alongside any number of read-only readers (WAL journal),
+    each memory-mapping the file rather than copying it into its own memory.
+    Expiry uses wall-clock time, and the oldest stored responses are evicted first when max_size is exceeded.
+    """
+
+    def __init__(self, path: str, max_size: int = None, ttls: dict = None, read_only: bool = False,
+                 mmap_size: int = 256 * 1024 * 1024):
+        """
+        :param path: Path of the database file, created if missing unless read_only
+        :param max_size: Maximum number of responses kept, unbounded if not given
+        :param ttls: TTL in seconds by endpoint prefix, overriding DEFAULT_TTLS
+        :param read_only: Only serve responses, another process keeps the file up to date
+        :param mmap_size: Bytes of the file memory-mapped by SQLite
+        """
+        super().__init__(max_size, ttls)
+        self.path = path
+        self.read_only = read_only
+        if read_only:
+            self._db = sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+        else:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, expires REAL NOT NULL, stored REAL NOT NULL, '
+                'content BLOB NOT NULL, validators TEXT)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS responses_stored ON responses (stored)')
+            self._db.commit()
+        self._db.execute(f'PRAGMA mmap_size={int(mmap_size)}')
+
+    def lookup(self, key: str, max_stale: float = 0) -> tuple:
+        with self._lock:
+            row = self._db.execute('SELECT expires, content, validators FROM responses WHERE key = ?',
+                                   (key,)).fetchone()
+            if row is not None:
+                age = time.time() - row[0]
+                if age < max_stale or age < 0:
+                    self.hits += 1
+                    return row[1], age >= 0
+                if row[2] is None and not self.read_only:
+                    self._db.execute('DELETE FROM responses WHERE key = ?', (key,))
+                    self._db.commit()
+            self.misses += 1
+            return None, False
+
+    def set(self, key: str, endpoint: str, content: bytes, headers=None) -> None:
+        ttl = self.ttl_for(endpoint)
+        if ttl <= 0 or self.read_only:
+            return
+        validators = conditional_headers(headers)
+        now = time.time()
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)',
+                             (key, now + ttl, now, content, json.dumps(validators) if validators else None))
+            if self.max_size:
+                excess = self._db.execute('SELECT COUNT(*) FROM responses').fetchone()[0] - self.max_size
+                if excess > 0:
+                    self._db.execute('DELETE FROM responses WHERE key IN '
+                                     '(SELECT key FROM responses ORDER BY stored LIMIT ?)', (excess,))
+                    self.evictions += excess
+            self._db.commit()
+
+    def validators(self, key: str) -> dict or None:
+        with self._lock:
+            row = self._db.execute('SELECT validators FROM responses WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row is not None and row[0] else None
+
+    def revalidate(self, key: str, endpoint: str) -> bytes or None:
+        with self._lock:
+            row = self._db.execute('SELECT content FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is not None and not self.read_only:
+                self._db.execute('UPDATE responses SET expires = ? WHERE key = ?',
+                                 (time.time() + self.ttl_for(endpoint), key))
+                self._db.commit()
+        return row[0] if row is not None else None
+
+    def invalidate(self, prefix: str = None) -> int:
+        if self.read_only:
+            return 0
+        with self._lock:
+            if prefix is None:
+                cursor = self._db.execute('DELETE FROM responses')
+            else:
+                # Compared with substr rather than LIKE, whose wildcards may appear in keys
+                cursor = self._db.execute('DELETE FROM responses WHERE substr(key, 1, ?) = ?', (len(prefix), prefix))
+            self._db.commit()
+            return cursor.rowcount
+
+    def stats(self) -> dict:
+        size = len(self)
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'size': size}
+
+    def close(self) -> None:
+        """
+        Closes the database connection.
+        """
+        self._db.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
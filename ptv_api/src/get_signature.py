@@ -1,8 +1,11 @@
+from collections import OrderedDict
 from hashlib import sha1
 import hmac
-import requests
+from threading import Lock
 from urllib.parse import urlencode
 
+BASE_URL = 'https://timetableapi.ptv.vic.gov.au'
+
 def url_encode_params(params: dict) -> str:
     """
     Encoding the parameters into URL by using urllib.
@@ -18,7 +21,20 @@ def url_encode_params(params: dict) -> str:
             params_list.append((k, v))
     return urlencode(params_list)
 
-def get_url(request: str, api_key: str, developer_id: int, params: dict = None, base_url: str = 'https://timetableapi.ptv.vic.gov.au') -> str:
+def canonical_request(request: str, params: dict = None) -> str:
+    """
+    Identifies a request independently of the credentials and of the order its parameters were given in.
+    :param request: The original request URL
+    :param params: Additional query parameters
+    :return: Request path followed by its sorted, encoded query string
+    """
+    request = request.replace(" ", "%20")
+    if not params:
+        return request
+    return request + '?' + url_encode_params(dict(sorted(params.items())))
+
+
+def get_url(request: str, api_key: str, developer_id: int, params: dict = None, base_url: str = BASE_URL) -> str:
     """
     Code partially taken from Public Transport Victoria's API documentation
     :param request: The original request URL
@@ -47,14 +63,83 @@ def get_url(request: str, api_key: str, developer_id: int, params: dict = None,
     return base_url + str(raw, 'UTF-8') + f'&signature={signature}'
 
 
-def validate_key(api_key: str, developer_id: int) -> bool:
+class Signer:
+    """
+    Signs requests for one set of credentials, created once per client.
+    Holds the key bytes and a pre-keyed HMAC copied for each request, and memoises recently signed URLs.
+    """
+
+    def __init__(self, api_key: str, developer_id: int, base_url: str = BASE_URL, cache_size: int = 1024):
+        """
+        :param api_key: PTV API Key
+        :param developer_id: PTV Developer ID
+        :param base_url: PTV API Base URL
+        :param cache_size: Number of signed URLs memoised, 0 disables memoisation
+        """
+        self.base_url = base_url
+        self.cache_size = cache_size
+        self._key = bytes(api_key, 'UTF-8')
+        self._hmac = hmac.new(self._key, digestmod=sha1)
+        self._devid = f'devid={developer_id}'
+        self._urls = OrderedDict()
+        self._lock = Lock()
+
+    def sign(self, request: str, params: dict = None) -> str:
+        """
+        Same as get_url, with the credentials of the signer.
+        :param request: The original request URL
+        :param params: Additional query parameters
+        :return: Request URL with signature
+        """
+        if not self.cache_size:
+            return self._sign(request, params)
+
+        try:
+            # Types are part of the key: 1, 1.0 and True compare equal but are encoded differently
+            key = (request, tuple((k, type(v), tuple((type(i), i) for i in v) if isinstance(v, list) else v)
+                                  for k, v in params.items()) if params else None)
+            hash(key)
+        except TypeError:
+            return self._sign(request, params)
+
+        with self._lock:
+            url = self._urls.get(key)
+            if url is not None:
+                self._urls.move_to_end(key)
+                return url
+
+        url = self._sign(request, params)
+        with self._lock:
+            self._urls[key] = url
+            if len(self._urls) > self.cache_size:
+                self._urls.popitem(last=False)
+        return url
+
+    def _sign(self, request: str, params: dict = None) -> str:
+        request = request.replace(" ", "%20")
+        query_string = url_encode_params(params) if params else ''
+        raw = request + ('&' if '?' in request else '?') + (f"{query_string}&" if query_string else '') + self._devid
+
+        hashed = self._hmac.copy()
+        hashed.update(raw.encode('UTF-8'))
+        return f'{self.base_url}{raw}&signature={hashed.hexdigest()}'
+
+
+def validate_key(api_key: str, developer_id: int, transport=None, base_url: str = BASE_URL) -> bool:
     """
     Validates the auth details by using /v3/route_types endpoint.
     :param developer_id: PTV Developer ID
     :param api_key: PTV API Key
+    :param transport: Transport to send the request through, a one-off requests.get is used when not given
+    :param base_url: PTV API Base URL
     :return: True if the API key and Developer ID authenticates successfully, otherwise False
     """
-    request = requests.get(get_url('/v3/route_types', api_key, developer_id))
+    url = get_url('/v3/route_types', api_key, developer_id, base_url=base_url)
+    if transport is None:
+        import requests
+        request = requests.get(url)
+    else:
+        request = transport.get(url)
     if request.status_code == 200:
         return True
     else:
@@ -0,0 +1,113 @@
+import codecs
+import json
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+class _Reader:
+    """
+    Buffers a stream of UTF-8 chunks, keeping only the part not decoded yet.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """
+        Appends the next chunk to the buffer, dropping what was already consumed.
+        :return: False once the stream is exhausted
+        """
+        if self.eof:
+            return False
+        try:
+            text = self._text.decode(next(self._chunks))
+        except StopIteration:
+            self.eof = True
+            text = self._text.decode(b'', final=True)
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Skips whitespace.
+        :return: The next character, or '' at the end of the stream
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        """
+        Consumes the next character, which must be one of chars.
+        :return: The consumed character
+        """
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} in JSON stream, got {char or 'end of stream'!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """
+        Decodes the next complete JSON value, reading more chunks until it is whole.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number or literal ending the buffer may carry on in the next chunk
+            if end == len(self.buffer) and self.buffer[end - 1] not in '}]"' and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_items(chunks, path: tuple):
+    """
+    Yields the elements of an array nested in a JSON document one at a time, without decoding the whole document.
+    :param chunks: Iterable of byte chunks making up the document
+    :param path: Object keys leading to the array, '*' matching every key of an object,
+        e.g. ('outlets',) or ('disruptions', '*')
+    :return: Generator of the decoded array elements
+    """
+    yield from _walk(_Reader(chunks), tuple(path))
+
+
+def _walk(reader: _Reader, path: tuple):
+    if not path:
+        reader.expect('[')
+        if reader.peek() == ']':
+            reader.pos += 1
+            return
+        while True:
+            yield reader.value()
+            if reader.expect(',]') == ']':
+                return
+
+    reader.expect('{')
+    if reader.peek() == '}':
+        reader.pos += 1
+        return
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        if path[0] in ('*', key) and reader.peek() in '[{':
+            yield from _walk(reader, path[1:])
+        else:
+            reader.value()
+        if reader.expect(',}') == '}':
+            return
@@ -0,0 +1,67 @@
+from collections import deque
+from threading import Lock
+
+
+class LatencyPolicy:
+    """
+    Tail-latency control of a client. Cached responses past their TTL are still served for a while, refreshed in
+    the background, and requests slower than a percentile of the recent latencies of their endpoint are hedged:
+    a duplicate is sent and whichever response arrives first is used.
+    """
+
+    def __init__(self, stale_while_revalidate: float = 0, hedge_percentile: float or None = 0.95,
+                 min_hedge_delay: float = 0.02, min_samples: int = 20, window: int = 256, endpoints: tuple = None,
+                 max_workers: int = 32):
+        """
+        :param stale_while_revalidate: Seconds past its TTL a cached response is served while it is refreshed
+            in the background, 0 to always wait for the refresh. Requires a cache on the client.
+        :param hedge_percentile: Percentile of the recent latencies after which a request is hedged, None to never hedge
+        :param min_hedge_delay: Lower bound in seconds of the hedging delay
+        :param min_samples: Latencies an endpoint needs before its requests are hedged
+        :param window: Latest latencies kept per endpoint
+        :param endpoints: Endpoint prefixes the policy applies to, e.g. ('/v3/departures',). Applies to every endpoint if not given.
+        :param max_workers: Threads of a PTVClient sending hedged requests and background refreshes
+        """
+        self.stale_while_revalidate = stale_while_revalidate
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.min_samples = min_samples
+        self.window = window
+        self.endpoints = tuple(endpoints) if endpoints else None
+        self.max_workers = max_workers
+        self._latencies = {}
+        self._lock = Lock()
+
+    def applies(self, endpoint: str) -> bool:
+        """
+        :param endpoint: API endpoint
+        :return: Whether the policy applies to the endpoint
+        """
+        if self.endpoints is None:
+            return True
+        return any(endpoint == prefix or endpoint.startswith(prefix + '/') for prefix in self.endpoints)
+
+    def record(self, endpoint: str, seconds: float) -> None:
+        """
+        :param endpoint: Endpoint template
+        :param seconds: Latency of a successful request
+        """
+        with self._lock:
+            latencies = self._latencies.get(endpoint)
+            if latencies is None:
+                latencies = self._latencies[endpoint] = deque(maxlen=self.window)
+            latencies.append(seconds)
+
+    def hedge_delay(self, endpoint: str) -> float or None:
+        """
+        :param endpoint: Endpoint template
+        :return: Seconds after which a request is hedged, None if it is not
+        """
+        if self.hedge_percentile is None:
+            return None
+        with self._lock:
+            latencies = self._latencies.get(endpoint)
+            if latencies is None or len(latencies) < self.min_samples:
+                return None
+            latencies = sorted(latencies)
+        return max(latencies[int(self.hedge_percentile * (len(latencies) - 1))], self.min_hedge_delay)
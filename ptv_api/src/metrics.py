@@ -0,0 +1,165 @@
+import re
+from bisect import bisect_left
+from functools import lru_cache
+from threading import Lock
+
+STAGES = ('sign', 'network', 'decode', 'model')
+
+# Upper bounds in seconds of the stage histograms, from signing (microseconds) to slow round-trips
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Path segments holding an ID, a run ref or coordinates, i.e. any segment with a digit but the API version
+_ID_SEGMENT = re.compile(r'/(?!v3(?:/|$))[^/]*\d[^/]*')
+_SEARCH_TERM = re.compile(r'^/v3/search/[^/]+')
+
+
+@lru_cache(maxsize=4096)
+def endpoint_template(endpoint: str) -> str:
+    """
+    Replaces the variable parts of an endpoint, so metrics are grouped per endpoint rather than per stop or route.
+    e.g. /v3/departures/route_type/0/stop/1071 becomes /v3/departures/route_type/{}/stop/{}
+    :param endpoint: API endpoint
+    :return: Endpoint template
+    """
+    return _SEARCH_TERM.sub('/v3/search/{}', _ID_SEGMENT.sub('/{}', endpoint))
+
+
+class Instrumentation:
+    """
+    Hooks called by the clients along each request. Every hook does nothing by default:
+    subclass it and override the ones needed to forward measurements elsewhere, e.g. to StatsD or tracing spans.
+    Clients without instrumentation skip the hooks altogether.
+    """
+
+    def observe(self, stage: str, endpoint: str, seconds: float) -> None:
+        """
+        :param stage: One of STAGES: 'sign', 'network' (one attempt), 'decode' (JSON) or 'model' (records)
+        :param endpoint: Endpoint template
+        :param seconds: Time spent in the stage
+        """
+
+    def response(self, endpoint: str, status: int, size: int) -> None:
+        """
+        :param endpoint: Endpoint template
+        :param status: HTTP status code of an attempt
+        :param size: Bytes of its response body
+        """
+
+    def error(self, endpoint: str, error: Exception) -> None:
+        """
+        :param endpoint: Endpoint template
+        :param error: Exception raised by the transport on an attempt
+        """
+
+    def retry(self, endpoint: str, reason: str) -> None:
+        """
+        :param endpoint: Endpoint template
+        :param reason: Status code or exception name of the attempt being retried
+        """
+
+    def cache(self, endpoint: str, hit: bool) -> None:
+        """
+        :param endpoint: Endpoint template
+        :param hit: Whether the response was served from the client's cache
+        """
+
+    def hedge(self, endpoint: str) -> None:
+        """
+        :param endpoint: Endpoint template of a request a hedged duplicate was sent for
+        """
+
+
+def _labels(**labels) -> str:
+    escaped = (name + '="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+               for name, value in labels.items())
+    return '{' + ','.join(escaped) + '}'
+
+
+class MetricsRegistry(Instrumentation):
+    """
+    Instrumentation aggregating counters and stage histograms per endpoint template,
+    exportable in the Prometheus text format with render().
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS, prefix: str = 'ptv'):
+        """
+        :param buckets: Upper bounds in seconds of the stage histograms
+        :param prefix: Prefix of every metric name
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        # (stage, endpoint) -> [count per bucket, with a last +Inf one], total seconds
+        self.histograms = {}
+        self.responses = {}
+        self.bytes = {}
+        self.errors = {}
+        self.retries = {}
+        self.cache_lookups = {}
+        self.hedges = {}
+        self._lock = Lock()
+
+    def observe(self, stage: str, endpoint: str, seconds: float) -> None:
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self.histograms.get((stage, endpoint))
+            if histogram is None:
+                histogram = self.histograms[(stage, endpoint)] = [[0] * (len(self.buckets) + 1), 0.0]
+            histogram[0][index] += 1
+            histogram[1] += seconds
+
+    def response(self, endpoint: str, status: int, size: int) -> None:
+        with self._lock:
+            self.responses[(endpoint, status)] = self.responses.get((endpoint, status), 0) + 1
+            self.bytes[endpoint] = self.bytes.get(endpoint, 0) + size
+
+    def error(self, endpoint: str, error: Exception) -> None:
+        key = (endpoint, type(error).__name__)
+        with self._lock:
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+    def retry(self, endpoint: str, reason: str) -> None:
+        key = (endpoint, str(reason))
+        with self._lock:
+            self.retries[key] = self.retries.get(key, 0) + 1
+
+    def cache(self, endpoint: str, hit: bool) -> None:
+        key = (endpoint, 'hit' if hit else 'miss')
+        with self._lock:
+            self.cache_lookups[key] = self.cache_lookups.get(key, 0) + 1
+
+    def hedge(self, endpoint: str) -> None:
+        with self._lock:
+            self.hedges[endpoint] = self.hedges.get(endpoint, 0) + 1
+
+    def render(self) -> str:
+        """
+        :return: Every metric in the Prometheus text exposition format
+        """
+        p = self.prefix
+        lines = [f'# HELP {p}_stage_seconds Time spent per request stage',
+                 f'# TYPE {p}_stage_seconds histogram']
+        with self._lock:
+            for (stage, endpoint), (counts, total) in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), counts):
+                    cumulative += count
+                    lines.append(f'{p}_stage_seconds_bucket{_labels(endpoint=endpoint, stage=stage, le=bound)} '
+                                 f'{cumulative}')
+                lines.append(f'{p}_stage_seconds_sum{_labels(endpoint=endpoint, stage=stage)} {total}')
+                lines.append(f'{p}_stage_seconds_count{_labels(endpoint=endpoint, stage=stage)} {cumulative}')
+
+            counters = (
+                ('responses_total', 'Responses received, per status code', self.responses, ('endpoint', 'status')),
+                ('response_bytes_total', 'Bytes of response bodies received', self.bytes, ('endpoint',)),
+                ('errors_total', 'Attempts failing with a transport error', self.errors, ('endpoint', 'error')),
+                ('retries_total', 'Attempts retried, per status code or error', self.retries, ('endpoint', 'reason')),
+                ('cache_lookups_total', 'Cache lookups, per result', self.cache_lookups, ('endpoint', 'result')),
+                ('hedged_requests_total', 'Requests a hedged duplicate was sent for', self.hedges, ('endpoint',)),
+            )
+            for name, help_text, values, label_names in counters:
+                lines.append(f'# HELP {p}_{name} {help_text}')
+                lines.append(f'# TYPE {p}_{name} counter')
+                for key, value in sorted(values.items()):
+                    key = key if isinstance(key, tuple) else (key,)
+                    lines.append(f'{p}_{name}{_labels(**dict(zip(label_names, key)))} {value}')
+        return '\n'.join(lines) + '\n'
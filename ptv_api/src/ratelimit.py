@@ -0,0 +1,231 @@
+import asyncio
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from threading import Lock
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+_priority = ContextVar('ptv_priority', default=PRIORITY_NORMAL)
+
+
+@contextmanager
+def priority(level: int):
+    """
+    Sets the priority lane of the requests made inside the block, by the current thread or task.
+    Lower values go first, e.g. PRIORITY_HIGH for user-facing departure lookups and PRIORITY_LOW for background sweeps.
+    :param level: Priority lane
+    """
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    """
+    :return: Priority lane of the current thread or task
+    """
+    return _priority.get()
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every thread and task sending requests through it.
+    While callers of a higher priority lane are waiting for a token, callers of lower lanes do not get one.
+    """
+
+    def __init__(self, rate: float, burst: int = None):
+        """
+        :param rate: Requests allowed per second on average
+        :param burst: Requests allowed at once after an idle period, defaults to one second's worth
+        """
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._waiting = {}
+        self._lock = Lock()
+
+    def _try_acquire(self, level: int) -> float:
+        """
+        Takes a token if one is available and no caller of a higher priority lane is waiting.
+        :param level: Priority lane of the caller
+        :return: 0 if a token was taken, otherwise seconds to wait before trying again
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            if self._tokens >= 1 and not any(count for lane, count in self._waiting.items() if lane < level):
+                self._tokens -= 1
+                return 0
+            return max((1 - self._tokens) / self.rate, 0.001)
+
+    def _wait(self, level: int, change: int) -> None:
+        with self._lock:
+            self._waiting[level] = self._waiting.get(level, 0) + change
+
+    def acquire(self, level: int = None, timeout: float = None) -> None:
+        """
+        Blocks until a token is available.
+        :param level: Priority lane, defaults to the one set with priority()
+        :param timeout: Seconds to wait at most, without limit if not given
+        :raises TimeoutError: If no token is available in time
+        """
+        level = current_priority() if level is None else level
+        delay = self._try_acquire(level)
+        if not delay:
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._wait(level, 1)
+        try:
+            while delay:
+                self._check_deadline(deadline, delay)
+                time.sleep(delay)
+                delay = self._try_acquire(level)
+        finally:
+            self._wait(level, -1)
+
+    @staticmethod
+    def _check_deadline(deadline: float or None, delay: float) -> None:
+        """
+        Gives up as soon as the next token is known to come too late, rather than sleeping until the deadline.
+        :param deadline: time.monotonic() by which a token must be taken, if any
+        :param delay: Seconds before the next token
+        :raises TimeoutError: If the next token comes after the deadline
+        """
+        if deadline is not None and time.monotonic() + delay > deadline:
+            raise TimeoutError("No rate limiter token before the deadline")
+
+    def try_acquire(self, level: int = None) -> bool:
+        """
+        Takes a token without waiting.
+        :param level: Priority lane, defaults to the one set with priority()
+        :return: Whether a token was available
+        """
+        return not self._try_acquire(current_priority() if level is None else level)
+
+    async def acquire_async(self, level: int = None, timeout: float = None) -> None:
+        """
+        Waits without blocking the event loop until a token is available.
+        :param level: Priority lane, defaults to the one set with priority()
+        :param timeout: Seconds to wait at most, without limit if not given
+        :raises TimeoutError: If no token is available in time
+        """
+        level = current_priority() if level is None else level
+        delay = self._try_acquire(level)
+        if not delay:
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._wait(level, 1)
+        try:
+            while delay:
+                self._check_deadline(deadline, delay)
+                await asyncio.sleep(delay)
+                delay = self._try_acquire(level)
+        finally:
+            self._wait(level, -1)
+
+
+class ProcessRateLimiter(RateLimiter):
+    """
+    RateLimiter whose bucket lives in shared memory, so worker processes started after it share one request rate.
+    Hand it to the workers when they are created, e.g. through a process pool's initargs.
+    """
+
+    def __init__(self, rate: float, burst: int = None, context=None):
+        """
+        :param rate: Requests allowed per second on average, across every process
+        :param burst: Requests allowed at once after an idle period, defaults to one second's worth
+        :param context: multiprocessing context the workers are started with, the default one if not given
+        """
+        import multiprocessing
+
+        context = context or multiprocessing.get_context()
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        # Tokens and last update, guarded by one process-shared lock. time.monotonic() is system-wide.
+        self._state = context.Array('d', (float(self.burst), time.monotonic()))
+        self._waiting = context.Array('i', 3, lock=False)
+
+    def _try_acquire(self, level: int) -> float:
+        with self._state.get_lock():
+            tokens, updated = self._state[0], self._state[1]
+            now = time.monotonic()
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            self._state[1] = now
+
+            if tokens >= 1 and not any(self._waiting[lane] for lane in range(min(level, len(self._waiting)))):
+                self._state[0] = tokens - 1
+                return 0
+            self._state[0] = tokens
+            return max((1 - tokens) / self.rate, 0.001)
+
+    def _wait(self, level: int, change: int) -> None:
+        with self._state.get_lock():
+            lane = min(max(level, 0), len(self._waiting) - 1)
+            self._waiting[lane] += change
+
+
+class RetryPolicy:
+    """
+    Retries transient failures with jittered exponential backoff, honouring Retry-After.
+    """
+
+    def __init__(self, max_retries: int = 3, backoff: float = 0.5, max_backoff: float = 30.0,
+                 statuses: tuple = (429, 500, 502, 503, 504), exceptions: tuple = (OSError,)):
+        """
+        :param max_retries: Retries after the first attempt
+        :param backoff: Base delay in seconds, doubled after every attempt
+        :param max_backoff: Upper bound of the delay before jitter is applied. A Retry-After asking to wait longer
+            is not retried.
+        :param statuses: Response status codes worth retrying, add 403 if your key is throttled with it
+        :param exceptions: Transport errors worth retrying, requests' connection errors and timeouts are OSErrors
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = statuses
+        self.exceptions = exceptions
+
+    def next_delay(self, attempt: int, response=None, error: Exception = None) -> float or None:
+        """
+        :param attempt: Number of attempts already retried, 0 after the first one
+        :param response: Transport response of the attempt, if any
+        :param error: Exception raised by the attempt, if any
+        :return: Seconds to wait before retrying, None if the outcome is final
+        """
+        if attempt >= self.max_retries:
+            return None
+        if error is not None and not isinstance(error, self.exceptions):
+            return None
+        if response is not None and response.status_code not in self.statuses:
+            return None
+
+        retry_after = self._retry_after(response)
+        if retry_after is not None:
+            # Waiting longer would hold the caller's thread for as long as the API asks, e.g. an hour
+            return retry_after if retry_after <= self.max_backoff else None
+        # Full jitter spreads the retries of many clients hitting the same error
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    @staticmethod
+    def _retry_after(response) -> float or None:
+        value = response.headers.get('Retry-After') if response is not None and response.headers else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
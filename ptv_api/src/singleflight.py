@@ -0,0 +1,79 @@
+import asyncio
+from concurrent.futures import Future
+from threading import Lock
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent identical calls across threads.
+    While a call for a key is in flight, other callers with the same key wait for it and share its outcome.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = Lock()
+
+    def do(self, key, fn):
+        """
+        Runs fn unless a call for the same key is already in flight, in which case its result is awaited.
+        :param key: Identifies identical calls, e.g. a canonical request
+        :param fn: Function without arguments doing the actual work
+        :return: Return value of fn, shared by every caller of the key
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self, key) -> Future or None:
+        """
+        :param key: Identifies identical calls
+        :return: Future of the call in flight for the key, None if there is none
+        """
+        with self._lock:
+            return self._calls.get(key)
+
+
+class AsyncSingleFlight:
+    """
+    Deduplicates concurrent identical calls across the tasks of an event loop.
+    The shared call runs as its own task, so a caller being cancelled does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, fn):
+        """
+        Awaits fn() unless a call for the same key is already in flight, in which case its result is awaited.
+        :param key: Identifies identical calls, e.g. a canonical request
+        :param fn: Coroutine function without arguments doing the actual work
+        :return: Return value of fn, shared by every caller of the key
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task)
+
+    def in_flight(self, key) -> asyncio.Task or None:
+        """
+        :param key: Identifies identical calls
+        :return: Task of the call in flight for the key, None if there is none
+        """
+        return self._calls.get(key)
@@ -0,0 +1,178 @@
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 10.0
+
+
+class TransportResponse:
+    """
+    Minimal response object returned by every transport.
+    Custom transports only need to provide these three attributes.
+    """
+    __slots__ = ('status_code', 'headers', 'content')
+
+    def __init__(self, status_code: int, headers: dict, content: bytes):
+        """
+        :param status_code: HTTP status code
+        :param headers: Response headers
+        :param content: Raw response body
+        """
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def __repr__(self):
+        return f"<TransportResponse [{self.status_code}] {len(self.content)} bytes>"
+
+
+class Transport:
+    """
+    Base class of the HTTP layer used by PTVClient.
+    Subclass it and implement get() to plug in a different HTTP library.
+    """
+
+    def get(self, url: str, headers: dict = None, timeout: float = None) -> TransportResponse:
+        """
+        Sends a GET request.
+        :param url: Fully signed request URL
+        :param headers: Additional request headers
+        :param timeout: Timeout in seconds, defaults to the transport's timeout
+        :return: Response of the request
+        """
+        raise NotImplementedError
+
+    def stream(self, url: str, headers: dict = None, timeout: float = None) -> TransportResponse:
+        """
+        Sends a GET request without reading the body upfront.
+        Transports that cannot stream fall back to get() and return the whole body as a single chunk.
+        :param url: Fully signed request URL
+        :param headers: Additional request headers
+        :param timeout: Timeout in seconds, defaults to the transport's timeout
+        :return: Response whose content is an iterator of body chunks
+        """
+        response = self.get(url, headers, timeout)
+        return TransportResponse(response.status_code, response.headers, iter((response.content,)))
+
+    def close(self) -> None:
+        """
+        Releases the resources held by the transport.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class RequestsTransport(Transport):
+    """
+    Transport backed by a persistent requests.Session, so connections to the PTV API are kept alive and reused.
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT,
+                 session=None):
+        """
+        :param pool_size: Maximum number of connections kept alive per host
+        :param timeout: Default timeout in seconds for each request
+        :param session: Existing requests.Session to use, a new one is created otherwise
+        """
+        # Imported here so that importing ptv_api does not pay for importing requests
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.session.headers['Connection'] = 'keep-alive'
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(self, url: str, headers: dict = None, timeout: float = None) -> TransportResponse:
+        response = self.session.get(url, headers=headers, timeout=timeout or self.timeout)
+        return TransportResponse(response.status_code, response.headers, response.content)
+
+    def stream(self, url: str, headers: dict = None, timeout: float = None,
+               chunk_size: int = 64 * 1024) -> TransportResponse:
+        response = self.session.get(url, headers=headers, timeout=timeout or self.timeout, stream=True)
+
+        def chunks():
+            # The connection goes back to the pool once the body is read or the iterator is closed
+            with response:
+                yield from response.iter_content(chunk_size)
+
+        return TransportResponse(response.status_code, response.headers, chunks())
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class AsyncTransport:
+    """
+    Base class of the HTTP layer used by AsyncPTVClient.
+    Subclass it and implement the get() coroutine to plug in a different asyncio HTTP library.
+    """
+
+    async def get(self, url: str, headers: dict = None, timeout: float = None) -> TransportResponse:
+        """
+        Sends a GET request.
+        :param url: Fully signed request URL
+        :param headers: Additional request headers
+        :param timeout: Timeout in seconds, defaults to the transport's timeout
+        :return: Response of the request
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """
+        Releases the resources held by the transport.
+        """
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class AiohttpTransport(AsyncTransport):
+    """
+    Transport backed by an aiohttp.ClientSession with a bounded keep-alive connection pool.
+    The session is created on first use, inside the running event loop.
+    """
+
+    def __init__(self, pool_size: int = 100, timeout: float = DEFAULT_TIMEOUT, keepalive_timeout: float = 30.0):
+        """
+        :param pool_size: Maximum number of simultaneous connections
+        :param timeout: Default timeout in seconds for each request
+        :param keepalive_timeout: Seconds an idle connection is kept open for reuse
+        """
+        try:
+            import aiohttp
+            from yarl import URL
+        except ImportError as e:
+            raise ImportError("AiohttpTransport requires aiohttp, install it with 'pip install aiohttp'") from e
+
+        self._aiohttp = aiohttp
+        self._url = URL
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.keepalive_timeout = keepalive_timeout
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = self._aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=self.keepalive_timeout)
+            self._session = self._aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def get(self, url: str, headers: dict = None, timeout: float = None) -> TransportResponse:
+        # The URL is already encoded and signed, re-quoting it would invalidate the signature
+        timeout = self._aiohttp.ClientTimeout(total=timeout or self.timeout)
+        async with self._get_session().get(self._url(url, encoded=True), headers=headers, timeout=timeout) as response:
+            content = await response.read()
+            return TransportResponse(response.status, response.headers, content)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
@@ -0,0 +1,180 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .client import PTVClient
+from .models import decode_routes, decode_runs
+from .src.batch import run_batch, DEFAULT_MAX_WORKERS
+from .src.ratelimit import ProcessRateLimiter, priority, PRIORITY_LOW
+
+MANIFEST = 'sweep.json'
+ROUTES = 'routes.jsonl'
+
+# Rate limiter shared by the worker processes, set when each of them starts
+_rate_limiter = None
+
+
+def _init_worker(rate_limiter) -> None:
+    global _rate_limiter
+    _rate_limiter = rate_limiter
+
+
+def _write_json(path: str, data) -> None:
+    # Written aside then renamed, so a crash never leaves a truncated file behind
+    with open(path + '.tmp', 'w') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + '.tmp', path)
+
+
+def _read_json(path: str, default=None):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def _sweep_shard(shard: int, routes: list, directory: str, credentials: tuple, client_options: dict,
+                 max_workers: int, pattern_options: dict) -> dict:
+    """
+    Fetches the runs and stopping patterns of a shard's routes in a worker process.
+    Patterns are appended to the shard's JSONL file. After each route, the file is synced and its length
+    checkpointed together with the routes done, so a resumed shard truncates whatever followed the checkpoint.
+    A route with a failed run is not checkpointed: its patterns are truncated and the route is swept again on resume.
+    """
+    checkpoint_path = os.path.join(directory, f'checkpoint-{shard:03d}.json')
+    checkpoint = _read_json(checkpoint_path, {'offset': 0, 'routes': []})
+    done = {tuple(route) for route in checkpoint['routes']}
+
+    client = PTVClient(*credentials, rate_limiter=_rate_limiter, **{**client_options, 'response_format': 'raw'})
+    summary = {'shard': shard, 'routes': 0, 'runs': 0, 'failed_routes': []}
+    with client, open(os.path.join(directory, f'patterns-{shard:03d}.jsonl'), 'ab') as output, priority(PRIORITY_LOW):
+        output.truncate(checkpoint['offset'])
+        output.seek(checkpoint['offset'])
+        for route_id, route_type in routes:
+            if (route_id, route_type) in done:
+                continue
+            try:
+                runs = [(run.run_ref, run.route_type) for run in
+                        decode_runs(client.get_runs_by_route_and_route_type(route_id, route_type))]
+            except Exception as e:
+                summary['failed_routes'].append(((route_id, route_type), repr(e)))
+                continue
+
+            failed, swept = [], 0
+            for result in run_batch(client.get_pattern_by_run_ref, runs, max_workers, **pattern_options):
+                if not result.ok:
+                    failed.append((result.key[0], repr(result.error)))
+                    continue
+                # The body is written as it came, without decoding it
+                prefix = json.dumps({'route_id': route_id, 'route_type': route_type, 'run_ref': result.key[0]})
+                output.write(prefix[:-1].encode() + b', "pattern": ' + result.result.strip() + b'}\n')
+                swept += 1
+            if failed:
+                output.flush()
+                output.truncate(checkpoint['offset'])
+                summary['failed_routes'].append(((route_id, route_type), f"{len(failed)} runs failed, "
+                                                                         f"first {failed[0][0]}: {failed[0][1]}"))
+                continue
+            summary['runs'] += swept
+
+            output.flush()
+            os.fsync(output.fileno())
+            checkpoint['offset'] = output.tell()
+            checkpoint['routes'].append([route_id, route_type])
+            _write_json(checkpoint_path, checkpoint)
+            summary['routes'] += 1
+    return summary
+
+
+class Sweep:
+    """
+    Snapshots the runs and stopping patterns of the whole network, sharded across worker processes.
+    Each worker has its own pooled client, and all of them share one request rate. Patterns are streamed to one
+    JSONL file per shard, and every shard checkpoints after each route, so an interrupted sweep resumes where it
+    stopped when run again on the same directory.
+    """
+
+    def __init__(self, directory: str, processes: int = None, rate: float = 20, burst: int = None,
+                 max_workers: int = DEFAULT_MAX_WORKERS, api_key: str = None, developer_id: int = None,
+                 **client_options):
+        """
+        :param directory: Directory of the output files and checkpoints, created if missing
+        :param processes: Number of worker processes, and of shards, of a new sweep. Defaults to the number of CPUs.
+        :param rate: Requests per second allowed across every process
+        :param burst: Requests allowed at once after an idle period
+        :param max_workers: Patterns fetched at once by each process
+        :param api_key: PTV provided API key, read from the environment / .env by each worker if not given
+        :param developer_id: PTV provided Developer ID
+        :param client_options: Options of every worker's PTVClient, e.g. timeout, retry or base_url
+        """
+        self.directory = directory
+        self.processes = processes or os.cpu_count() or 1
+        self.rate = rate
+        self.burst = burst
+        self.max_workers = max_workers
+        self.credentials = (api_key, developer_id)
+        self.client_options = client_options
+
+    def _routes(self, route_types: list = None) -> list:
+        """
+        Lists the routes to sweep, fetched once and kept in routes.jsonl so a resumed sweep shards them the same way.
+        """
+        path = os.path.join(self.directory, ROUTES)
+        if not os.path.exists(path):
+            params = {'route_types': route_types} if route_types else {}
+            with PTVClient(*self.credentials, **self.client_options) as client:
+                routes = decode_routes(client.get_route_all(**params))
+            with open(path + '.tmp', 'w') as f:
+                for route in routes:
+                    f.write(json.dumps(route.to_dict()) + '\n')
+            os.replace(path + '.tmp', path)
+        with open(path) as f:
+            return sorted((route['route_id'], route['route_type']) for route in map(json.loads, f))
+
+    def run(self, route_types: list = None, **pattern_options) -> list:
+        """
+        Sweeps every route, or resumes the sweep of the directory.
+        :param route_types: Only sweep routes of these route types, when starting a new sweep
+        :param pattern_options: Arguments passed to every get_pattern_by_run_ref call, e.g. include_geopath or fields
+        :return: Summary of each shard: routes and runs swept by this call and routes that failed, to be retried
+            by running the sweep again
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        manifest_path = os.path.join(self.directory, MANIFEST)
+        manifest = _read_json(manifest_path)
+        if manifest is None:
+            manifest = {'shards': self.processes}
+            _write_json(manifest_path, manifest)
+        shards = manifest['shards']
+
+        routes = self._routes(route_types)
+        limiter = ProcessRateLimiter(self.rate, self.burst)
+        with ProcessPoolExecutor(min(self.processes, shards), initializer=_init_worker,
+                                 initargs=(limiter,)) as executor:
+            futures = [executor.submit(_sweep_shard, shard, routes[shard::shards], self.directory, self.credentials,
+                                       self.client_options, self.max_workers, pattern_options)
+                       for shard in range(shards)]
+            return sorted((future.result() for future in as_completed(futures)), key=lambda s: s['shard'])
+
+
+def iter_patterns(directory: str):
+    """
+    Reads the patterns written by a sweep back.
+    :param directory: Directory of the sweep
+    :return: Generator of dicts with route_id, route_type, run_ref and the pattern response
+    """
+    for name in sorted(os.listdir(directory)):
+        if name.startswith('patterns-') and name.endswith('.jsonl'):
+            checkpoint = _read_json(os.path.join(directory, name.replace('patterns-', 'checkpoint-')
+                                                 .replace('.jsonl', '.json')), {'offset': 0})
+            with open(os.path.join(directory, name), 'rb') as f:
+                # Lines past the checkpoint belong to a route that was interrupted and will be swept again
+                position = 0
+                for line in f:
+                    position += len(line)
+                    if position > checkpoint['offset']:
+                        break
+                    yield json.loads(line)
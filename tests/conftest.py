@@ -0,0 +1,91 @@
+import asyncio
+import json
+import os
+import sys
+import time
+
+import pytest
+
+from ptv_api import AsyncPTVClient, PTVClient
+from ptv_api.src.transport import AsyncTransport, Transport, TransportResponse
+
+# The benchmarks' mock server stands in for the API
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+
+def _response(answer) -> TransportResponse:
+    if isinstance(answer, TransportResponse):
+        return answer
+    status, body = answer
+    return TransportResponse(status, {}, body if isinstance(body, bytes) else json.dumps(body).encode())
+
+
+class StubTransport(Transport):
+    """
+    Answers every request with handler(url): a TransportResponse or a (status, body) pair, body being bytes or JSON.
+    Answers taking longer than the request's timeout raise TimeoutError. Records the URLs, headers and timeouts of
+    the requests.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.urls = []
+        self.headers = []
+        self.timeouts = []
+
+    def get(self, url: str, headers: dict = None, timeout: float = None) -> TransportResponse:
+        self.urls.append(url)
+        self.headers.append(headers)
+        self.timeouts.append(timeout)
+        started = time.monotonic()
+        answer = self.handler(url)
+        if timeout is not None and time.monotonic() - started > timeout:
+            raise TimeoutError(f"No answer to {url} within {timeout}s")
+        return _response(answer)
+
+
+class AsyncStubTransport(AsyncTransport):
+    """
+    See StubTransport, handler being a coroutine function.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.urls = []
+
+    async def get(self, url: str, headers: dict = None, timeout: float = None) -> TransportResponse:
+        self.urls.append(url)
+        return _response(await asyncio.wait_for(self.handler(url), timeout))
+
+
+@pytest.fixture
+def stub_client():
+    """
+    :return: Function building a PTVClient answered by a handler, see StubTransport
+    """
+    clients = []
+
+    def make(handler, **options):
+        client = PTVClient('key', 1, transport=StubTransport(handler), **options)
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.close()
+
+
+@pytest.fixture
+def async_stub_client():
+    """
+    :return: Function building an AsyncPTVClient answered by a coroutine handler, see AsyncStubTransport
+    """
+    return lambda handler, **options: AsyncPTVClient('key', 1, transport=AsyncStubTransport(handler), **options)
+
+
+@pytest.fixture
+def mock_server():
+    from mock_server import MockPTVServer
+
+    with MockPTVServer() as server:
+        yield server
@@ -0,0 +1,53 @@
+import asyncio
+
+from ptv_api.src.batch import run_batch, run_batch_async
+
+
+def _departures(url):
+    if '/stop/2' in url:
+        return 404, {'message': 'Not found'}
+    return 200, {'departures': [], 'status': {}}
+
+
+def test_failures_are_isolated():
+    def call(stop_id, scale=1):
+        if stop_id == 2:
+            raise ValueError(stop_id)
+        return stop_id * scale
+
+    results = {result.key: result for result in run_batch(call, [(1,), (2,), (3,)], max_workers=2, scale=10)}
+    assert {key: result.result for key, result in results.items() if result.ok} == {(1,): 10, (3,): 30}
+    assert isinstance(results[(2,)].error, ValueError)
+
+
+def test_async_failures_are_isolated():
+    async def call(stop_id):
+        if stop_id == 2:
+            raise ValueError(stop_id)
+        return stop_id
+
+    async def main():
+        return {result.key: result async for result in run_batch_async(call, [(1,), (2,), (3,)])}
+
+    results = asyncio.run(main())
+    assert [key for key, result in sorted(results.items()) if result.ok] == [(1,), (3,)]
+    assert isinstance(results[(2,)].error, ValueError)
+
+
+def test_departures_for_stops(stub_client):
+    client = stub_client(_departures, retry=False)
+    results = {result.key: result for result in client.get_departures_for_stops([(0, 1), (0, 2), (0, 3)])}
+    assert results[(0, 1)].result == results[(0, 3)].result == {'departures': [], 'status': {}}
+    assert isinstance(results[(0, 2)].error, RuntimeError)
+
+
+def test_async_departures_for_stops(async_stub_client):
+    async def departures(url):
+        return _departures(url)
+
+    async def main():
+        client = async_stub_client(departures, retry=False)
+        return {result.key: result async for result in client.get_departures_for_stops([(0, 1), (0, 2)])}
+
+    results = asyncio.run(main())
+    assert results[(0, 1)].ok and isinstance(results[(0, 2)].error, RuntimeError)
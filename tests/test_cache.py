@@ -0,0 +1,102 @@
+import time
+
+import pytest
+
+from ptv_api import ResponseCache, SQLiteCache
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def cache(request, tmp_path):
+    ttls = {'/v3/departures': 0.1, '/v3/routes': 60}
+    if request.param == 'memory':
+        yield ResponseCache(max_size=2, ttls=ttls)
+    else:
+        cache = SQLiteCache(str(tmp_path / 'cache.db'), max_size=2, ttls=ttls)
+        yield cache
+        cache.close()
+
+
+def test_ttl_per_endpoint(cache):
+    cache.set('/v3/departures/route_type/0/stop/1', '/v3/departures/route_type/0/stop/1', b'departures')
+    cache.set('/v3/routes', '/v3/routes', b'routes')
+    assert cache.get('/v3/departures/route_type/0/stop/1') == b'departures'
+    time.sleep(0.15)
+    assert cache.get('/v3/departures/route_type/0/stop/1') is None
+    assert cache.get('/v3/routes') == b'routes'
+
+
+def test_uncached_endpoint(cache):
+    cache.set('/v3/unknown', '/v3/unknown', b'body')
+    assert cache.get('/v3/unknown') is None
+    assert len(cache) == 0
+
+
+def test_stale_lookup(cache):
+    cache.set('/v3/departures/route_type/0/stop/1', '/v3/departures/route_type/0/stop/1', b'departures')
+    assert cache.lookup('/v3/departures/route_type/0/stop/1') == (b'departures', False)
+    time.sleep(0.15)
+    assert cache.lookup('/v3/departures/route_type/0/stop/1', max_stale=60) == (b'departures', True)
+    assert cache.lookup('/v3/departures/route_type/0/stop/1') == (None, False)
+
+
+def test_evicts_beyond_max_size(cache):
+    for route_id in range(3):
+        cache.set(f'/v3/routes/{route_id}', '/v3/routes', str(route_id).encode())
+    assert len(cache) == 2
+    assert cache.get('/v3/routes/0') is None
+    assert cache.get('/v3/routes/2') == b'2'
+
+
+def test_least_recently_used_is_evicted():
+    cache = ResponseCache(max_size=2)
+    cache.set('/v3/routes/0', '/v3/routes', b'0')
+    cache.set('/v3/routes/1', '/v3/routes', b'1')
+    cache.get('/v3/routes/0')
+    cache.set('/v3/routes/2', '/v3/routes', b'2')
+    assert cache.get('/v3/routes/0') == b'0'
+    assert cache.get('/v3/routes/1') is None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_revalidate(cache):
+    cache.set('/v3/departures/route_type/0/stop/1', '/v3/departures/route_type/0/stop/1', b'departures',
+              {'ETag': '"1"'})
+    time.sleep(0.15)
+    assert cache.validators('/v3/departures/route_type/0/stop/1') == {'If-None-Match': '"1"'}
+    assert cache.revalidate('/v3/departures/route_type/0/stop/1', '/v3/departures/route_type/0/stop/1') == \
+        b'departures'
+    assert cache.get('/v3/departures/route_type/0/stop/1') == b'departures'
+
+
+def test_invalidate(cache):
+    cache.set('/v3/departures/route_type/0/stop/1', '/v3/departures/route_type/0/stop/1', b'departures')
+    cache.set('/v3/routes', '/v3/routes', b'routes')
+    assert cache.invalidate('/v3/departures') == 1
+    assert cache.get('/v3/routes') == b'routes'
+    assert cache.invalidate() == 1
+    assert len(cache) == 0
+
+
+def test_client_serves_repeated_requests_from_cache(stub_client):
+    client = stub_client(lambda url: (200, {'routes': [], 'status': {}}), cache=True)
+    assert client.get_route_all() == client.get_route_all()
+    assert len(client.transport.urls) == 1
+
+
+def test_sqlite_cache_persists(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = SQLiteCache(path)
+    cache.set('/v3/routes', '/v3/routes', b'routes')
+    cache.close()
+    cache = SQLiteCache(path, read_only=True)
+    assert cache.get('/v3/routes') == b'routes'
+    cache.close()
+
+
+def test_sqlite_cache_shared_between_clients(stub_client, tmp_path):
+    path = str(tmp_path / 'cache.db')
+    first = stub_client(lambda url: (200, {'routes': [], 'status': {}}), cache=SQLiteCache(path))
+    first.get_route_all()
+    second = stub_client(lambda url: (500, b'{}'), cache=SQLiteCache(path), retry=False)
+    assert second.get_route_all() == {'routes': [], 'status': {}}
+    assert second.transport.urls == []
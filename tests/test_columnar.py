@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from ptv_api.columnar import MISSING, DeparturesBuilder, DisruptionsBuilder, RunsBuilder
+
+DEPARTURES = {
+    'departures': [
+        {'stop_id': 1071, 'route_id': 11, 'run_id': 948, 'run_ref': '948', 'direction_id': 1,
+         'disruption_ids': [7, 8], 'scheduled_departure_utc': '2030-01-01T00:00:00Z',
+         'estimated_departure_utc': '2030-01-01T00:01:00Z', 'at_platform': True, 'platform_number': '1',
+         'flags': 'S_WCA', 'departure_sequence': 0},
+        {'stop_id': 1071, 'run_ref': '949', 'scheduled_departure_utc': '2030-01-01T00:10:00Z', 'at_platform': False},
+        {'stop_id': 1072, 'run_ref': '950', 'disruption_ids': []},
+    ],
+    'status': {},
+}
+
+
+def test_departures_columns():
+    builder = DeparturesBuilder()
+    assert builder.append(json.dumps(DEPARTURES).encode()) == 3
+    assert builder.append({'departures': []}) == 0
+    columns = builder.columns()
+    assert len(builder) == 3
+    assert columns['stop_id'].dtype == np.int32 and columns['stop_id'].tolist() == [1071, 1071, 1072]
+    assert columns['route_id'].tolist() == [11, MISSING, MISSING]
+    assert columns['run_ref'].tolist() == ['948', '949', '950']
+    assert columns['scheduled_departure_utc'].astype(str).tolist() == \
+        ['2030-01-01T00:00:00', '2030-01-01T00:10:00', 'NaT']
+    assert columns['at_platform'].dtype == np.bool_ and columns['at_platform'].tolist() == [True, False, False]
+    disruption_ids = columns['disruption_ids']
+    assert [disruption_ids[row].tolist() for row in range(len(disruption_ids))] == [[7, 8], [], []]
+
+
+def test_appends_across_responses():
+    builder = DeparturesBuilder()
+    builder.extend([DEPARTURES, json.dumps(DEPARTURES)])
+    first = builder.columns()
+    builder.append(DEPARTURES)
+    columns = builder.columns()
+    assert len(columns['stop_id']) == 9 and len(columns['disruption_ids']) == 9
+    assert columns['stop_id'][:6].tolist() == first['stop_id'].tolist()
+
+
+def test_empty_builder():
+    columns = RunsBuilder().columns()
+    assert columns['run_id'].dtype == np.int32 and len(columns['run_id']) == 0
+
+
+def test_disruptions_across_modes():
+    builder = DisruptionsBuilder()
+    builder.append({'disruptions': {
+        'metro_train': [{'disruption_id': 1, 'routes': [{'route_id': 3}, {'route_id': 4}],
+                         'stops': [{'stop_id': 5}], 'display_on_board': True, 'published_on': '2030-01-01T00:00:00Z'}],
+        'general': [{'disruption_id': 2}],
+    }})
+    columns = builder.columns()
+    assert columns['disruption_id'].tolist() == [1, 2]
+    assert columns['route_ids'][0].tolist() == [3, 4] and columns['route_ids'][1].tolist() == []
+    assert columns['stop_ids'].offsets.tolist() == [0, 1, 1]
+    assert columns['display_on_board'].tolist() == [True, False]
+
+
+def test_arrow_nulls():
+    pytest.importorskip('pyarrow')
+    table = DeparturesBuilder()
+    table.append(DEPARTURES)
+    table = table.to_arrow()
+    assert table.column('route_id').to_pylist() == [11, None, None]
+    assert table.column('at_platform').to_pylist() == [True, False, None]
+    assert table.column('estimated_departure_utc').null_count == 2
+    assert table.column('disruption_ids').to_pylist() == [[7, 8], [], []]
@@ -0,0 +1,70 @@
+import json
+import time
+
+import pytest
+
+from ptv_api import ResponseCache
+from ptv_api.delta import ChangeTracker, NetworkRefresher
+from ptv_api.models import decode_routes
+from ptv_api.src.transport import TransportResponse
+
+
+def _routes(*routes) -> bytes:
+    return json.dumps({'routes': [{'route_id': route_id, 'route_type': 0, 'route_name': name}
+                                  for route_id, name in routes], 'status': {}}).encode()
+
+
+def test_change_tracker():
+    tracker = ChangeTracker(decode_routes, lambda route: route.route_id)
+    delta = tracker.update(_routes((1, 'Pakenham'), (2, 'Cranbourne')))
+    assert [route.route_id for route in delta.added] == [1, 2] and not delta.changed and not delta.removed
+
+    delta = tracker.update(_routes((1, 'Pakenham'), (2, 'Cranbourne')))
+    assert not delta
+
+    delta = tracker.update(_routes((1, 'Pakenham Line'), (3, 'Frankston')))
+    assert [route.route_id for route in delta.added] == [3]
+    assert [route.route_name for route in delta.changed] == ['Pakenham Line']
+    assert [route.route_id for route in delta.removed] == [2]
+
+
+class _API:
+    """
+    Routes with an ETag, answering 304 to a request revalidating the current version.
+    """
+
+    def __init__(self, transport_headers: list):
+        self.headers = transport_headers
+        self.version = 1
+
+    def __call__(self, url):
+        if (self.headers[-1] or {}).get('If-None-Match') == f'"{self.version}"':
+            return TransportResponse(304, {}, b'')
+        routes = _routes((1, 'Pakenham'), (2, f'Cranbourne v{self.version}'))
+        return TransportResponse(200, {'ETag': f'"{self.version}"'}, routes)
+
+
+def test_network_refresher_revalidates(stub_client):
+    client = stub_client(None, cache=True)
+    client.transport.handler = api = _API(client.transport.headers)
+    refresher = NetworkRefresher(client)
+    assert len(refresher.refresh_routes().added) == 2
+    assert not refresher.refresh_routes()
+    assert client.transport.headers[-1] == {'If-None-Match': '"1"'}
+    api.version = 2
+    assert [route.route_name for route in refresher.refresh_routes().changed] == ['Cranbourne v2']
+
+
+def test_network_refresher_error(stub_client):
+    refresher = NetworkRefresher(stub_client(lambda url: (500, b'{}'), retry=False))
+    with pytest.raises(RuntimeError, match='status 500'):
+        refresher.refresh_routes()
+
+
+def test_client_revalidates_expired_responses(stub_client):
+    client = stub_client(None, cache=ResponseCache(ttls={'/v3/routes': 0.05}))
+    client.transport.handler = _API(client.transport.headers)
+    first = client.get_route_all()
+    time.sleep(0.1)
+    assert client.get_route_all() == first
+    assert client.transport.headers[-1] == {'If-None-Match': '"1"'}
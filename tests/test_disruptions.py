@@ -0,0 +1,79 @@
+import pytest
+
+from ptv_api import ResponseCache
+from ptv_api.disruptions import DisruptionStore
+
+
+def _disruptions(disruption_id: int) -> dict:
+    return {'disruptions': {'metro_train': [{'disruption_id': disruption_id, 'disruption_status': 'Current',
+                                             'routes': [{'route_id': 3}], 'stops': [{'stop_id': 5}]}]},
+            'status': {}}
+
+
+class _API:
+    """
+    Disruptions answered with an increasing disruption_id, or an error once failing is set.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.failing = False
+
+    def __call__(self, url):
+        self.requests += 1
+        if self.failing:
+            return 400, {'message': 'Bad request', 'status': {'version': '3.0', 'health': 0}}
+        if '/v3/disruptions/modes' in url:
+            return 200, {'disruption_modes': [{'disruption_mode': 1, 'disruption_mode_name': 'metro_train'}]}
+        return 200, _disruptions(self.requests)
+
+
+def _ids(response: dict) -> list:
+    return [item['disruption_id'] for item in response['disruptions']['metro_train']]
+
+
+def test_answers_locally(stub_client):
+    api = _API()
+    client = stub_client(api)
+    client.disruption_store = store = DisruptionStore(client)
+    store.refresh()
+    requests = api.requests
+    assert _ids(client.get_disruptions_by_route(3)) == _ids(client.get_disruptions_by_stop(5))
+    assert client.get_disruptions_by_route_and_stop(3, 5, disruption_modes=[1])['disruptions']['metro_train']
+    assert client.get_disruptions_by_route(3, fields='disruptions.metro_train[].disruption_id') == \
+        {'disruptions': {'metro_train': [{'disruption_id': 2}]}}
+    assert api.requests == requests
+
+
+def test_failed_refresh_keeps_previous_copy(stub_client):
+    api = _API()
+    client = stub_client(api, retry=False)
+    client.disruption_store = store = DisruptionStore(client)
+    store.refresh()
+    api.failing = True
+    with pytest.raises(RuntimeError, match='status 400'):
+        store.refresh()
+    assert isinstance(store.error, RuntimeError)
+    assert len(store) == 1
+    api.failing = False
+    assert _ids(client.get_disruptions_by_route(3)) == [2]
+
+
+def test_refresh_bypasses_cache(stub_client):
+    api = _API()
+    client = stub_client(api, cache=ResponseCache(ttls={'/v3/disruptions': 60}))
+    client.disruption_store = store = DisruptionStore(client)
+    store.refresh()
+    store.refresh()
+    assert _ids(client.get_disruptions_by_route(3)) == [3]
+
+
+def test_async_client_store_is_not_started(async_stub_client):
+    async def handler(url):
+        return 200, _disruptions(1)
+
+    store = DisruptionStore(async_stub_client(handler))
+    with pytest.raises(TypeError, match='refresh_async'):
+        store.start()
+    with pytest.raises(TypeError, match='refresh_async'):
+        store.refresh()
@@ -0,0 +1,56 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from ptv_api.geopath import (Geopath, decode_delta, decode_geopaths, decode_polyline, encode_delta, encode_polyline,
+                             parse_path, snap)
+
+PATH = '-37.8183 144.9671, -37.8183 144.9771,-37.8283 144.9771'
+
+
+def test_parse_path():
+    coordinates = parse_path(PATH)
+    assert coordinates.shape == (3, 2)
+    assert coordinates[1].tolist() == [-37.8183, 144.9771]
+    assert parse_path([(-37.8, 144.9)], np.float32).dtype == np.float32
+
+
+def test_delta_round_trip():
+    coordinates = parse_path(PATH)
+    deltas = encode_delta(coordinates)
+    assert deltas.dtype == np.int32
+    assert deltas[1].tolist() == [0, 10000]
+    assert np.allclose(decode_delta(deltas), coordinates, atol=1e-6)
+
+
+def test_polyline():
+    # Example of the Encoded Polyline Algorithm Format documentation
+    coordinates = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+    assert encode_polyline(coordinates) == '_p~iF~ps|U_ulLnnqC_mqNvxq`@'
+    assert np.allclose(decode_polyline('_p~iF~ps|U_ulLnnqC_mqNvxq`@'), coordinates, atol=1e-5)
+    assert np.allclose(decode_polyline(encode_polyline(parse_path(PATH))), parse_path(PATH), atol=1e-5)
+
+
+def test_snap():
+    coordinates = parse_path(PATH)
+    length = Geopath(coordinates).length()
+    first_leg = Geopath(coordinates[:2]).length()
+    # 0.0005 degrees north of the middle of the first segment
+    along, offset, latitude, longitude = snap(coordinates, -37.8178, 144.9721)
+    assert along == pytest.approx(first_leg / 2, rel=1e-3)
+    assert offset == pytest.approx(55.6, abs=0.5)
+    assert (latitude, longitude) == pytest.approx((-37.8183, 144.9721))
+    # Positions past the ends snap to them
+    along, _, _, _ = snap(coordinates, [-37.8183, -37.84], [144.95, 144.9771])
+    assert along.tolist() == pytest.approx([0, length])
+
+
+def test_decode_geopaths():
+    response = {
+        'geopath': [{'direction_id': 1, 'valid_from': '2030-01-01', 'paths': [PATH]}],
+        'routes': {'11': {'route_id': 11, 'geopath': [{'direction_id': 2, 'paths': [PATH, PATH]}]}},
+    }
+    geopaths = decode_geopaths(response)
+    assert [(g.route_id, g.direction_id) for g in geopaths] == [(None, 1), (11, 2), (11, 2)]
+    assert geopaths[0].valid_from == '2030-01-01'
+    assert decode_geopaths({'routes': {}}) == []
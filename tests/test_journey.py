@@ -0,0 +1,71 @@
+from ptv_api.journey import Timetable, _utc as utc
+
+T0 = 1893456000  # 2030-01-01T00:00:00Z
+
+
+def _pattern(run_ref: str, route_id: int, stops: list) -> dict:
+    """
+    :param stops: (stop_id, minutes after T0) of each stop of the run, in order
+    """
+    return {'departures': [{'run_ref': run_ref, 'route_id': route_id, 'stop_id': stop_id, 'departure_sequence': i,
+                            'scheduled_departure_utc': _utc(minutes)} for i, (stop_id, minutes) in enumerate(stops)],
+            'status': {}}
+
+
+def _utc(minutes: int) -> str:
+    return utc(T0 + minutes * 60)
+
+
+def _timetable() -> Timetable:
+    timetable = Timetable()
+    # Run a goes 1 -> 2 -> 3, run b 2 -> 4, run c 1 -> 4 slowly
+    timetable.add_pattern(_pattern('a', 1, [(1, 0), (2, 10), (3, 20)]))
+    timetable.add_pattern(_pattern('b', 2, [(2, 15), (4, 25)]))
+    timetable.add_pattern(_pattern('c', 3, [(1, 5), (4, 60)]))
+    timetable.build()
+    return timetable
+
+
+def test_earliest_arrival_with_transfer():
+    legs = _timetable().earliest_arrival(1, 4, T0)
+    assert [(leg.run_ref, leg.from_stop_id, leg.to_stop_id) for leg in legs] == [('a', 1, 2), ('b', 2, 4)]
+    assert legs[-1].arrival_utc == _utc(25)
+
+
+def test_transfer_time_is_respected():
+    legs = _timetable().earliest_arrival(1, 4, T0, transfer_time=6 * 60)
+    assert [leg.run_ref for leg in legs] == ['c']
+
+
+def test_unreachable_and_unknown_stops():
+    timetable = _timetable()
+    assert timetable.earliest_arrival(4, 1, T0) is None
+    assert timetable.earliest_arrival(1, 99, T0) is None
+    assert timetable.earliest_arrival(1, 1, T0) == []
+
+
+def test_update_departure_in_place():
+    timetable = _timetable()
+    timetable.earliest_arrival(1, 4, T0)
+    # Run b leaves stop 2 before run a gets there: the transfer is missed
+    assert timetable.update_departure('b', 2, _utc(8))
+    assert not timetable._dirty
+    assert list(timetable._departures) == sorted(timetable._departures)
+    assert [leg.run_ref for leg in timetable.earliest_arrival(1, 4, T0)] == ['c']
+    # Run a arrives late at stop 3
+    assert timetable.update_departure('a', 3, _utc(30))
+    assert timetable.earliest_arrival(1, 3, T0)[-1].arrival_utc == _utc(30)
+
+    rebuilt = Timetable()
+    rebuilt.add_pattern(_pattern('a', 1, [(1, 0), (2, 10), (3, 30)]))
+    rebuilt.add_pattern(_pattern('b', 2, [(2, 8), (4, 25)]))
+    rebuilt.add_pattern(_pattern('c', 3, [(1, 5), (4, 60)]))
+    rebuilt.build()
+    assert sorted(zip(timetable._departures, timetable._arrivals)) == \
+        sorted(zip(rebuilt._departures, rebuilt._arrivals))
+
+
+def test_update_unknown_run_or_stop():
+    timetable = _timetable()
+    assert not timetable.update_departure('z', 1, T0)
+    assert not timetable.update_departure('a', 4, T0)
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from ptv_api.src.jsonstream import iter_items
+
+
+def _chunks(document, size: int) -> list:
+    data = json.dumps(document, ensure_ascii=False).encode()
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+DOCUMENT = {
+    'status': {'version': '3.0', 'health': 1},
+    'outlets': [{'outlet_name': 'Café "7-Eleven"', 'outlet_business_hour_mon': None, 'outlet_latitude': -37.8},
+                {'outlet_name': 'Nested [arrays] {and} objects', 'tags': [[1, 2], {'a': []}]}],
+    'disruptions': {'metro_train': [{'disruption_id': 1}], 'metro_tram': [], 'general': [{'disruption_id': 2}]},
+}
+
+
+@pytest.mark.parametrize('size', [1, 2, 7, 1 << 16])
+def test_items_across_chunk_boundaries(size):
+    assert list(iter_items(_chunks(DOCUMENT, size), ('outlets',))) == DOCUMENT['outlets']
+
+
+@pytest.mark.parametrize('size', [1, 5, 1 << 16])
+def test_wildcard_path(size):
+    items = list(iter_items(_chunks(DOCUMENT, size), ('disruptions', '*')))
+    assert items == [{'disruption_id': 1}, {'disruption_id': 2}]
+
+
+def test_missing_and_empty_arrays():
+    assert list(iter_items(_chunks({'outlets': []}, 3), ('outlets',))) == []
+    assert list(iter_items(_chunks({'status': {}}, 3), ('outlets',))) == []
+
+
+def test_truncated_document():
+    data = json.dumps(DOCUMENT).encode()
+    with pytest.raises(ValueError):
+        list(iter_items([data[:len(data) // 2]], ('outlets',)))
+
+
+def test_client_streams_items(stub_client):
+    client = stub_client(lambda url: (200, DOCUMENT))
+    assert list(client.iter_outlets()) == DOCUMENT['outlets']
+    assert [outlet.outlet_name for outlet in client.iter_outlets(typed=True)] == \
+        [outlet['outlet_name'] for outlet in DOCUMENT['outlets']]
+    assert [disruption['disruption_id'] for disruption in client.iter_disruptions()] == [1, 2]
+
+
+def test_client_stream_error_raises(stub_client):
+    client = stub_client(lambda url: (500, {'message': 'Internal error'}))
+    with pytest.raises(RuntimeError, match='status 500'):
+        list(client.iter_outlets())
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ptv_api import LatencyPolicy, RateLimiter, ResponseCache
+
+DEPARTURES = {'departures': [], 'status': {}}
+
+
+def test_every_endpoint_takes_a_deadline(stub_client):
+    client = stub_client(lambda url: (200, {'route_types': [], 'status': {}}))
+    assert client.get_route_types(deadline=1)['route_types'] == []
+    client.get_outlets_by_geolocation(-37.8, 144.9, deadline=1)
+    client.get_disruption_modes(deadline=1)
+    assert all('deadline' not in url for url in client.transport.urls)
+    assert all(0 < timeout <= 1 for timeout in client.transport.timeouts)
+
+
+def test_deadline_bounds_rate_limiter_wait(stub_client):
+    client = stub_client(lambda url: (200, DEPARTURES), rate_limiter=RateLimiter(rate=0.5, burst=1))
+    client.get_departures_by_stop(0, 1)
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        client.get_departures_by_stop(0, 2, deadline=0.1)
+    with pytest.raises(TimeoutError):
+        list(client.iter_runs_by_route(3, deadline=0.1))
+    assert time.monotonic() - started < 0.5
+    assert len(client.transport.urls) == 1
+
+
+def test_deadline_bounds_rate_limiter_wait_of_tasks(async_stub_client):
+    async def answer(url):
+        return 200, DEPARTURES
+
+    async def main():
+        client = async_stub_client(answer, rate_limiter=RateLimiter(rate=0.5, burst=1))
+        await client.get_departures_by_stop(0, 1)
+        with pytest.raises(TimeoutError):
+            await client.get_departures_by_stop(0, 2, deadline=0.1)
+        return client
+
+    started = time.monotonic()
+    client = asyncio.run(main())
+    assert time.monotonic() - started < 0.5
+    assert len(client.transport.urls) == 1
+
+
+def test_deadline_does_not_fail_coalesced_callers(stub_client):
+    def slow(url):
+        time.sleep(0.3)
+        return 200, DEPARTURES
+
+    client = stub_client(slow)
+    outcomes = {}
+
+    def call(name, **kwargs):
+        try:
+            outcomes[name] = client.get_departures_by_stop(0, 1, **kwargs)
+        except Exception as e:
+            outcomes[name] = e
+
+    hurried = threading.Thread(target=call, args=('hurried',), kwargs={'deadline': 0.1})
+    hurried.start()
+    time.sleep(0.02)
+    patient = threading.Thread(target=call, args=('patient',))
+    patient.start()
+    hurried.join()
+    patient.join()
+    assert isinstance(outcomes['hurried'], TimeoutError)
+    assert outcomes['patient'] == DEPARTURES
+
+
+def test_deadline_does_not_fail_coalesced_tasks(async_stub_client):
+    async def slow(url):
+        await asyncio.sleep(0.3)
+        return 200, DEPARTURES
+
+    async def main():
+        client = async_stub_client(slow)
+        hurried = asyncio.ensure_future(client.get_departures_by_stop(0, 1, deadline=0.1))
+        await asyncio.sleep(0.02)
+        patient = asyncio.ensure_future(client.get_departures_by_stop(0, 1))
+        return await asyncio.gather(hurried, patient, return_exceptions=True)
+
+    hurried, patient = asyncio.run(main())
+    assert isinstance(hurried, TimeoutError)
+    assert patient == DEPARTURES
+
+
+def test_background_refreshes_do_not_starve_requests(stub_client):
+    def slow(url):
+        time.sleep(0.05)
+        return 200, DEPARTURES
+
+    latency = LatencyPolicy(stale_while_revalidate=60, min_samples=1, max_workers=2, min_hedge_delay=0.01)
+    client = stub_client(slow, cache=ResponseCache(ttls={'/v3/departures': 0.1}), latency=latency)
+    for stop_id in range(3):
+        client.get_departures_by_stop(0, stop_id)
+    time.sleep(0.2)
+    # Served stale, refreshing three responses on two threads
+    for stop_id in range(3):
+        client.get_departures_by_stop(0, stop_id)
+
+    done = threading.Event()
+    threading.Thread(target=lambda: (client.get_departures_by_stop(0, 99), done.set()), daemon=True).start()
+    assert done.wait(3)
@@ -0,0 +1,60 @@
+import pytest
+
+from ptv_api import MetricsRegistry, RetryPolicy
+from ptv_api.poller import DeparturePoller
+from ptv_api.src.metrics import endpoint_template
+
+
+@pytest.mark.parametrize('endpoint, template', [
+    ('/v3/departures/route_type/0/stop/1071', '/v3/departures/route_type/{}/stop/{}'),
+    ('/v3/pattern/run/1-FKN-mf-8-R/route_type/0', '/v3/pattern/run/{}/route_type/{}'),
+    ('/v3/stops/location/-37.818,144.952', '/v3/stops/location/{}'),
+    ('/v3/search/South Yarra', '/v3/search/{}'),
+    ('/v3/routes', '/v3/routes'),
+])
+def test_endpoint_template(endpoint, template):
+    assert endpoint_template(endpoint) == template
+
+
+def test_render():
+    metrics = MetricsRegistry(buckets=(0.1, 1))
+    metrics.observe('network', '/v3/routes', 0.05)
+    metrics.observe('network', '/v3/routes', 0.5)
+    metrics.response('/v3/routes', 200, 10)
+    metrics.error('/v3/search/{}', TimeoutError())
+    metrics.retry('/v3/routes', 'say "503"\n')
+    lines = metrics.render().splitlines()
+    assert 'ptv_stage_seconds_bucket{endpoint="/v3/routes",stage="network",le="0.1"} 1' in lines
+    assert 'ptv_stage_seconds_bucket{endpoint="/v3/routes",stage="network",le="+Inf"} 2' in lines
+    assert 'ptv_stage_seconds_count{endpoint="/v3/routes",stage="network"} 2' in lines
+    assert 'ptv_responses_total{endpoint="/v3/routes",status="200"} 1' in lines
+    assert 'ptv_response_bytes_total{endpoint="/v3/routes"} 10' in lines
+    assert 'ptv_errors_total{endpoint="/v3/search/{}",error="TimeoutError"} 1' in lines
+    assert 'ptv_retries_total{endpoint="/v3/routes",reason="say \\"503\\"\\n"} 1' in lines
+
+
+def test_client_reports_every_stage(stub_client):
+    metrics = MetricsRegistry()
+    answers = iter([(503, b'{}'), (200, {'departures': [], 'status': {}})])
+    client = stub_client(lambda url: next(answers), instrumentation=metrics, cache=True,
+                         retry=RetryPolicy(backoff=0))
+    client.get_departures_by_stop(0, 1071)
+    client.get_departures_by_stop(0, 1071)
+    template = '/v3/departures/route_type/{}/stop/{}'
+    assert {stage for stage, endpoint in metrics.histograms if endpoint == template} == {'sign', 'network', 'decode'}
+    assert metrics.responses == {(template, 503): 1, (template, 200): 1}
+    assert metrics.retries == {(template, '503'): 1}
+    assert metrics.cache_lookups == {(template, 'miss'): 1, (template, 'hit'): 1}
+
+
+def test_client_without_instrumentation(stub_client):
+    client = stub_client(lambda url: (200, {'departures': [], 'status': {}}))
+    assert client.get_departures_by_stop(0, 1071) == {'departures': [], 'status': {}}
+
+
+def test_poller_reports_model_stage(stub_client):
+    metrics = MetricsRegistry()
+    client = stub_client(lambda url: (200, {'departures': [{'run_ref': '1', 'stop_id': 5}], 'status': {}}),
+                         instrumentation=metrics)
+    DeparturePoller(client, [(0, 5)]).poll_once()
+    assert ('model', '/v3/departures/route_type/{}/stop/{}') in metrics.histograms
@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+from ptv_api import AsyncPTVClient, PTVClient
+
+
+def test_answers_signed_requests(mock_server):
+    from mock_server import MockPTVServer
+
+    with PTVClient(MockPTVServer.API_KEY, MockPTVServer.DEVELOPER_ID, base_url=mock_server.url) as client:
+        assert client.validate()
+        departures = client.get_departures_by_stop(0, 1, fields='departures[].run_ref')['departures']
+        assert departures and all(list(departure) == ['run_ref'] for departure in departures)
+        assert client.get_pattern_by_run_ref(departures[0]['run_ref'], 0)['departures']
+
+
+def test_rejects_wrong_credentials(mock_server):
+    with PTVClient('wrong-key', 1, base_url=mock_server.url) as client:
+        with pytest.raises(RuntimeError, match='authentication fail'):
+            client.validate()
+        with pytest.raises(RuntimeError, match='rejected or throttled'):
+            client.get_route_types()
+
+
+def test_async_client(mock_server):
+    from mock_server import MockPTVServer
+
+    async def main():
+        client = AsyncPTVClient(MockPTVServer.API_KEY, MockPTVServer.DEVELOPER_ID, base_url=mock_server.url)
+        async with client:
+            return await asyncio.gather(*(client.get_departures_by_stop(0, stop_id) for stop_id in range(5)))
+
+    assert all(response['departures'] for response in asyncio.run(main()))
@@ -0,0 +1,49 @@
+import json
+
+from ptv_api.models import (Departure, Stop, decode_departures, decode_disruptions, decode_routes, decode_runs,
+                            decode_stops)
+
+DEPARTURES = {
+    'departures': [
+        {'stop_id': 1071, 'route_id': 11, 'run_id': 948, 'run_ref': '948', 'direction_id': 1,
+         'disruption_ids': [7], 'scheduled_departure_utc': '2030-01-01T00:00:00Z', 'estimated_departure_utc': None,
+         'at_platform': False, 'platform_number': '1', 'flags': 'S_WCA', 'departure_sequence': 0,
+         'unknown_key': 'dropped'},
+        {'stop_id': 1071, 'run_ref': '949'},
+    ],
+    'status': {},
+}
+
+
+def test_decode_departures():
+    departures = decode_departures(json.dumps(DEPARTURES).encode())
+    assert isinstance(departures[0], Departure)
+    assert departures[0].disruption_ids == (7,)
+    assert departures[0].to_dict()['platform_number'] == '1'
+    assert 'unknown_key' not in departures[0].to_dict()
+    # Missing keys are None
+    assert departures[1].route_id is None and departures[1].at_platform is None
+
+
+def test_decode_from_str_and_dict():
+    assert decode_departures(json.dumps(DEPARTURES)) == decode_departures(DEPARTURES)
+
+
+def test_interned_strings_are_shared():
+    stops = {'stops': [{'stop_id': i, 'stop_suburb': ''.join(['Richmo', 'nd'])} for i in range(2)]}
+    first, second = decode_stops(stops, intern=True)
+    assert isinstance(first, Stop)
+    assert first.stop_suburb is second.stop_suburb
+
+
+def test_missing_or_empty_arrays():
+    assert decode_runs({'status': {}}) == []
+    assert decode_routes({'routes': None}) == []
+
+
+def test_decode_disruptions_across_modes():
+    disruptions = decode_disruptions({'disruptions': {
+        'metro_train': [{'disruption_id': 1, 'routes': [{'route_id': 3}, {'route_id': 4}], 'stops': []}],
+        'general': [{'disruption_id': 2}],
+    }})
+    assert [(d.disruption_id, d.route_ids, d.stop_ids) for d in disruptions] == [(1, (3, 4), ()), (2, (), ())]
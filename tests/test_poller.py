@@ -0,0 +1,63 @@
+import time
+
+from ptv_api.poller import ADDED, REMOVED, DeparturePoller
+
+
+class _API:
+    def __init__(self):
+        self.departures = [{'run_ref': '1', 'stop_id': 5, 'route_id': 3,
+                            'scheduled_departure_utc': '2030-01-01T00:00:00Z'}]
+        self.status = 200
+
+    def __call__(self, url):
+        if self.status != 200:
+            return self.status, {'message': 'Bad request', 'status': {'version': '3.0', 'health': 0}}
+        return 200, {'departures': self.departures, 'status': {}}
+
+
+def _poll(poller: DeparturePoller) -> list:
+    poller._next_poll[(0, 5)] = 0
+    return [event.kind for event in poller.poll_once()]
+
+
+def test_reports_changes(stub_client):
+    api = _API()
+    poller = DeparturePoller(stub_client(api), [(0, 5)])
+    assert _poll(poller) == [ADDED]
+    assert _poll(poller) == []
+    api.departures = []
+    assert _poll(poller) == [REMOVED]
+
+
+def test_error_response_is_not_removal(stub_client):
+    api = _API()
+    poller = DeparturePoller(stub_client(api, retry=False), [(0, 5)])
+    assert _poll(poller) == [ADDED]
+    api.status = 400
+    assert _poll(poller) == []
+    assert isinstance(poller.errors[(0, 5)], RuntimeError)
+    api.status = 200
+    assert _poll(poller) == []
+    assert not poller.errors
+
+
+def test_failing_callback_does_not_stop_polling(stub_client):
+    api = _API()
+    calls = []
+
+    def on_change(events):
+        calls.append(events)
+        raise ValueError('callback failed')
+
+    poller = DeparturePoller(stub_client(api), [(0, 5)], on_change=on_change, min_interval=0.05, max_interval=0.05)
+    poller.start()
+    try:
+        deadline = time.monotonic() + 2
+        while len(calls) < 2 and time.monotonic() < deadline:
+            api.departures = [{**api.departures[0], 'run_ref': str(len(calls) + 10)}]
+            time.sleep(0.02)
+        assert len(calls) >= 2
+        assert poller._thread.is_alive()
+        assert isinstance(poller.error, ValueError)
+    finally:
+        poller.stop()
@@ -0,0 +1,75 @@
+import pytest
+
+from ptv_api.models import Route, Stop
+from ptv_api.search import SearchIndex
+from ptv_api.snapshot import NetworkSnapshot
+from ptv_api.src.projection import parse_fields, project, subtree
+
+RESPONSE = {
+    'departures': [{'run_ref': '1', 'stop_id': 5, 'flags': 'S_WCA'}, {'run_ref': '2', 'stop_id': 5}],
+    'stops': {'5': {'stop_name': 'Flinders Street', 'stop_suburb': 'Melbourne'}},
+    'status': {'version': '3.0', 'health': 1},
+}
+
+
+@pytest.mark.parametrize('spec, tree', [
+    ('status', {'status': True}),
+    ('departures[].run_ref,stop_id', {'departures': {'run_ref': True, 'stop_id': True}}),
+    (['departures[].run_ref', 'stops.*.stop_name', 'status'],
+     {'departures': {'run_ref': True}, 'stops': {'*': {'stop_name': True}}, 'status': True}),
+    ('departures,departures.run_ref', {'departures': True}),
+    (' status , ,departures[].run_ref ', {'status': True, 'departures': {'run_ref': True}}),
+])
+def test_parse_fields(spec, tree):
+    assert parse_fields(spec) == tree
+
+
+def test_project():
+    assert project(RESPONSE, parse_fields('departures[].run_ref,flags')) == \
+        {'departures': [{'run_ref': '1', 'flags': 'S_WCA'}, {'run_ref': '2'}]}
+    assert project(RESPONSE, parse_fields('stops.*.stop_name,status.health')) == \
+        {'stops': {'5': {'stop_name': 'Flinders Street'}}, 'status': {'health': 1}}
+    assert project(RESPONSE, parse_fields('missing')) == {}
+
+
+def test_subtree():
+    tree = parse_fields(['disruptions.*.title', 'status'])
+    assert subtree(tree, ('disruptions', '*')) == {'title': True}
+    assert subtree(tree, ('outlets',)) == {}
+    assert subtree(parse_fields('disruptions'), ('disruptions', '*')) is True
+
+
+def test_endpoint_fields(stub_client):
+    client = stub_client(lambda url: (200, RESPONSE))
+    assert client.get_departures_by_stop(0, 5, fields='departures[].run_ref') == \
+        {'departures': [{'run_ref': '1'}, {'run_ref': '2'}]}
+    assert 'fields' not in client.transport.urls[0]
+
+
+def _search_client(stub_client):
+    client = stub_client(lambda url: (200, {'stops': [], 'routes': [], 'outlets': [], 'status': {}}))
+    client.search_index = SearchIndex(NetworkSnapshot(
+        routes=[Route(1, 0, 'Pakenham', '', '2-1')],
+        stops=[Stop(1, 'South Yarra Station', 'South Yarra', 0, -37.8, 144.9, 0, None, ())]))
+    return client
+
+
+def test_local_answers_apply_fields(stub_client):
+    client = _search_client(stub_client)
+    assert client.search('South Ya', fields='stops[].stop_id') == {'stops': [{'stop_id': 1}]}
+    assert client.transport.urls == []
+
+
+def test_local_answers_ignore_deadline(stub_client):
+    client = _search_client(stub_client)
+    assert client.search('South Ya', deadline=1)['stops']
+    assert client.transport.urls == []
+
+
+def test_streamed_items_apply_fields(stub_client):
+    runs = {'runs': [{'run_ref': '1', 'route_id': 3, 'destination_name': 'Pakenham'}], 'status': {}}
+    client = stub_client(lambda url: (200, runs))
+    assert list(client.iter_runs_by_route(3, fields='runs[].run_ref', deadline=5)) == [{'run_ref': '1'}]
+    url = client.transport.urls[0]
+    assert 'fields' not in url and 'deadline' not in url
+    assert 0 < client.transport.timeouts[0] <= 5
@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import pytest
+
+from ptv_api import PRIORITY_HIGH, PRIORITY_LOW, RateLimiter, RetryPolicy
+from ptv_api.src.transport import TransportResponse
+
+
+def test_burst_then_rate():
+    limiter = RateLimiter(rate=20, burst=5)
+    started = time.monotonic()
+    for _ in range(5):
+        limiter.acquire()
+    assert time.monotonic() - started < 0.05
+    assert not limiter.try_acquire()
+    for _ in range(4):
+        limiter.acquire()
+    assert 0.15 <= time.monotonic() - started < 0.5
+
+
+def test_higher_priority_waiters_go_first():
+    limiter = RateLimiter(rate=10, burst=1)
+    limiter.acquire()
+    limiter._wait(PRIORITY_HIGH, 1)
+    time.sleep(0.15)
+    assert not limiter.try_acquire(PRIORITY_LOW)
+    assert limiter.try_acquire(PRIORITY_HIGH)
+    limiter._wait(PRIORITY_HIGH, -1)
+
+
+def test_acquire_async():
+    limiter = RateLimiter(rate=20, burst=1)
+
+    async def main():
+        for _ in range(3):
+            await limiter.acquire_async()
+
+    started = time.monotonic()
+    asyncio.run(main())
+    assert 0.08 <= time.monotonic() - started < 0.5
+
+
+def test_acquire_gives_up_at_timeout():
+    limiter = RateLimiter(rate=0.5, burst=1)
+    limiter.acquire()
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        limiter.acquire(timeout=0.1)
+    with pytest.raises(TimeoutError):
+        asyncio.run(limiter.acquire_async(timeout=0.1))
+    assert time.monotonic() - started < 0.2
+    assert not any(limiter._waiting.values())
+
+
+def test_retry_delays():
+    policy = RetryPolicy(max_retries=2, backoff=0.5, max_backoff=4)
+    assert 0 <= policy.next_delay(0, TransportResponse(503, {}, b'')) <= 0.5
+    assert policy.next_delay(2, TransportResponse(503, {}, b'')) is None
+    assert policy.next_delay(0, TransportResponse(404, {}, b'')) is None
+    assert policy.next_delay(0, error=ConnectionError()) is not None
+    assert policy.next_delay(0, error=ValueError()) is None
+
+
+def test_retry_after_is_capped():
+    policy = RetryPolicy(max_backoff=30)
+    assert policy.next_delay(0, TransportResponse(429, {'Retry-After': '2'}, b'')) == 2
+    assert policy.next_delay(0, TransportResponse(429, {'Retry-After': '3600'}, b'')) is None
+
+
+def test_client_retries_then_raises(stub_client):
+    client = stub_client(lambda url: (503, b'{}'), retry=RetryPolicy(max_retries=2, backoff=0))
+    with pytest.raises(RuntimeError, match='status 503'):
+        client.get_departures_by_stop(0, 1)
+    assert len(client.transport.urls) == 3
+
+
+def test_client_does_not_wait_for_long_retry_after(stub_client):
+    client = stub_client(lambda url: TransportResponse(429, {'Retry-After': '3600'}, b'{}'))
+    started = time.monotonic()
+    with pytest.raises(RuntimeError, match='status 429'):
+        client.get_departures_by_stop(0, 1)
+    assert time.monotonic() - started < 1
+    assert len(client.transport.urls) == 1
+
+
+def test_client_error_status_raises(stub_client):
+    client = stub_client(lambda url: (404, b'{"message":"Not found"}'))
+    with pytest.raises(RuntimeError, match='status 404'):
+        client.get_departures_by_stop(0, 1)
+
+
+def test_client_throttled_key(stub_client):
+    answers = iter([(403, b'{}'), (200, {'departures': [], 'status': {}})])
+    client = stub_client(lambda url: next(answers), retry=False)
+    with pytest.raises(RuntimeError, match='rejected or throttled'):
+        client.get_departures_by_stop(0, 1)
+    answers = iter([(403, b'{}'), (200, {'departures': [], 'status': {}})])
+    client = stub_client(lambda url: next(answers), retry=RetryPolicy(backoff=0, statuses=(403,)))
+    assert client.get_departures_by_stop(0, 1) == {'departures': [], 'status': {}}
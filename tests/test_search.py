@@ -0,0 +1,50 @@
+from ptv_api.models import Outlet, Route, Stop
+from ptv_api.search import SearchIndex
+from ptv_api.snapshot import NetworkSnapshot
+
+
+def _snapshot() -> NetworkSnapshot:
+    return NetworkSnapshot(
+        routes=[Route(11, 0, 'Pakenham', None, '2-PKM'), Route(6, 1, 'Glen Iris - Moreland', '16', '3-16'),
+                Route(99, 2, None, '999', None)],
+        stops=[Stop(1071, 'South Yarra Station', 'South Yarra', 0, -37.838, 144.992, 0, None, ()),
+               Stop(2000, 'Toorak Rd/Chapel St', 'South Yarra', 1, -37.839, 144.993, 0, None, ()),
+               Stop(3000, None, 'South Yarra', 2, -37.840, 144.994, 0, None, ())],
+        outlets=[Outlet('1', 'South Yarra Newsagency', None, -37.838, 144.992, 'South Yarra', 3141)],
+        route_stops={11: (1071,), 6: (2000,)})
+
+
+def test_matches_prefixes():
+    response = SearchIndex(_snapshot()).search('south yar')
+    assert [stop['stop_id'] for stop in response['stops']] == [3000, 1071, 2000]
+    assert [route['route_id'] for route in response['routes']] == [11, 6]
+    assert [outlet['outlet_name'] for outlet in response['outlets']] == ['South Yarra Newsagency']
+
+
+def test_filters():
+    index = SearchIndex(_snapshot())
+    response = index.search('South Yarra', route_types=[0], include_outlets=False)
+    assert [stop['stop_id'] for stop in response['stops']] == [1071]
+    assert response['outlets'] == []
+    response = index.search('16')
+    assert [route['route_id'] for route in response['routes']] == [6] and response['stops'] == []
+
+
+def test_leaves_unsupported_queries_to_the_api():
+    index = SearchIndex(_snapshot())
+    assert index.search('South Yarra', latitude=-37.8, longitude=144.9) is None
+    assert index.search('Nowhere') is None
+
+
+def test_missing_names_are_sorted_first():
+    response = SearchIndex(_snapshot()).search('999')
+    assert [route['route_id'] for route in response['routes']] == [99]
+
+
+def test_client_answers_locally(stub_client):
+    client = stub_client(lambda url: (200, {'stops': [], 'routes': [], 'outlets': [], 'status': {}}))
+    client.search_index = SearchIndex(_snapshot())
+    assert client.search('Pakenham')['routes'][0]['route_id'] == 11
+    assert client.transport.urls == []
+    client.search('South Yarra', latitude=-37.8, longitude=144.9)
+    assert len(client.transport.urls) == 1
@@ -0,0 +1,15 @@
+from ptv_api.src.get_signature import Signer, get_url
+
+
+def test_memoised_signature_matches_get_url():
+    signer = Signer('key', 1)
+    params = {'route_types': [0, 1], 'max_results': 5}
+    assert signer.sign('/v3/stops/route/1', params) == get_url('/v3/stops/route/1', 'key', 1, params)
+    assert signer.sign('/v3/stops/route/1', params) == get_url('/v3/stops/route/1', 'key', 1, params)
+
+
+def test_memo_keys_on_parameter_types():
+    signer = Signer('key', 1)
+    assert signer.sign('/v3/routes', {'gtfs': True}) != signer.sign('/v3/routes', {'gtfs': 1})
+    assert signer.sign('/v3/routes', {'route_types': [True]}) != signer.sign('/v3/routes', {'route_types': [1]})
+    assert signer.sign('/v3/routes', {'gtfs': 1}) == get_url('/v3/routes', 'key', 1, {'gtfs': 1})
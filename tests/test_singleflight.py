@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ptv_api.src.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_calls_share_one_run():
+    flight = SingleFlight()
+    calls = []
+
+    def work():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'result'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('key', work))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ['result'] * 5
+    assert len(calls) == 1
+    assert flight.in_flight('key') is None
+
+
+def test_error_is_shared_and_not_kept():
+    flight = SingleFlight()
+
+    def fail():
+        raise RuntimeError('failed')
+
+    with pytest.raises(RuntimeError):
+        flight.do('key', fail)
+    assert flight.do('key', lambda: 'result') == 'result'
+
+
+def test_async_concurrent_calls_share_one_task():
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 'result'
+
+    async def main():
+        flight = AsyncSingleFlight()
+        results = await asyncio.gather(*(flight.do('key', work) for _ in range(5)))
+        return results, flight.in_flight('key')
+
+    results, in_flight = asyncio.run(main())
+    assert results == ['result'] * 5
+    assert len(calls) == 1
+    assert in_flight is None
+
+
+def test_async_cancelled_caller_does_not_cancel_others():
+    async def work():
+        await asyncio.sleep(0.05)
+        return 'result'
+
+    async def main():
+        flight = AsyncSingleFlight()
+        first = asyncio.ensure_future(flight.do('key', work))
+        second = asyncio.ensure_future(flight.do('key', work))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == 'result'
+
+
+def test_client_coalesces_identical_requests(stub_client):
+    def slow(url):
+        time.sleep(0.1)
+        return 200, {'departures': [], 'status': {}}
+
+    client = stub_client(slow)
+    threads = [threading.Thread(target=client.get_departures_by_stop, args=(0, 1)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(client.transport.urls) == 1
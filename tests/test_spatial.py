@@ -0,0 +1,40 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from ptv_api.spatial import SpatialIndex
+
+
+def test_nearest_points():
+    index = SpatialIndex([-37.80, -37.81, -37.90], [144.90, 144.91, 145.00])
+    positions, distances = index.query(-37.80, 144.90, max_distance=2000)
+    assert list(positions) == [0, 1]
+    assert distances[0] == 0
+    positions, _ = index.query(-37.80, 144.90, max_results=1)
+    assert list(positions) == [0]
+
+
+def test_empty_index():
+    index = SpatialIndex([], [])
+    for max_distance in (None, 300):
+        positions, distances = index.query(-37.8, 144.9, max_distance=max_distance)
+        assert len(positions) == len(distances) == 0
+
+
+def test_local_geolocation():
+    from ptv_api.models import Stop
+    from ptv_api.snapshot import NetworkSnapshot
+    from ptv_api.spatial import LocalGeolocation
+
+    geolocation = LocalGeolocation(NetworkSnapshot(stops=[
+        Stop(1, 'Flinders Street', 'Melbourne', 0, -37.8183, 144.9671, 0, None, ()),
+        Stop(2, 'Flinders St/Swanston St', 'Melbourne', 1, -37.8179, 144.9668, 0, None, ()),
+        Stop(3, 'Richmond', 'Richmond', 0, -37.8240, 144.9900, 0, None, ()),
+    ]))
+    stops = geolocation.get_stops_by_geolocation(-37.8183, 144.9671)['stops']
+    assert [stop['stop_id'] for stop in stops] == [1, 2]
+    assert stops[0]['stop_distance'] == 0
+    stops = geolocation.get_stops_by_geolocation(-37.8183, 144.9671, route_types=[1])['stops']
+    assert [stop['stop_id'] for stop in stops] == [2]
+    # A snapshot without outlets answers with none
+    assert geolocation.get_outlets_by_geolocation(-37.8183, 144.9671)['outlets'] == []
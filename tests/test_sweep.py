@@ -0,0 +1,39 @@
+from conftest import StubTransport
+
+from ptv_api.sweep import _sweep_shard, iter_patterns
+
+
+class _API:
+    """
+    Two runs per route, the pattern of run '3-b' failing until failing is cleared.
+    """
+
+    def __init__(self):
+        self.failing = True
+
+    def __call__(self, url):
+        if '/v3/runs/route/' in url:
+            route_id = url.split('/v3/runs/route/')[1].split('/')[0]
+            return 200, {'runs': [{'run_ref': f'{route_id}-{name}', 'route_id': int(route_id), 'route_type': 0}
+                                  for name in 'ab'], 'status': {}}
+        if self.failing and '/v3/pattern/run/3-b/' in url:
+            return 500, {'message': 'Internal error'}
+        return 200, {'departures': [], 'status': {}}
+
+
+def _sweep(tmp_path, api) -> dict:
+    options = {'transport': StubTransport(api), 'retry': False}
+    return _sweep_shard(0, [(2, 0), (3, 0)], str(tmp_path), ('key', 1), options, 2, {})
+
+
+def test_failed_route_is_swept_again_on_resume(tmp_path):
+    api = _API()
+    summary = _sweep(tmp_path, api)
+    assert summary['routes'] == 1 and summary['runs'] == 2
+    assert [route for route, _ in summary['failed_routes']] == [(3, 0)]
+    assert sorted(pattern['run_ref'] for pattern in iter_patterns(str(tmp_path))) == ['2-a', '2-b']
+
+    api.failing = False
+    summary = _sweep(tmp_path, api)
+    assert summary['routes'] == 1 and not summary['failed_routes']
+    assert sorted(pattern['run_ref'] for pattern in iter_patterns(str(tmp_path))) == ['2-a', '2-b', '3-a', '3-b']